@@ -2,8 +2,18 @@ from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
-from models import db, User, Availability, LookingToPlay, MatchInvite, Match, Notification, Court, ReviewTag, PlayerReview
+from models import db, User, MatchParticipant, HeadToHead, PlayerStats, RatingHistory, SnapshotMeta, ResourceVersion, Availability, LookingToPlay, MatchInvite, Match, Notification, Court, ReviewTag, PlayerReview
 from notifications import notify_user
+import elo
+import matchmaking
+import leaderboard as ranking
+from serializers import load_users, serialize_posts, serialize_matches, serialize_invites
+from feed_cache import ResponseCache
+from conditional import conditional
+import search
+import autocomplete
+import slot_index
+import weekmask
 from password_reset import password_reset_bp
 from email_verification import (
     generate_verification_token, send_verification_email,
@@ -12,7 +22,10 @@ from email_verification import (
 from datetime import datetime, date, timedelta
 import os
 import json
+import threading
+import time
 import math
+import base64
 from migrate_all import run_all as run_migrations
 
 # In release mode, serve the built frontend from frontend/dist
@@ -87,7 +100,9 @@ def register():
         user.email_verified = True
 
     db.session.add(user)
+    SnapshotMeta.mark_stale('leaderboard')
     db.session.commit()
+    autocomplete.sync_player(user)
 
     # Send verification email (after commit so user exists)
     if email:
@@ -207,7 +222,12 @@ def update_profile():
             if field == 'preferred_courts':
                 val = (val or '').strip() or None
             setattr(user, field, val)
+    if db.inspect(user).attrs.city.history.has_changes():
+        SnapshotMeta.mark_stale('leaderboard')
     db.session.commit()
+    # Cached feed pages embed author names/NTRP and rank by the viewer's NTRP and courts
+    feed_cache.invalidate()
+    autocomplete.sync_player(user)
     return jsonify(user=user.to_dict())
 
 
@@ -248,16 +268,63 @@ def complete_onboarding():
         user.preferred_courts = _json.dumps(data['preferred_courts']) if data['preferred_courts'] else None
     user.onboarding_complete = True
     db.session.commit()
+    feed_cache.invalidate()
+    autocomplete.sync_player(user)
     return jsonify(user=user.to_dict())
 
 
 # ── Feed (Posts) ──
 
+POSTS_PAGE_SIZE = 20
+POSTS_MAX_PAGE_SIZE = 100
+
+# Feed responses, invalidated by every write that can change what the feed shows
+feed_cache = ResponseCache(max_entries=512, ttl=30)
+
+
+def encode_cursor(kind, values):
+    """Opaque keyset cursor: urlsafe base64 of [kind, *sort key values]."""
+    raw = json.dumps([kind] + [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, kind, parsers):
+    """Inverse of encode_cursor; None if malformed or minted for a different ordering."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or len(raw) != len(parsers) + 1 or raw[0] != kind:
+            return None
+        return [parse(v) for parse, v in zip(parsers, raw[1:])]
+    except (ValueError, TypeError, IndexError):
+        return None
+
+
+def _optional_user():
+    """The caller's User if a valid bearer token was sent, else None (for public endpoints)."""
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        try:
+            from flask_jwt_extended import decode_token
+            token_data = decode_token(auth_header.split(' ')[1])
+            return db.session.get(User, int(token_data['sub']))
+        except Exception:
+            pass
+    return None
+
+
+def _posts_stamp():
+    # Posts also drop out of the feed when they end, without any write
+    next_expiry = db.session.query(db.func.min(LookingToPlay.ends_at)).filter(
+        LookingToPlay.ends_at > datetime.now()).scalar()
+    return ResourceVersion.get('posts', 'users'), next_expiry
+
+
 @app.route('/api/posts')
+@conditional(_posts_stamp)
 def get_posts():
     q = LookingToPlay.query.filter(
         LookingToPlay.claimed_by_id.is_(None),
-        LookingToPlay.play_date >= date.today()
+        LookingToPlay.ends_at > datetime.now(),
     )
 
     # Filter: NTRP level range
@@ -273,7 +340,7 @@ def get_posts():
     # Filter: court/location (case-insensitive substring match)
     court = request.args.get('court', '').strip()
     if court:
-        q = q.filter(LookingToPlay.court.ilike(f'%{court}%'))
+        q = search.filter_substring(q, LookingToPlay, 'post_fts', court, ['court'])
 
     # Filter: date range
     date_from = request.args.get('date_from')
@@ -289,75 +356,64 @@ def get_posts():
         except ValueError:
             pass
 
-    # Sort
+    # Sort. Each mode orders by a tuple of keys ending in id, so the last row's
+    # keys form a keyset cursor and deep pages cost the same as the first.
     sort = request.args.get('sort', 'newest')
-    if sort == 'closest_date':
-        q = q.order_by(LookingToPlay.play_date, LookingToPlay.start_time)
-    elif sort == 'skill_match':
+    # "For You" personalization: rank by skill + court match, scored in SQL
+    for_you = request.args.get('for_you', '').lower() in ('1', 'true')
+    current_user = _optional_user() if sort == 'skill_match' or for_you else None
+    user_ntrp = current_user.ntrp if current_user else None
+    if sort == 'skill_match' and not user_ntrp:
         # Need current user's NTRP for skill sorting; fall back to newest
-        current_user = None
-        auth_header = request.headers.get('Authorization', '')
-        if auth_header.startswith('Bearer '):
-            try:
-                from flask_jwt_extended import decode_token
-                token_data = decode_token(auth_header.split(' ')[1])
-                current_user = User.query.get(int(token_data['sub']))
-            except Exception:
-                pass
-        if current_user and current_user.ntrp:
-            user_ntrp = current_user.ntrp
-            # Sort by how close the post's level midpoint is to user's NTRP
-            mid = db.func.coalesce(
-                (db.func.coalesce(LookingToPlay.level_min, LookingToPlay.level_max, user_ntrp)
-                 + db.func.coalesce(LookingToPlay.level_max, LookingToPlay.level_min, user_ntrp)) / 2.0,
-                user_ntrp
-            )
-            q = q.order_by(db.func.abs(mid - user_ntrp), LookingToPlay.play_date)
-        else:
-            q = q.order_by(LookingToPlay.created_at.desc())
+        sort = 'newest'
+    descending = False
+    if for_you and current_user:
+        sort = 'for_you'
+        score = LookingToPlay.for_you_score(user_ntrp, current_user.court_list)
+        # Negated so every key ascends and a single tuple comparison pages it
+        keys = [(-score, float), (LookingToPlay.play_date, date.fromisoformat), (LookingToPlay.id, int)]
+    elif sort == 'closest_date':
+        keys = [(LookingToPlay.play_date, date.fromisoformat), (LookingToPlay.start_time, str), (LookingToPlay.id, int)]
+    elif sort == 'skill_match':
+        # Sort by how close the post's level midpoint is to user's NTRP
+        mid = db.func.coalesce(
+            (db.func.coalesce(LookingToPlay.level_min, LookingToPlay.level_max, user_ntrp)
+             + db.func.coalesce(LookingToPlay.level_max, LookingToPlay.level_min, user_ntrp)) / 2.0,
+            user_ntrp
+        )
+        keys = [(db.func.abs(mid - user_ntrp), float), (LookingToPlay.play_date, date.fromisoformat),
+                (LookingToPlay.id, int)]
     else:  # newest
-        q = q.order_by(LookingToPlay.created_at.desc())
-
-    # "For You" personalization: if requested, prioritize skill + court match
-    for_you = request.args.get('for_you', '').lower() in ('1', 'true')
-    posts = [p.to_dict() for p in q.all() if p.is_active]
-
-    if for_you:
-        current_user = None
-        auth_header = request.headers.get('Authorization', '')
-        if auth_header.startswith('Bearer '):
-            try:
-                from flask_jwt_extended import decode_token
-                token_data = decode_token(auth_header.split(' ')[1])
-                current_user = User.query.get(int(token_data['sub']))
-            except Exception:
-                pass
-        if current_user:
-            user_ntrp = current_user.ntrp
-            user_courts = (current_user.preferred_courts or '').lower().split(',')
-            user_courts = [c.strip() for c in user_courts if c.strip()]
-
-            def score(p):
-                s = 0
-                # NTRP match scoring (lower distance = better)
-                if user_ntrp and (p.get('level_min') or p.get('level_max')):
-                    lo = p.get('level_min') or p.get('level_max')
-                    hi = p.get('level_max') or p.get('level_min')
-                    if lo <= user_ntrp <= hi:
-                        s += 10  # perfect match
-                    else:
-                        s += max(0, 8 - abs(user_ntrp - (lo + hi) / 2))
-                elif user_ntrp:
-                    s += 5  # no level restriction = open to all
-                # Court match
-                if user_courts and p.get('court'):
-                    if p['court'].lower() in user_courts or any(c in p['court'].lower() for c in user_courts):
-                        s += 5
-                return s
-
-            posts.sort(key=lambda p: (-score(p), p.get('play_date', '')))
-
-    return jsonify(posts=posts)
+        sort = 'newest'
+        keys = [(LookingToPlay.created_at, datetime.fromisoformat), (LookingToPlay.id, int)]
+        descending = True
+
+    limit = max(1, min(request.args.get('limit', POSTS_PAGE_SIZE, type=int), POSTS_MAX_PAGE_SIZE))
+    after = request.args.get('after')
+    viewer = current_user.id if sort in ('skill_match', 'for_you') else None
+    cache_key = (sort, viewer, level_min, level_max, court.lower(), date_from, date_to, limit, after)
+    cached = feed_cache.get(cache_key)
+    if cached is not None:
+        return jsonify(**cached)
+
+    key_cols = [col for col, _ in keys]
+    if after:
+        values = decode_cursor(after, sort, [parse for _, parse in keys])
+        if values is None:
+            return jsonify(error='Invalid cursor.'), 400
+        row_key = db.tuple_(*key_cols)
+        q = q.filter(row_key < tuple(values) if descending else row_key > tuple(values))
+    q = q.order_by(*[col.desc() if descending else col for col in key_cols])
+
+    rows = q.add_columns(*key_cols).limit(limit + 1).all()
+    page = [row[0] for row in rows[:limit]]
+    posts = serialize_posts(page)
+    next_cursor = encode_cursor(sort, rows[limit - 1][1:]) if len(rows) > limit else None
+    # Don't serve the page past the moment its first post expires
+    ttl = (min(p.ends_at for p in page) - datetime.now()).total_seconds() if page else None
+    feed_cache.put(cache_key, {'posts': posts, 'next_cursor': next_cursor}, ttl)
+
+    return jsonify(posts=posts, next_cursor=next_cursor)
 
 
 @app.route('/api/posts', methods=['POST'])
@@ -386,6 +442,7 @@ def create_post():
     )
     db.session.add(p)
     db.session.commit()
+    feed_cache.invalidate()
     return jsonify(post=p.to_dict()), 201
 
 
@@ -420,6 +477,7 @@ def update_post(post_id):
     if 'level_max' in data:
         post.level_max = float(data['level_max']) if data['level_max'] else None
     db.session.commit()
+    feed_cache.invalidate()
     return jsonify(post=post.to_dict())
 
 
@@ -434,6 +492,7 @@ def delete_post(post_id):
         return jsonify(error='Cannot delete a post that has been claimed.'), 400
     db.session.delete(post)
     db.session.commit()
+    feed_cache.invalidate()
     return jsonify(ok=True)
 
 
@@ -472,65 +531,248 @@ def claim_post(post_id):
 
 # ── Players ──
 
+PLAYERS_PAGE_SIZE = 50
+PLAYERS_MAX_PAGE_SIZE = 200
+
+
 @app.route('/api/players')
 def get_players():
-    day = request.args.get('day', '')
-    search = request.args.get('search', '').strip()
+    day = request.args.get('day', type=int)
+    window_start = request.args.get('start', '').strip()  # "HH:MM"; with `end`, an availability overlap
+    window_end = request.args.get('end', '').strip()
+    query = request.args.get('search', '').strip()
     ntrp_min = request.args.get('ntrp_min', type=float)
     ntrp_max = request.args.get('ntrp_max', type=float)
     court = request.args.get('court', '').strip()
     sort = request.args.get('sort', 'name')  # name, ntrp, activity
+    limit = max(1, min(request.args.get('limit', PLAYERS_PAGE_SIZE, type=int), PLAYERS_MAX_PAGE_SIZE))
+    after = request.args.get('after')
 
     q = User.query
-    if search:
-        q = q.filter(User.name.ilike(f'%{search}%'))
+    if query:
+        q = search.filter_substring(q, User, 'user_fts', query, ['name'])
     if ntrp_min is not None:
         q = q.filter(User.ntrp.isnot(None), User.ntrp >= ntrp_min)
     if ntrp_max is not None:
         q = q.filter(User.ntrp.isnot(None), User.ntrp <= ntrp_max)
     if court:
-        q = q.filter(User.preferred_courts.ilike(f'%{court}%'))
-
+        q = search.filter_substring(q, User, 'user_fts', court, ['preferred_courts'])
+    # Day and time window must be satisfied by the same availability slot
+    slot = []
+    if day is not None:
+        slot.append(Availability.day_of_week == day)
+    if window_start:
+        slot.append(Availability.end_time > window_start)
+    if window_end:
+        slot.append(Availability.start_time < window_end)
+    if slot:
+        q = q.filter(db.exists().where(Availability.user_id == User.id, *slot))
+
+    # Keyset sort keys, all ascending or all descending, ending in id
+    descending = False
     if sort == 'ntrp':
-        q = q.order_by(User.ntrp.desc().nullslast(), User.name)
+        # Highest NTRP first, players without one last
+        keys = [(-db.func.coalesce(User.ntrp, 0.0), float), (User.name, str), (User.id, int)]
     elif sort == 'activity':
-        q = q.order_by(User.created_at.desc(), User.name)
+        keys = [(User.created_at, datetime.fromisoformat), (User.id, int)]
+        descending = True
+    else:
+        sort = 'name'
+        keys = [(User.name, str), (User.id, int)]
+    key_cols = [col for col, _ in keys]
+
+    facets = _player_facets(q)
+    if after:
+        values = decode_cursor(after, sort, [parse for _, parse in keys])
+        if values is None:
+            return jsonify(error='Invalid cursor.'), 400
+        row_key = db.tuple_(*key_cols)
+        q = q.filter(row_key < tuple(values) if descending else row_key > tuple(values))
+    q = q.order_by(*[col.desc() if descending else col for col in key_cols])
+    rows = q.add_columns(*key_cols).limit(limit + 1).all()
+    users = [row[0] for row in rows[:limit]]
+    next_cursor = encode_cursor(sort, rows[limit - 1][1:]) if len(rows) > limit else None
+
+    stats = PlayerStats.bulk([u.id for u in users])
+    return jsonify(players=[{
+        **u.to_dict(brief=True), 'preferred_courts': u.preferred_courts,
+        'wins': stats[u.id].wins, 'losses': stats[u.id].losses,
+        'matches_played': stats[u.id].matches_played,
+    } for u in users], next_cursor=next_cursor, facets=facets)
+
+
+def _player_facets(q):
+    """Players per NTRP level and per available weekday across the whole filtered set, in one query."""
+    matched = q.with_entities(User.id.label('id'), User.ntrp.label('ntrp')).subquery()
+    by_ntrp = db.select(db.literal('ntrp').label('facet'), matched.c.ntrp.label('value'),
+                        db.func.count().label('n')).group_by(matched.c.ntrp)
+    by_day = db.select(db.literal('day').label('facet'), Availability.day_of_week,
+                       db.func.count(db.distinct(Availability.user_id))) \
+        .join(matched, matched.c.id == Availability.user_id).group_by(Availability.day_of_week)
+    facets = {'ntrp': {}, 'day': {}}
+    for facet, value, n in db.session.execute(db.union_all(by_ntrp, by_day)):
+        facets[facet]['unrated' if value is None else str(value)] = n
+    return facets
+
+
+AVAILABLE_PAGE_SIZE = 50
+AVAILABLE_MAX_PAGE_SIZE = 200
+
+
+@app.route('/api/players/available')
+def get_available_players():
+    """Players free during a weekday window, most overlapping minutes first (from the slot interval index)."""
+    day = request.args.get('day', type=int)
+    window_start = request.args.get('start', '').strip()
+    window_end = request.args.get('end', '').strip()
+    ntrp_min = request.args.get('ntrp_min', type=float)
+    ntrp_max = request.args.get('ntrp_max', type=float)
+    limit = max(1, min(request.args.get('limit', AVAILABLE_PAGE_SIZE, type=int), AVAILABLE_MAX_PAGE_SIZE))
+    if day is None or not 0 <= day <= 6:
+        return jsonify(error='day must be between 0 (Monday) and 6 (Sunday).'), 400
+    try:
+        if weekmask.minutes(window_start) >= weekmask.minutes(window_end):
+            return jsonify(error='start must be before end.'), 400
+    except ValueError:
+        return jsonify(error='start and end must be "HH:MM" times.'), 400
+
+    overlap = slot_index.index.overlapping(day, window_start, window_end)
+    if not overlap:
+        return jsonify(players=[])
+    # The whole {user_id: minutes} map goes in as one JSON parameter, so filter, ranking and limit
+    # run in a single query however many players overlap
+    minutes = db.func.json_each(json.dumps(overlap)).table_valued('key', 'value')
+    q = db.session.query(User, minutes.c.value).join(minutes, User.id == db.cast(minutes.c.key, db.Integer)) \
+        .filter(User.is_banned.isnot(True))
+    if ntrp_min is not None:
+        q = q.filter(User.ntrp.isnot(None), User.ntrp >= ntrp_min)
+    if ntrp_max is not None:
+        q = q.filter(User.ntrp.isnot(None), User.ntrp <= ntrp_max)
+    rows = q.order_by(minutes.c.value.desc(), User.name, User.id).limit(limit).all()
+    return jsonify(players=[{**u.to_dict(brief=True), 'overlap_minutes': n} for u, n in rows])
+
+
+# ── Search ──
+
+@app.route('/api/autocomplete')
+def autocomplete_names():
+    """Typeahead: top matches whose name (or any word of it) starts with `q`."""
+    index = autocomplete.INDEXES.get(request.args.get('kind', 'player'))
+    if index is None:
+        return jsonify(error='kind must be player or court.'), 400
+    limit = max(1, min(request.args.get('limit', autocomplete.DEFAULT_LIMIT, type=int), autocomplete.MAX_LIMIT))
+    return jsonify(results=index.search(request.args.get('q', ''), limit))
+
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 50
+
+
+@app.route('/api/search')
+def search_all():
+    """Ranked substring search over players, courts or open posts, paginated by offset."""
+    text = request.args.get('q', '').strip()
+    kind = request.args.get('type', 'players')
+    limit = max(1, min(request.args.get('limit', SEARCH_PAGE_SIZE, type=int), SEARCH_MAX_PAGE_SIZE))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    if kind == 'players':
+        q = search.ranked(User, 'user_fts', text, ['name'])
+        if q is not None:
+            q = q.filter(User.is_banned.isnot(True))
+    elif kind == 'courts':
+        q = search.ranked(Court, 'court_fts', text, ['name', 'address'])
+    elif kind == 'posts':
+        q = search.ranked(LookingToPlay, 'post_fts', text, ['court'])
+        if q is not None:
+            q = q.filter(LookingToPlay.claimed_by_id.is_(None), LookingToPlay.ends_at > datetime.now())
+    else:
+        return jsonify(error='type must be players, courts or posts.'), 400
+    if q is None:
+        return jsonify(error=f'Search needs at least {search.MIN_TERM} characters.'), 400
+    rows = q.offset(offset).limit(limit + 1).all()
+    page = rows[:limit]
+    if kind == 'players':
+        results = [u.to_dict(brief=True) for u in page]
+    elif kind == 'courts':
+        results = [c.to_dict() for c in page]
     else:
-        q = q.order_by(User.name)
+        results = serialize_posts(page)
+    return jsonify(results=results, next_offset=offset + limit if len(rows) > limit else None)
 
-    users = q.all()
-    if day != '':
-        day_int = int(day)
-        user_ids = {a.user_id for a in Availability.query.filter_by(day_of_week=day_int).all()}
-        users = [u for u in users if u.id in user_ids]
-    return jsonify(players=[{**u.to_dict(brief=True), 'preferred_courts': u.preferred_courts} for u in users])
+
+PROFILE_RECENT_MATCHES = 10
+MATCH_HISTORY_PAGE_SIZE = 20
+MATCH_HISTORY_MAX_PAGE_SIZE = 100
+MATCH_HISTORY_KEYS = [(MatchParticipant.play_date, date.fromisoformat), (MatchParticipant.match_id, int)]
 
 
 @app.route('/api/players/<int:user_id>')
 def get_player(user_id):
     user = User.query.get_or_404(user_id)
     data = user.to_dict()
-    # Match history
-    matches = Match.query.filter(
-        (Match.player1_id == user_id) | (Match.player2_id == user_id)
-    ).order_by(Match.play_date.desc()).all()
-    data['match_history'] = [m.to_dict() for m in matches]
+    # Totals come from the stats row; the full history is paged via /api/players/<id>/matches
+    page, next_cursor = _match_history_page(Match.of_player(user_id), PROFILE_RECENT_MATCHES)
+    data['recent_matches'] = serialize_matches(page)
+    data['match_history_cursor'] = next_cursor
     return jsonify(player=data)
 
 
+def _match_history_page(q, limit, after=None):
+    """Newest-first keyset page over a Match.of_player query: (matches, next_cursor)."""
+    key_cols = [col for col, _ in MATCH_HISTORY_KEYS]
+    if after is not None:
+        q = q.filter(db.tuple_(*key_cols) < tuple(after))
+    rows = q.order_by(*[col.desc() for col in key_cols]).add_columns(*key_cols).limit(limit + 1).all()
+    next_cursor = encode_cursor('history', rows[limit - 1][1:]) if len(rows) > limit else None
+    return [row[0] for row in rows[:limit]], next_cursor
+
+
+@app.route('/api/players/<int:user_id>/matches')
+@conditional(lambda user_id: ResourceVersion.get(f'matches:{user_id}', 'users'))
+def get_player_matches(user_id):
+    """A player's match history, newest first, optionally narrowed by status or opponent."""
+    User.query.get_or_404(user_id)
+    limit = max(1, min(request.args.get('limit', MATCH_HISTORY_PAGE_SIZE, type=int), MATCH_HISTORY_MAX_PAGE_SIZE))
+    status = request.args.get('status')
+    opponent_id = request.args.get('opponent_id', type=int)
+    after = request.args.get('after')
+
+    q = Match.of_player(user_id)
+    if status == 'confirmed':
+        q = q.filter(MatchParticipant.confirmed == True)
+    elif status:
+        q = q.filter(MatchParticipant.status == status)
+    if opponent_id is not None:
+        q = q.filter(MatchParticipant.opponent_id == opponent_id)
+    if after:
+        after = decode_cursor(after, 'history', [parse for _, parse in MATCH_HISTORY_KEYS])
+        if after is None:
+            return jsonify(error='Invalid cursor.'), 400
+    matches, next_cursor = _match_history_page(q, limit, after)
+    return jsonify(matches=serialize_matches(matches), next_cursor=next_cursor)
+
+
 @app.route('/api/players/<int:user_id>/h2h')
 @jwt_required()
 def get_h2h(user_id):
+    """Summary from the pair table; the encounters themselves page via /matches?opponent_id=."""
     uid = int(get_jwt_identity())
     if uid == user_id:
         return jsonify(h2h=None)
-    h2h_matches = Match.query.filter(Match.score_confirmed == True).filter(
-        ((Match.player1_id == uid) & (Match.player2_id == user_id)) |
-        ((Match.player1_id == user_id) & (Match.player2_id == uid))
-    ).all()
-    w = sum(1 for m in h2h_matches if m.winner_id == uid)
-    l = sum(1 for m in h2h_matches if m.winner_id == user_id)
-    return jsonify(h2h={'wins': w, 'losses': l, 'matches': [m.to_dict() for m in h2h_matches]})
+    return jsonify(h2h=HeadToHead.summary(uid, user_id))
+
+
+@app.route('/api/players/<int:user_id>/rating-history')
+def get_rating_history(user_id):
+    User.query.get_or_404(user_id)
+    points = max(3, min(request.args.get('points', 100, type=int), 1000))
+    rows = db.session.query(RatingHistory.recorded_at, RatingHistory.elo).filter(
+        RatingHistory.user_id == user_id
+    ).order_by(RatingHistory.recorded_at, RatingHistory.id).all()
+    epoch = datetime(1970, 1, 1)
+    series = elo.downsample([((r.recorded_at - epoch).total_seconds(), r.elo, r.recorded_at) for r in rows], points)
+    return jsonify(history=[{'recorded_at': when.isoformat(), 'elo': e} for _, e, when in series],
+                   total=len(rows))
 
 
 # ── Availability ──
@@ -574,6 +816,7 @@ def add_availability():
                      start_time=data['start_time'], end_time=data['end_time'])
     db.session.add(a)
     db.session.commit()
+    slot_index.sync_slot(a)
     return jsonify(slot=a.to_dict()), 201
 
 
@@ -586,6 +829,7 @@ def delete_availability(slot_id):
         return jsonify(error='Not authorized.'), 403
     db.session.delete(a)
     db.session.commit()
+    slot_index.drop_slot(slot_id)
     return jsonify(ok=True)
 
 
@@ -642,7 +886,7 @@ def accept_invite(invite_id):
     inv.status = 'accepted'
     # If this invite came from a post, claim the post and decline other pending requests
     if inv.post_id:
-        post = LookingToPlay.query.get(inv.post_id)
+        post = inv.post
         if post:
             post.claimed_by_id = inv.from_user_id
             # Decline all other pending requests for this post
@@ -667,6 +911,8 @@ def accept_invite(invite_id):
     n = Notification(user_id=inv.from_user_id, message=msg)
     db.session.add(n)
     db.session.commit()
+    if inv.post_id:
+        feed_cache.invalidate()
     notify_user(requester, msg, subject="Match confirmed!")
     return jsonify(match=match.to_dict())
 
@@ -695,16 +941,18 @@ def decline_invite(invite_id):
 
 @app.route('/api/matches')
 @jwt_required()
+@conditional(lambda: ResourceVersion.get(f'matches:{get_jwt_identity()}', 'users'))
 def get_matches():
     uid = int(get_jwt_identity())
-    matches = Match.query.filter(
-        (Match.player1_id == uid) | (Match.player2_id == uid)
-    ).order_by(Match.play_date.desc()).all()
+    matches = Match.of_player(uid).order_by(MatchParticipant.play_date.desc()).all()
     pending = MatchInvite.query.filter_by(to_user_id=uid, status='pending').all()
     sent = MatchInvite.query.filter_by(from_user_id=uid, status='pending').all()
-    return jsonify(matches=[m.to_dict() for m in matches],
-                   pending_invites=[i.to_dict() for i in pending],
-                   sent_invites=[i.to_dict() for i in sent])
+    # One user lookup covers the matches and both invite lists
+    users = load_users([uid for m in matches for uid in (m.player1_id, m.player2_id, m.winner_id)]
+                       + [uid for i in pending + sent for uid in (i.from_user_id, i.to_user_id)])
+    return jsonify(matches=serialize_matches(matches, users),
+                   pending_invites=serialize_invites(pending, users),
+                   sent_invites=serialize_invites(sent, users))
 
 
 @app.route('/api/matches/upcoming')
@@ -712,16 +960,16 @@ def get_matches():
 def get_upcoming_matches():
     uid = int(get_jwt_identity())
     today = date.today()
-    matches = Match.query.filter(
-        (Match.player1_id == uid) | (Match.player2_id == uid),
-        Match.play_date >= today,
-        Match.status == 'scheduled',
-    ).order_by(Match.play_date.asc()).all()
+    matches = Match.of_player(uid).filter(
+        MatchParticipant.play_date >= today,
+        MatchParticipant.status == 'scheduled',
+    ).order_by(MatchParticipant.play_date.asc()).all()
+    users = load_users(uid for m in matches for uid in (m.player1_id, m.player2_id, m.winner_id))
     result = []
     for m in matches:
-        opponent = m.player2 if m.player1_id == uid else m.player1
+        opponent = users.get(m.player2_id if m.player1_id == uid else m.player1_id)
         result.append({
-            **m.to_dict(),
+            **m.to_dict(users=users),
             'opponent': {'id': opponent.id, 'name': opponent.name, 'ntrp': opponent.ntrp} if opponent else None,
         })
     return jsonify(matches=result)
@@ -733,7 +981,7 @@ def get_recent_results():
     results = Match.query.filter(Match.score_confirmed == True)\
         .order_by(Match.play_date.desc(), Match.id.desc())\
         .limit(limit).all()
-    return jsonify(results=[m.to_dict() for m in results])
+    return jsonify(results=serialize_matches(results))
 
 
 @app.route('/api/matches/<int:match_id>')
@@ -925,6 +1173,7 @@ def submit_score(match_id):
     msg = f"{user.name} submitted a score: {match.score}. Please confirm."
     n = Notification(user_id=opp_id, message=msg)
     db.session.add(n)
+    PlayerStats.refresh(match.player1_id, match.player2_id)
     db.session.commit()
     notify_user(opponent, msg, subject="Score submitted — please confirm")
     return jsonify(match=match.to_dict())
@@ -943,8 +1192,10 @@ def confirm_score(match_id):
     action = data.get('action', 'confirm')
     if action == 'confirm':
         match.score_confirmed = True
+        elo.apply_match(match)
     else:
         match.score_disputed = True
+    PlayerStats.refresh(match.player1_id, match.player2_id)
     db.session.commit()
     return jsonify(match=match.to_dict())
 
@@ -957,6 +1208,7 @@ def cancel_match(match_id):
     if uid not in (match.player1_id, match.player2_id):
         return jsonify(error='Not authorized.'), 403
     match.status = 'cancelled'
+    PlayerStats.refresh(match.player1_id, match.player2_id)
     db.session.commit()
     return jsonify(match=match.to_dict())
 
@@ -964,13 +1216,25 @@ def cancel_match(match_id):
 # ── Leaderboard ──
 
 @app.route('/api/leaderboard')
+@conditional(lambda: (ranking.version(), ResourceVersion.get('users')))
 def leaderboard():
-    users = User.query.all()
-    board = sorted(users, key=lambda u: (u.elo, u.wins), reverse=True)
-    return jsonify(leaderboard=[{
-        'id': u.id, 'name': u.name, 'ntrp': u.ntrp, 'elo': u.elo,
-        'wins': u.wins, 'losses': u.losses, 'matches_played': u.matches_played,
-    } for u in board])
+    city = request.args.get('city', '').strip() or None
+    limit = max(1, min(request.args.get('limit', ranking.DEFAULT_LIMIT, type=int), ranking.MAX_LIMIT))
+    after = request.args.get('cursor', 0, type=int)
+    entries, next_cursor = ranking.page(city=city, after=after, limit=limit)
+    return jsonify(leaderboard=entries, next_cursor=next_cursor)
+
+
+@app.route('/api/leaderboard/me')
+@jwt_required()
+def leaderboard_me():
+    uid = int(get_jwt_identity())
+    city = request.args.get('city', '').strip() or None
+    window = max(0, min(request.args.get('window', 2, type=int), 25))
+    result = ranking.around(uid, city=city, window=window)
+    if result is None:
+        return jsonify(error='Not ranked on this board.'), 404
+    return jsonify(**result)
 
 
 # ── Notifications ──
@@ -1016,87 +1280,10 @@ def matchmaking_suggestions():
     if not current_user:
         return jsonify(error='User not found'), 404
 
-    candidates = User.query.filter(User.id != uid).all()
-    my_avails = Availability.query.filter_by(user_id=uid).all()
-
-    # Recent matches (last 30 days) for variety scoring
-    recent_cutoff = date.today() - timedelta(days=30)
-    recent_matches_q = Match.query.filter(
-        Match.play_date >= recent_cutoff,
-        Match.score_confirmed == True,
-        (Match.player1_id == uid) | (Match.player2_id == uid)
-    ).all()
-    recent_opponent_counts = {}
-    for m in recent_matches_q:
-        opp = m.player2_id if m.player1_id == uid else m.player1_id
-        recent_opponent_counts[opp] = recent_opponent_counts.get(opp, 0) + 1
-
-    suggestions = []
-    for c in candidates:
-        reasons = []
-
-        # Elo proximity (max 30 pts)
-        elo_diff = abs((current_user.elo or 1200) - (c.elo or 1200))
-        elo_score = max(0, 30 - elo_diff / 10)
-        if elo_diff <= 100:
-            reasons.append('Similar Elo')
-
-        # NTRP similarity (max 20 pts)
-        ntrp_score = 0
-        if current_user.ntrp and c.ntrp:
-            ntrp_diff = abs(current_user.ntrp - c.ntrp)
-            ntrp_score = max(0, 20 - ntrp_diff * 10)
-            if ntrp_diff <= 0.5:
-                reasons.append('Similar NTRP level')
-
-        # Availability overlap (max 25 pts)
-        c_avails = Availability.query.filter_by(user_id=c.id).all()
-        overlap_minutes = 0
-        for ma in my_avails:
-            for ca in c_avails:
-                if ma.day_of_week == ca.day_of_week:
-                    ms, me = int(ma.start_time.replace(':', '')), int(ma.end_time.replace(':', ''))
-                    cs, ce = int(ca.start_time.replace(':', '')), int(ca.end_time.replace(':', ''))
-                    ov_start = max(ms, cs)
-                    ov_end = min(me, ce)
-                    if ov_end > ov_start:
-                        # rough minute calc
-                        h1, m1 = divmod(ov_start, 100)
-                        h2, m2 = divmod(ov_end, 100)
-                        overlap_minutes += (h2 * 60 + m2) - (h1 * 60 + m1)
-        avail_score = min(25, overlap_minutes / 60 * 5)
-        if overlap_minutes > 0:
-            reasons.append('Overlapping schedule')
-
-        # Variety (max 15 pts) — fewer recent matches = better
-        rec = recent_opponent_counts.get(c.id, 0)
-        variety_score = max(0, 15 - rec * 5)
-        if rec == 0:
-            reasons.append('New opponent')
-
-        # Reliability (max 10 pts)
-        rel = c.reliability
-        reliability_score = rel / 100 * 10
-        if rel >= 90:
-            reasons.append('Highly reliable')
-
-        match_score = round(elo_score + ntrp_score + avail_score + variety_score + reliability_score, 1)
-
-        suggestions.append({
-            'id': c.id,
-            'name': c.name,
-            'ntrp': c.ntrp,
-            'elo': c.elo or 1200,
-            'match_score': match_score,
-            'reasons': reasons,
-            'elo_diff': elo_diff,
-            'recent_matches': rec,
-            'availability_overlap': overlap_minutes if overlap_minutes > 0 else None,
-            'reliability': rel,
-        })
-
-    suggestions.sort(key=lambda s: s['match_score'], reverse=True)
-    return jsonify(suggestions=suggestions)
+    limit = max(1, min(request.args.get('limit', matchmaking.DEFAULT_LIMIT, type=int), matchmaking.MAX_LIMIT))
+    min_score = request.args.get('min_score', 0, type=float)
+    suggestions, computed_at = matchmaking.cached_top_matches(current_user, limit, min_score)
+    return jsonify(suggestions=suggestions, computed_at=computed_at.isoformat() if computed_at else None)
 
 
 # ── Courts ──
@@ -1110,6 +1297,7 @@ def haversine(lat1, lng1, lat2, lng2):
 
 
 @app.route('/api/courts')
+@conditional(lambda: ResourceVersion.get('courts'))
 def get_courts():
     lat = request.args.get('lat', type=float)
     lng = request.args.get('lng', type=float)
@@ -1157,6 +1345,7 @@ def get_courts_nearby():
 # ── Reviews ──
 
 @app.route('/api/review-tags')
+@conditional(lambda: ResourceVersion.get('review_tags'))
 def get_review_tags():
     tags = ReviewTag.query.order_by(ReviewTag.category, ReviewTag.name).all()
     grouped = {}
@@ -1227,10 +1416,9 @@ def get_user_badges(user_id):
     badges = []
 
     confirmed_matches = (
-        Match.query
-        .filter(Match.score_confirmed == True)
-        .filter((Match.player1_id == user_id) | (Match.player2_id == user_id))
-        .order_by(Match.play_date.asc(), Match.id.asc())
+        Match.of_player(user_id)
+        .filter(MatchParticipant.confirmed == True)
+        .order_by(MatchParticipant.play_date.asc(), Match.id.asc())
         .all()
     )
     total = len(confirmed_matches)
@@ -1404,7 +1592,7 @@ def admin_stats():
     disputed_matches = Match.query.filter_by(score_disputed=True).count()
     active_posts = LookingToPlay.query.filter(
         LookingToPlay.claimed_by_id.is_(None),
-        LookingToPlay.play_date >= date.today()
+        LookingToPlay.ends_at > datetime.now(),
     ).count()
     pending_invites = MatchInvite.query.filter_by(status='pending').count()
     total_notifications = Notification.query.count()
@@ -1423,25 +1611,34 @@ def admin_stats():
         active_posts=active_posts, pending_invites=pending_invites,
         total_notifications=total_notifications, unread_notifications=unread_notifications,
         new_users_week=new_users_week, new_users_month=new_users_month,
+        feed_cache=feed_cache.stats(),
+        matchmaking_cache=matchmaking.cache.stats(),
     )
 
 
+@app.route('/api/admin/matchmaking/warm', methods=['POST'])
+@admin_required
+def admin_warm_matchmaking():
+    return jsonify(warmed=matchmaking.warm())
+
+
 @app.route('/api/admin/users')
 @admin_required
 def admin_users():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
-    search = request.args.get('search', '').strip()
+    query = request.args.get('search', '').strip()
     q = User.query
-    if search:
-        q = q.filter(User.name.ilike(f'%{search}%') | User.email.ilike(f'%{search}%'))
+    if query:
+        q = search.filter_substring(q, User, 'user_fts', query, ['name', 'email'])
     total = q.count()
     users = q.order_by(User.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
+    stats = PlayerStats.bulk([u.id for u in users])
     return jsonify(
         users=[{
             'id': u.id, 'name': u.name, 'email': u.email, 'phone': u.phone,
             'ntrp': u.ntrp, 'elo': u.elo, 'is_admin': u.is_admin, 'is_banned': u.is_banned,
-            'matches_played': u.matches_played, 'wins': u.wins, 'losses': u.losses,
+            'matches_played': stats[u.id].matches_played, 'wins': stats[u.id].wins, 'losses': stats[u.id].losses,
             'created_at': u.created_at.isoformat() if u.created_at else None,
         } for u in users],
         total=total, page=page, per_page=per_page,
@@ -1453,6 +1650,7 @@ def admin_users():
 def admin_update_user(user_id):
     user = User.query.get_or_404(user_id)
     data = request.get_json() or {}
+    old_elo = user.elo
     for field in ('name', 'email', 'ntrp', 'elo', 'is_admin', 'is_banned'):
         if field in data:
             val = data[field]
@@ -1461,7 +1659,10 @@ def admin_update_user(user_id):
             if field == 'elo' and val is not None:
                 val = int(val)
             setattr(user, field, val)
+    elo.record_manual(user, old_elo)
     db.session.commit()
+    feed_cache.invalidate()
+    autocomplete.sync_player(user)
     return jsonify(ok=True)
 
 
@@ -1471,6 +1672,7 @@ def admin_ban_user(user_id):
     user = User.query.get_or_404(user_id)
     user.is_banned = True
     db.session.commit()
+    autocomplete.sync_player(user)
     return jsonify(ok=True)
 
 
@@ -1480,6 +1682,7 @@ def admin_unban_user(user_id):
     user = User.query.get_or_404(user_id)
     user.is_banned = False
     db.session.commit()
+    autocomplete.sync_player(user)
     return jsonify(ok=True)
 
 
@@ -1494,7 +1697,7 @@ def admin_matches():
         q = q.filter_by(status=status)
     total = q.count()
     matches = q.order_by(Match.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
-    return jsonify(matches=[m.to_dict() for m in matches], total=total, page=page, per_page=per_page)
+    return jsonify(matches=serialize_matches(matches), total=total, page=page, per_page=per_page)
 
 
 @app.route('/api/admin/matches/<int:match_id>', methods=['PUT'])
@@ -1502,9 +1705,16 @@ def admin_matches():
 def admin_update_match(match_id):
     match = Match.query.get_or_404(match_id)
     data = request.get_json() or {}
+    was_confirmed = bool(match.score_confirmed)
     for field in ('status', 'score_confirmed', 'score_disputed'):
         if field in data:
             setattr(match, field, data[field])
+    # Only a confirmation flip moves ratings; seeded/pre-migration confirmed matches carry no recorded change
+    if match.score_confirmed and not was_confirmed:
+        elo.apply_match(match)
+    elif was_confirmed and not match.score_confirmed:
+        elo.revert_match(match)
+    PlayerStats.refresh(match.player1_id, match.player2_id)
     db.session.commit()
     return jsonify(ok=True)
 
@@ -1513,7 +1723,10 @@ def admin_update_match(match_id):
 @admin_required
 def admin_delete_match(match_id):
     match = Match.query.get_or_404(match_id)
+    player_ids = (match.player1_id, match.player2_id)
+    elo.revert_match(match)
     db.session.delete(match)
+    PlayerStats.refresh(*player_ids)
     db.session.commit()
     return jsonify(ok=True)
 
@@ -1557,7 +1770,38 @@ with app.app_context():
     db.create_all()
     run_migrations()
     # Migrations handled by migrate_all.py
+    autocomplete.warm()
+    slot_index.warm()
+
+
+def _run_background_once(task, every):
+    with app.app_context():
+        try:
+            return task()
+        except Exception:
+            # e.g. "database is locked" under write load: log it and let the next round retry
+            app.logger.exception('Background task %s failed; retrying in %ss', task.__name__, every)
+        finally:
+            db.session.remove()
+
+
+def _run_background_forever(task, every):
+    while True:
+        _run_background_once(task, every)
+        time.sleep(every)
+
+
+BACKGROUND_TASKS = [
+    (matchmaking.warm, matchmaking.WARM_EVERY),
+    (ranking.refresh, ranking.REFRESH_EVERY),  # leaderboard rebuilds stay off the request path
+    (autocomplete.refresh, autocomplete.REFRESH_EVERY),  # so do typeahead index reloads
+    (slot_index.refresh, slot_index.REFRESH_EVERY),  # and "who's free" index reloads
+]
+
 
 if __name__ == '__main__':
     debug = not RELEASE_MODE
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN'):  # only in the serving process, not the reloader
+        for task, every in BACKGROUND_TASKS:
+            threading.Thread(target=_run_background_forever, args=(task, every), daemon=True).start()
     app.run(debug=debug, port=int(os.environ.get("PORT", 5001)))
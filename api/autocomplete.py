@@ -0,0 +1,153 @@
+"""
+In-memory prefix index for typeahead.
+
+Every word of a name, and the whole name, is a key in one sorted list of
+(key, id) pairs; a prefix lookup is a bisect to the first key >= prefix and a
+short forward scan. The index is loaded at startup, updated in place by the
+endpoints that create or rename players and courts, and reloaded by a
+background loop (`refresh()` every `REFRESH_EVERY` seconds) once it is
+`REBUILD_AFTER` seconds old, so writes served by other worker processes show
+up. Lookups never load: they read whatever index was last swapped in.
+"""
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from models import db, User, Court
+
+REBUILD_AFTER = 300
+REFRESH_EVERY = 30  # seconds between background checks for an old index
+SCAN_CAP = 200  # candidates examined per lookup, bounding the worst case
+DEFAULT_LIMIT = 8
+MAX_LIMIT = 20
+
+
+def normalize(text):
+    """Lower-case, accent-free, single-spaced."""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).lower().split())
+
+
+class PrefixIndex:
+    def __init__(self, loader):
+        self._loader = loader  # () -> iterable of (id, text, payload)
+        self._keys = []        # sorted [(key, id)]
+        self._tokens = {}      # id -> keys, for removal; keys[0] is the whole name
+        self._payloads = {}    # id -> result dict
+        self._lock = threading.Lock()
+        self._pending = None   # in-place edits made while a rebuild is loading, replayed after the swap
+        self.built_at = None
+
+    @staticmethod
+    def keys_for(text):
+        full = normalize(text)
+        return [full] + sorted(set(full.split()) - {full}) if full else []
+
+    def is_stale(self):
+        return self.built_at is None or time.monotonic() - self.built_at >= REBUILD_AFTER
+
+    def rebuild(self):
+        """Load a fresh index and swap it in; lookups keep reading the old one meanwhile."""
+        with self._lock:
+            self._pending = []
+        try:
+            keys, tokens, payloads = [], {}, {}
+            for item_id, text, payload in self._loader():
+                tokens[item_id] = self.keys_for(text)
+                keys.extend((k, item_id) for k in tokens[item_id])
+                payloads[item_id] = payload
+            keys.sort()
+            with self._lock:
+                self._keys, self._tokens, self._payloads = keys, tokens, payloads
+                for edit, args in self._pending:  # the load may have read the database before these writes
+                    edit(*args)
+                self.built_at = time.monotonic()
+        finally:
+            self._pending = None
+
+    def upsert(self, item_id, text, payload):
+        if self.built_at is None and self._pending is None:
+            return  # picked up by the first full load
+        with self._lock:
+            self._upsert(item_id, text, payload)
+            if self._pending is not None:
+                self._pending.append((self._upsert, (item_id, text, payload)))
+
+    def remove(self, item_id):
+        with self._lock:
+            self._remove(item_id)
+            if self._pending is not None:
+                self._pending.append((self._remove, (item_id,)))
+
+    def _upsert(self, item_id, text, payload):
+        self._remove(item_id)
+        self._tokens[item_id] = self.keys_for(text)
+        for k in self._tokens[item_id]:
+            insort(self._keys, (k, item_id))
+        self._payloads[item_id] = payload
+
+    def _remove(self, item_id):
+        for k in self._tokens.pop(item_id, ()):
+            i = bisect_left(self._keys, (k, item_id))
+            if i < len(self._keys) and self._keys[i] == (k, item_id):
+                del self._keys[i]
+        self._payloads.pop(item_id, None)
+
+    def search(self, prefix, limit=DEFAULT_LIMIT):
+        """Top `limit` payloads whose name or any word of it starts with `prefix`.
+
+        Whole-name matches rank ahead of later-word matches, then alphabetically.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            keys, tokens, payloads = self._keys, self._tokens, self._payloads
+            best = {}
+            i = bisect_left(keys, (prefix,))
+            for key, item_id in keys[i:i + SCAN_CAP]:
+                if not key.startswith(prefix):
+                    break
+                rank = (0 if key == tokens[item_id][0] else 1, key)
+                if item_id not in best or rank < best[item_id]:
+                    best[item_id] = rank
+            ordered = sorted(best, key=lambda item_id: (best[item_id], item_id))[:limit]
+            return [payloads[item_id] for item_id in ordered]
+
+
+def _load_players():
+    rows = db.session.query(User.id, User.name, User.ntrp).filter(User.is_banned.isnot(True))
+    return ((uid, name, {'id': uid, 'name': name, 'ntrp': ntrp}) for uid, name, ntrp in rows)
+
+
+def _load_courts():
+    rows = db.session.query(Court.id, Court.name, Court.address)
+    return ((cid, name, {'id': cid, 'name': name, 'address': address}) for cid, name, address in rows)
+
+
+players = PrefixIndex(_load_players)
+courts = PrefixIndex(_load_courts)
+INDEXES = {'player': players, 'court': courts}
+
+
+def sync_player(user):
+    """Reflect a created/renamed/banned user in the player index."""
+    if user.is_banned:
+        players.remove(user.id)
+    else:
+        players.upsert(user.id, user.name, {'id': user.id, 'name': user.name, 'ntrp': user.ntrp})
+
+
+def warm():
+    """Load both indexes now (at startup, before the first keystroke)."""
+    for index in INDEXES.values():
+        index.rebuild()
+
+
+def refresh():
+    """Reload every index older than REBUILD_AFTER; returns how many were reloaded."""
+    stale = [index for index in INDEXES.values() if index.is_stale()]
+    for index in stale:
+        index.rebuild()
+    return len(stale)
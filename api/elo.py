@@ -0,0 +1,244 @@
+"""
+Elo rating engine for TennisPal.
+
+Ratings move when a match score is confirmed. The K-factor scales with the
+match format (longer matches are stronger evidence) and with the margin of
+victory in games. `replay()` recomputes every rating from the confirmed
+match history in play_date order.
+"""
+import json
+import re
+from operator import itemgetter
+
+from models import db, User, Match, RatingHistory, SnapshotMeta, ResourceVersion
+
+DEFAULT_ELO = 1200
+
+# Base K per match format
+FORMAT_K = {
+    'pro_set': 24,
+    'best_of_3': 32,
+    'best_of_5': 40,
+}
+DEFAULT_K = 32
+
+# Game-margin multiplier: 1.0 for a coin-flip match, up to 1.5 for a 12+ game blowout
+MARGIN_CAP = 12
+MARGIN_WEIGHT = 0.5
+
+# History rows replay() regenerates; anything else (admin adjustments) is kept and re-applied
+REPLAYED_REASONS = ('match', 'revert', 'replay')
+WRITE_CHUNK = 50_000  # rows per raw executemany batch in replay()
+
+_SET_RE = re.compile(r'(\d+)\s*-\s*(\d+)')
+
+
+def expected_score(rating, opponent_rating):
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def game_margin(sets, score=None):
+    """Absolute game differential from the structured sets JSON, or the legacy score string."""
+    if sets:
+        try:
+            data = json.loads(sets) if isinstance(sets, str) else sets
+            return abs(sum(s.get('p1', 0) - s.get('p2', 0) for s in data))
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            pass
+    if score:
+        return abs(sum(int(a) - int(b) for a, b in _SET_RE.findall(score)))
+    return 0
+
+
+def k_factor(match_format, margin):
+    base = FORMAT_K.get(match_format, DEFAULT_K)
+    return base * (1 + MARGIN_WEIGHT * min(margin, MARGIN_CAP) / MARGIN_CAP)
+
+
+def rating_delta(winner_rating, loser_rating, k):
+    """Points transferred from loser to winner (always >= 0)."""
+    return round(k * (1 - expected_score(winner_rating, loser_rating)))
+
+
+def _match_delta(match, winner_rating, loser_rating):
+    k = k_factor(match.match_format, game_margin(match.sets, match.score))
+    return rating_delta(winner_rating, loser_rating, k)
+
+
+def apply_match(match):
+    """Apply the rating change for a newly confirmed match inside the caller's transaction.
+
+    Idempotent: a match that already carries an Elo change is left alone.
+    Returns (change_p1, change_p2) or None if nothing was applied.
+    """
+    if match.elo_change_p1 is not None or match.winner_id not in (match.player1_id, match.player2_id):
+        return None
+    p1 = db.session.get(User, match.player1_id)
+    p2 = db.session.get(User, match.player2_id)
+    r1, r2 = p1.elo or DEFAULT_ELO, p2.elo or DEFAULT_ELO
+    if match.winner_id == match.player1_id:
+        change = _match_delta(match, r1, r2)
+        match.elo_change_p1, match.elo_change_p2 = change, -change
+    else:
+        change = _match_delta(match, r2, r1)
+        match.elo_change_p1, match.elo_change_p2 = -change, change
+    _shift(match.player1_id, match.elo_change_p1, match.id, 'match')
+    _shift(match.player2_id, match.elo_change_p2, match.id, 'match')
+    return match.elo_change_p1, match.elo_change_p2
+
+
+def revert_match(match):
+    """Undo a previously applied change (score un-confirmed or match deleted)."""
+    if match.elo_change_p1 is None:
+        return None
+    changes = (match.elo_change_p1, match.elo_change_p2)
+    _shift(match.player1_id, -changes[0], match.id, 'revert')
+    _shift(match.player2_id, -changes[1], match.id, 'revert')
+    match.elo_change_p1 = match.elo_change_p2 = None
+    return changes
+
+
+def record_manual(user, old_elo):
+    """Log an admin edit that already set user.elo directly."""
+    if user.elo is None or user.elo == old_elo:
+        return
+    db.session.add(RatingHistory(user_id=user.id, elo=user.elo, delta=user.elo - (old_elo or DEFAULT_ELO),
+                                 reason='admin'))
+    SnapshotMeta.mark_stale('leaderboard')
+
+
+def _shift(user_id, delta, match_id, reason):
+    # In-place increment so a concurrent update to the same row isn't overwritten
+    User.query.filter_by(id=user_id).update({'elo': db.func.coalesce(User.elo, DEFAULT_ELO) + delta},
+                                            synchronize_session='fetch')
+    new_elo = db.session.query(User.elo).filter_by(id=user_id).scalar()
+    db.session.add(RatingHistory(user_id=user_id, elo=new_elo, delta=delta, match_id=match_id, reason=reason))
+    if delta:
+        SnapshotMeta.mark_stale('leaderboard')
+
+
+def replay(initial=DEFAULT_ELO):
+    """Recompute every rating from the confirmed match history, oldest first.
+
+    Admin adjustments stay in the history and are re-applied as deltas at
+    their recorded time (only their `elo` after-value is rewritten); the
+    match-derived rows (match/revert/replay) are replaced by one 'replay' row
+    per player per confirmed match.
+
+    Reads plain column tuples (no ORM objects), keeps ratings in a flat list
+    indexed by a dense user index, then writes back only the users and matches
+    whose values changed, plus the rebuilt history, as raw DB-API executemany
+    batches. Returns the number of matches replayed.
+    """
+    # Raw DB-API reads and writes: SQLAlchemy's per-row result and parameter processing dominated
+    # the run time. Dates stay in SQLite's ISO text form, which sorts and compares chronologically.
+    conn = db.session.connection()
+    users = conn.exec_driver_sql('SELECT id, elo FROM user ORDER BY id').fetchall()
+    user_ids = [uid for uid, _ in users]
+    index = {uid: i for i, uid in enumerate(user_ids)}
+    ratings = [initial] * len(user_ids)
+
+    rows = conn.exec_driver_sql(
+        'SELECT id, player1_id, player2_id, winner_id, match_format, sets, score, play_date, '
+        'elo_change_p1, elo_change_p2 FROM "match" WHERE score_confirmed = 1 ORDER BY play_date, id').fetchall()
+    adjustments = conn.exec_driver_sql(
+        "SELECT id, user_id, recorded_at, delta FROM rating_history WHERE reason = 'admin' "
+        "ORDER BY recorded_at, id").fetchall()
+    adjustment_updates = []
+    next_adjustment = 0
+
+    def apply_adjustments(until):
+        nonlocal next_adjustment
+        while next_adjustment < len(adjustments) and (until is None or adjustments[next_adjustment][2] < until):
+            hid, uid, _, delta = adjustments[next_adjustment]
+            next_adjustment += 1
+            a = index.get(uid)
+            if a is not None:
+                ratings[a] += delta
+                adjustment_updates.append((ratings[a], hid))
+
+    format_k = FORMAT_K
+    weight = MARGIN_WEIGHT / MARGIN_CAP
+    margins = {}  # tennis scores repeat a lot; parse each distinct one once
+    match_updates = []
+    history = []
+    for mid, p1, p2, winner, fmt, sets, score, play_date, old1, old2 in rows:
+        i, j = index.get(p1), index.get(p2)
+        if i is None or j is None or winner not in (p1, p2):
+            if old1 is not None or old2 is not None:
+                match_updates.append((None, None, mid))
+            continue
+        # Same text format SQLAlchemy's SQLite DateTime type writes
+        stamp = f'{play_date} 00:00:00.000000'
+        apply_adjustments(stamp)
+        w, l = (i, j) if winner == p1 else (j, i)
+        margin = margins.get((sets, score))
+        if margin is None:
+            margin = margins[(sets, score)] = min(game_margin(sets, score), MARGIN_CAP)
+        k = format_k.get(fmt, DEFAULT_K) * (1 + weight * margin)
+        change = round(k * (1 - 1 / (1 + 10 ** ((ratings[l] - ratings[w]) / 400))))
+        ratings[w] += change
+        ratings[l] -= change
+        c1 = change if winner == p1 else -change
+        if (old1, old2) != (c1, -c1):
+            match_updates.append((c1, -c1, mid))
+        history.append((p1, stamp, ratings[i], c1, mid, 'replay'))
+        history.append((p2, stamp, ratings[j], -c1, mid, 'replay'))
+    apply_adjustments(None)
+
+    def write(sql, params):
+        for start in range(0, len(params), WRITE_CHUNK):
+            conn.exec_driver_sql(sql, params[start:start + WRITE_CHUNK])
+
+    # Unconfirmed matches must not keep a change from an earlier confirmation
+    conn.exec_driver_sql('UPDATE "match" SET elo_change_p1 = NULL, elo_change_p2 = NULL '
+                         'WHERE elo_change_p1 IS NOT NULL AND score_confirmed IS NOT 1')
+    write('UPDATE "match" SET elo_change_p1 = ?, elo_change_p2 = ? WHERE id = ?', match_updates)
+    # Match-derived history is rebuilt to match: actual change times are unknown, so play_date stands in
+    log = RatingHistory.__table__
+    db.session.execute(log.delete().where(log.c.reason.in_(REPLAYED_REASONS)))
+    history.sort(key=itemgetter(0, 1))  # stable: in (user, time) index order, inserts stay local
+    write('INSERT INTO rating_history (user_id, recorded_at, elo, delta, match_id, reason) '
+          'VALUES (?, ?, ?, ?, ?, ?)', history)
+    write('UPDATE rating_history SET elo = ? WHERE id = ?', adjustment_updates)
+    write('UPDATE user SET elo = ? WHERE id = ?',
+          [(r, uid) for (uid, old), r in zip(users, ratings) if old != r])
+    SnapshotMeta.mark_stale('leaderboard')
+    # Every match's elo_change_* may have moved; these executemany writes skip the flush hook
+    ResourceVersion.bump_prefix('matches:')
+    db.session.commit()
+    return len(rows)
+
+
+# ── Rating history ──
+
+def downsample(points, threshold):
+    """Largest-Triangle-Three-Buckets over [(x, y, ...), ...] sorted by x.
+
+    Keeps the first and last points and, for each bucket in between, the point
+    that forms the largest triangle with its neighbours, preserving peaks and dips.
+    """
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for b in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        nxt_start = int((b + 1) * every) + 1
+        nxt_end = min(int((b + 2) * every) + 1, n)
+        nxt = points[nxt_start:nxt_end]
+        avg_x = sum(p[0] for p in nxt) / len(nxt)
+        avg_y = sum(p[1] for p in nxt) / len(nxt)
+        ax, ay = points[a][0], points[a][1]
+        best, best_area = None, -1
+        for idx in range(int(b * every) + 1, nxt_start):
+            x, y = points[idx][0], points[idx][1]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = idx, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
@@ -0,0 +1,87 @@
+"""
+In-process response cache for the post feed.
+
+Entries are keyed by the normalized query (plus the viewer's id for
+personalized orderings), evicted least-recently-used beyond `max_entries`,
+and expire after `ttl` seconds or when the first post on the page ends,
+whichever comes first. Post and profile writes call `invalidate()`; the TTL
+bounds staleness for writes served by another worker process.
+
+Entries can also carry tags (e.g. the ids of the players a cached list
+mentions) so a write can drop just the entries tagged with what it touched,
+via `invalidate(tags)`.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    def __init__(self, max_entries=512, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at monotonic, value, tags)
+        self._tagged = {}  # tag -> set of keys
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def __contains__(self, key):
+        """Whether `key` holds a live entry; unlike get(), not counted as a lookup or a use."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] > time.monotonic()
+
+    def put(self, key, value, ttl=None, tags=()):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        tags = frozenset(tags)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, tags=None):
+        """Drop every entry, or only those carrying one of `tags`; returns how many were dropped."""
+        with self._lock:
+            if tags is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                self._tagged.clear()
+            else:
+                keys = set().union(*(self._tagged.get(tag, ()) for tag in tags))
+                for key in keys:
+                    self._drop(key)
+                dropped = len(keys)
+            self.invalidations += 1
+            return dropped
+
+    def _drop(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tagged[tag]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations,
+                    'size': len(self._entries), 'hit_rate': round(self.hits / lookups, 3) if lookups else None}
@@ -0,0 +1,105 @@
+"""
+Ranked leaderboard snapshot.
+
+Ranks are materialized in `LeaderboardSnapshot` (global `rank` plus a
+per-city `city_rank`, both indexed). Anything that actually changes a
+player's Elo, record or city calls `SnapshotMeta.mark_stale('leaderboard')`;
+a background loop (`refresh()` every `REFRESH_EVERY` seconds, or
+`python rebuild.py leaderboard`) rebuilds a stale snapshot. Reads never
+rebuild, except to build the very first snapshot, so list, page and "my
+rank" reads are index range scans whose cost doesn't depend on the total
+number of players.
+"""
+from models import db, User, PlayerStats, LeaderboardSnapshot, SnapshotMeta
+
+SNAPSHOT = 'leaderboard'
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+REFRESH_EVERY = 30  # seconds between background checks for a stale snapshot
+
+
+def rebuild():
+    """Recompute every rank: Elo desc, then wins desc, then id for a stable order."""
+    users = db.session.query(User.id, User.elo, User.city).all()
+    stats = PlayerStats.bulk([u.id for u in users])
+    users.sort(key=lambda u: (-(u.elo or 1200), -stats[u.id].wins, u.id))
+    city_counts = {}
+    rows = []
+    for rank, u in enumerate(users, start=1):
+        city_counts[u.city] = city_counts.get(u.city, 0) + 1
+        s = stats[u.id]
+        rows.append({'user_id': u.id, 'rank': rank, 'city': u.city, 'city_rank': city_counts[u.city],
+                     'elo': u.elo or 1200, 'wins': s.wins, 'losses': s.losses,
+                     'matches_played': s.matches_played})
+    table = LeaderboardSnapshot.__table__
+    db.session.execute(table.delete())
+    if rows:
+        db.session.execute(table.insert(), rows)
+    SnapshotMeta.mark_built(SNAPSHOT)
+    db.session.commit()
+    return len(rows)
+
+
+def refresh():
+    """Rebuild the snapshot if a write marked it stale; returns the row count, or None if it was fresh."""
+    if SnapshotMeta.is_stale(SNAPSHOT):
+        return rebuild()
+    return None
+
+
+def ensure_built():
+    """Build the first snapshot on a cold start; afterwards reads serve whatever was last built."""
+    row = db.session.get(SnapshotMeta, SNAPSHOT)
+    if row is None or row.built_at is None:
+        rebuild()
+
+
+def version():
+    """Build time of the served snapshot; changes whenever a rebuild can have reordered it."""
+    ensure_built()
+    return db.session.get(SnapshotMeta, SNAPSHOT).built_at
+
+
+def _rank_col(city):
+    return LeaderboardSnapshot.city_rank if city else LeaderboardSnapshot.rank
+
+
+def _scoped(city):
+    q = db.session.query(LeaderboardSnapshot, User.name, User.ntrp).join(User, User.id == LeaderboardSnapshot.user_id)
+    if city:
+        q = q.filter(LeaderboardSnapshot.city == city)
+    return q
+
+
+def _entry(row, city):
+    snap, name, ntrp = row
+    return {
+        'id': snap.user_id, 'name': name, 'ntrp': ntrp, 'elo': snap.elo,
+        'wins': snap.wins, 'losses': snap.losses, 'matches_played': snap.matches_played,
+        'rank': snap.city_rank if city else snap.rank,
+    }
+
+
+def page(city=None, after=0, limit=DEFAULT_LIMIT):
+    """One page of the board starting after rank `after`. Returns (entries, next_cursor)."""
+    ensure_built()
+    rank_col = _rank_col(city)
+    rows = _scoped(city).filter(rank_col > after).order_by(rank_col).limit(limit + 1).all()
+    entries = [_entry(r, city) for r in rows[:limit]]
+    next_cursor = str(entries[-1]['rank']) if len(rows) > limit else None
+    return entries, next_cursor
+
+
+def around(user_id, city=None, window=2):
+    """A player's rank plus `window` neighbours on each side, or None if unranked."""
+    ensure_built()
+    snap = db.session.get(LeaderboardSnapshot, user_id)
+    if snap is None or (city and snap.city != city):
+        return None
+    rank_col = _rank_col(city)
+    rank = snap.city_rank if city else snap.rank
+    rows = _scoped(city).filter(rank_col.between(rank - window, rank + window)).order_by(rank_col).all()
+    total = db.session.query(db.func.max(rank_col))
+    if city:
+        total = total.filter(LeaderboardSnapshot.city == city)
+    return {'rank': rank, 'total': total.scalar() or 0, 'neighbours': [_entry(r, city) for r in rows]}
@@ -0,0 +1,341 @@
+"""
+Matchmaking suggestions.
+
+Candidates are read into parallel column arrays (Elo, NTRP, weekly
+availability bitmap, reliability) and every score component is computed as
+one pass over those columns. Weights, out of 100:
+
+    Elo proximity 30 · NTRP similarity 20 · availability overlap 25 ·
+    variety (few recent matches together) 15 · reliability 10
+
+Only the top `limit` are wanted, so candidates are fetched bucket by bucket:
+rings of Elo distance × rings of NTRP distance around the player, each read
+with a range scan on `ix_user_ntrp_elo` (`ix_user_elo` when the requester
+has no NTRP). A bucket's best possible score is known before reading it (its
+nearest Elo/NTRP edge, the requester's own free time, and full marks for
+variety and reliability), so buckets are visited best-bound first into a
+bounded heap and the search stops once no remaining bucket can beat the k-th
+best score or reach `min_score`. The cost follows the number of players near
+the requester, not the total number of players.
+
+Results are cached per (player, limit, min_score) for CACHE_TTL seconds and
+tagged with every player they mention. A committed change to a player's
+availability, Elo, NTRP, stats or matches drops only the entries tagged with
+that player (see `_collect_touched_players`). A player who is in no cached
+list yet and becomes a better fit is picked up when the TTL expires.
+`warm()` fills the cache for recently active players.
+
+Below the cache sits the nightly precompute (precompute.py), which stores
+each active player's top suggestions in `SuggestionSnapshot`; a request uses
+that row while it is younger than STORED_MAX_AGE and long enough for
+`limit`, and scores live otherwise. A row is deleted as soon as the scoring
+inputs of its owner or of any player listed in it change.
+"""
+import heapq
+import json
+from array import array
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from models import db, User, PlayerStats, MatchParticipant, Availability, Match, LookingToPlay, \
+    SuggestionSnapshot, SuggestionSnapshotCandidate
+from feed_cache import ResponseCache
+import weekmask
+
+RECENT_DAYS = 30
+DEFAULT_ELO = 1200
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+ELO_RING = 20       # Elo score loses 2 points per ring; past ELO_RINGS rings it is 0
+ELO_RINGS = 15
+NTRP_RING = 0.5     # NTRP score loses 5 points per ring; past NTRP_RINGS rings it is 0
+NTRP_RINGS = 4
+
+CACHE_TTL = 600
+ACTIVE_DAYS = 14    # warm() covers players who played or posted this recently
+WARM_MAX_USERS = 500
+WARM_EVERY = 300
+
+STORED_MAX_AGE = timedelta(hours=26)  # a nightly run plus slack
+
+cache = ResponseCache(max_entries=5000, ttl=CACHE_TTL)
+
+# The requester's side of the scoring, for players read from a pool rather than as a User
+Player = namedtuple('Player', 'id elo ntrp weekly_mask')
+
+
+class CandidatePool:
+    """Players matching `where` (every player except `exclude_id`), as columns indexed by position."""
+
+    def __init__(self, rows, reliability):
+        self.ids = array('q', (r.id for r in rows))
+        self.names = [r.name for r in rows]
+        self.ntrp = [r.ntrp for r in rows]
+        self.elo = array('q', (r.elo or DEFAULT_ELO for r in rows))
+        self.masks = [weekmask.from_blob(r.availability_mask) for r in rows]
+        self.reliability = array('q', reliability)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def player(self, i):
+        return Player(self.ids[i], self.elo[i], self.ntrp[i], self.masks[i])
+
+    @classmethod
+    def load(cls, exclude_id=None, where=None):
+        users, stats = User.__table__.c, PlayerStats.__table__.c  # Core rows: no per-row ORM overhead
+        select = db.select(
+            users.id, users.name, users.ntrp, users.elo, users.availability_mask,
+            stats.completed_count, stats.closed_count,
+        ).outerjoin_from(User.__table__, PlayerStats.__table__, stats.user_id == users.id) \
+            .order_by(users.id)
+        if exclude_id is not None:
+            select = select.where(users.id != exclude_id)
+        if where is not None:
+            select = select.where(where)
+        rows = db.session.execute(select).all()
+        # Players without a stored stats row yet get their counters aggregated in one query
+        missing = PlayerStats.aggregate([r.id for r in rows if r.closed_count is None])
+        reliability = []
+        for r in rows:
+            completed, closed = (r.completed_count, r.closed_count) if r.closed_count is not None else \
+                (missing[r.id].completed_count, missing[r.id].closed_count)
+            reliability.append(round(completed / closed * 100) if closed else 100)
+        return cls(rows, reliability)
+
+
+def recent_opponent_counts(user_id, today=None):
+    """{opponent_id: confirmed matches together in the last RECENT_DAYS days}."""
+    return recent_opponent_counts_bulk([user_id], today).get(user_id, {})
+
+
+def recent_opponent_counts_bulk(user_ids, today=None):
+    """{user_id: {opponent_id: count}} for many players in one GROUP BY."""
+    cutoff = (today or date.today()) - timedelta(days=RECENT_DAYS)
+    counts = {}
+    for uid, opponent_id, n in db.session.query(
+        MatchParticipant.user_id, MatchParticipant.opponent_id, db.func.count(),
+    ).filter(
+        MatchParticipant.user_id.in_(list(user_ids)),
+        MatchParticipant.confirmed == True,
+        MatchParticipant.play_date >= cutoff,
+    ).group_by(MatchParticipant.user_id, MatchParticipant.opponent_id):
+        counts.setdefault(uid, {})[opponent_id] = n
+    return counts
+
+
+class Scores:
+    """Score components for every candidate in a pool, one list per factor."""
+
+    def __init__(self, me, pool, recent):
+        my_elo, my_ntrp, my_mask = me.elo or DEFAULT_ELO, me.ntrp, me.weekly_mask
+        self.pool = pool
+        self.elo_diff = [abs(my_elo - e) for e in pool.elo]
+        elo_score = [max(0, 30 - d / 10) for d in self.elo_diff]
+        if my_ntrp:
+            self.ntrp_diff = [abs(my_ntrp - n) if n else None for n in pool.ntrp]
+            ntrp_score = [0 if d is None else max(0, 20 - d * 10) for d in self.ntrp_diff]
+        else:
+            self.ntrp_diff = [None] * len(pool)
+            ntrp_score = [0] * len(pool)
+        if my_mask:  # weekmask.overlap_minutes, inlined for the hot loop
+            self.overlap = [bin(my_mask & m).count('1') * weekmask.SLOT_MINUTES for m in pool.masks]
+        else:
+            self.overlap = [0] * len(pool)
+        avail_score = [min(25, o / 60 * 5) for o in self.overlap]
+        self.recent = [recent.get(i, 0) for i in pool.ids]
+        variety_score = [max(0, 15 - r * 5) for r in self.recent]
+        reliability_score = [r / 100 * 10 for r in pool.reliability]
+        self.total = [round(sum(parts), 1) for parts in
+                      zip(elo_score, ntrp_score, avail_score, variety_score, reliability_score)]
+
+    def suggestion(self, i):
+        pool = self.pool
+        reasons = []
+        if self.elo_diff[i] <= 100:
+            reasons.append('Similar Elo')
+        if self.ntrp_diff[i] is not None and self.ntrp_diff[i] <= 0.5:
+            reasons.append('Similar NTRP level')
+        if self.overlap[i] > 0:
+            reasons.append('Overlapping schedule')
+        if self.recent[i] == 0:
+            reasons.append('New opponent')
+        if pool.reliability[i] >= 90:
+            reasons.append('Highly reliable')
+        return {
+            'id': pool.ids[i],
+            'name': pool.names[i],
+            'ntrp': pool.ntrp[i],
+            'elo': pool.elo[i],
+            'match_score': self.total[i],
+            'reasons': reasons,
+            'elo_diff': self.elo_diff[i],
+            'recent_matches': self.recent[i],
+            'availability_overlap': self.overlap[i] or None,
+            'reliability': pool.reliability[i],
+        }
+
+
+def score(me, pool, recent):
+    """Score every candidate in `pool` for `me`; returns suggestion dicts, best first."""
+    scores = Scores(me, pool, recent)
+    return [scores.suggestion(i) for i in sorted(range(len(pool)), key=scores.total.__getitem__, reverse=True)]
+
+
+def _distance_ring(col, center, width, ring, last):
+    """Rows whose |col - center| falls in ring `ring` of `width` (ring `last` is open-ended)."""
+    lo, hi = ring * width, (ring + 1) * width
+    if ring == last:
+        return (col <= center - lo) | (col >= center + lo)
+    if ring == 0:
+        return (col > center - hi) & (col < center + hi)
+    return ((col > center - hi) & (col <= center - lo)) | ((col >= center + lo) & (col < center + hi))
+
+
+def _buckets(me):
+    """(upper bound on score, SQL condition) for every bucket around `me`; together they cover everyone."""
+    users = User.__table__.c
+    my_elo, my_ntrp = me.elo or DEFAULT_ELO, me.ntrp
+    # Overlap can't exceed the requester's own free time; variety and reliability are unbounded
+    rest = min(25, weekmask.overlap_minutes(me.weekly_mask, me.weekly_mask) / 60 * 5) + 15 + 10
+
+    elo_rings = []
+    default_ring = min(abs(DEFAULT_ELO - my_elo) // ELO_RING, ELO_RINGS)
+    for ring in range(ELO_RINGS + 1):
+        cond = _distance_ring(users.elo, my_elo, ELO_RING, ring, ELO_RINGS)
+        if ring == default_ring:
+            cond = cond | users.elo.is_(None)  # scored as DEFAULT_ELO
+        elo_rings.append((max(0, 30 - ring * ELO_RING / 10), cond))
+
+    if my_ntrp:
+        ntrp_rings = [(max(0, 20 - ring * NTRP_RING * 10),
+                       _distance_ring(users.ntrp, my_ntrp, NTRP_RING, ring, NTRP_RINGS))
+                      for ring in range(NTRP_RINGS + 1)]
+        ntrp_rings.append((0, users.ntrp.is_(None)))
+    else:
+        ntrp_rings = [(0, None)]
+
+    buckets = []
+    for elo_bound, elo_cond in elo_rings:
+        for ntrp_bound, ntrp_cond in ntrp_rings:
+            cond = elo_cond if ntrp_cond is None else ntrp_cond & elo_cond
+            buckets.append((elo_bound + ntrp_bound + rest, cond))
+    buckets.sort(key=lambda b: -b[0])
+    return buckets
+
+
+def top_matches(me, recent, limit=DEFAULT_LIMIT, min_score=0):
+    """The best `limit` suggestions for `me` scoring at least `min_score`, best first.
+
+    Equal scores keep the order candidates were read in: nearer buckets first, then user id.
+    """
+    heap = []  # (score, -arrival, suggestion); heap[0] is the weakest kept
+    arrival = 0
+    for bound, cond in _buckets(me):
+        if bound < min_score or (len(heap) == limit and bound <= heap[0][0]):
+            break
+        pool = CandidatePool.load(me.id, where=cond)
+        scores = Scores(me, pool, recent)
+        for i, total in enumerate(scores.total):
+            arrival += 1
+            if total < min_score:
+                continue
+            if len(heap) < limit:
+                heapq.heappush(heap, (total, -arrival, scores.suggestion(i)))
+            elif total > heap[0][0]:
+                heapq.heapreplace(heap, (total, -arrival, scores.suggestion(i)))
+    return [entry[2] for entry in sorted(heap, key=lambda e: (-e[0], -e[1]))]
+
+
+def stored_matches(user_id, limit=DEFAULT_LIMIT, min_score=0, now=None):
+    """(suggestions, computed_at) from the nightly precompute, or None if missing, stale or too short."""
+    row = db.session.get(SuggestionSnapshot, user_id)
+    if row is None or limit > row.top_n or row.computed_at < (now or datetime.utcnow()) - STORED_MAX_AGE:
+        return None
+    # The stored list is sorted, so the qualifying entries are a prefix of it
+    suggestions = [s for s in json.loads(row.suggestions) if s['match_score'] >= min_score]
+    return suggestions[:limit], row.computed_at
+
+
+def cached_top_matches(me, limit=DEFAULT_LIMIT, min_score=0):
+    """(suggestions, computed_at) through the per-player cache; computed_at is None for live results."""
+    result = cache.get((me.id, limit, min_score))
+    return _fill_cache(me, limit, min_score) if result is None else result
+
+
+def _fill_cache(me, limit, min_score):
+    result = stored_matches(me.id, limit, min_score) or \
+        (top_matches(me, recent_opponent_counts(me.id), limit, min_score), None)
+    cache.put((me.id, limit, min_score), result, tags={me.id, *(s['id'] for s in result[0])})
+    return result
+
+
+def active_user_ids(days=ACTIVE_DAYS, max_users=WARM_MAX_USERS):
+    """Players with a match or a post in the last `days` days, most recent first (all if max_users is None)."""
+    since = date.today() - timedelta(days=days)
+    played = db.select(MatchParticipant.user_id.label('user_id'), MatchParticipant.play_date.label('at')) \
+        .where(MatchParticipant.play_date >= since)
+    posted = db.select(LookingToPlay.user_id, db.func.date(LookingToPlay.created_at)) \
+        .where(LookingToPlay.created_at >= datetime.combine(since, datetime.min.time()))
+    recent = db.union_all(played, posted).subquery()
+    select = db.select(recent.c.user_id).group_by(recent.c.user_id).order_by(db.func.max(recent.c.at).desc())
+    if max_users is not None:
+        select = select.limit(max_users)
+    return [uid for (uid,) in db.session.execute(select)]
+
+
+def warm(user_ids=None, limit=DEFAULT_LIMIT):
+    """Compute and cache default suggestions for active players that have no entry; returns how many."""
+    ids = active_user_ids() if user_ids is None else user_ids
+    warmed = 0
+    for user in User.query.filter(User.id.in_(ids)).all() if ids else []:
+        if (user.id, limit, 0) not in cache:  # not cache.get(): warm-up must not count as lookups
+            _fill_cache(user, limit, 0)
+            warmed += 1
+    return warmed
+
+
+_SCORED_USER_FIELDS = ('elo', 'ntrp')
+
+
+@db.event.listens_for(db.session, 'after_flush')
+def _collect_touched_players(session, flush_context):
+    """Drop stored suggestions owned by or listing players whose scoring inputs this flush changed.
+
+    The cache entries tagged with those players are invalidated after commit.
+    """
+    touched = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, Availability):
+            touched.add(obj.user_id)
+        elif isinstance(obj, PlayerStats):
+            touched.add(obj.user_id)
+        elif isinstance(obj, Match):
+            state = db.inspect(obj)
+            if obj in session.new or obj in session.deleted or any(
+                    state.attrs[c].history.has_changes() for c in MatchParticipant.SYNCED_COLUMNS):
+                touched.update((obj.player1_id, obj.player2_id))
+        elif isinstance(obj, User) and obj not in session.new:
+            state = db.inspect(obj)
+            if obj in session.deleted or any(state.attrs[f].history.has_changes() for f in _SCORED_USER_FIELDS):
+                touched.add(obj.id)
+    touched.discard(None)
+    if touched:
+        table, listed = SuggestionSnapshot.__table__, SuggestionSnapshotCandidate.__table__
+        owners = db.select(listed.c.user_id).where(listed.c.candidate_id.in_(touched))
+        session.connection().execute(
+            table.delete().where(db.or_(table.c.user_id.in_(touched), table.c.user_id.in_(owners))))
+        session.info.setdefault('matchmaking_touched', set()).update(touched)
+
+
+@db.event.listens_for(db.session, 'after_commit')
+def _invalidate_touched_players(session):
+    touched = session.info.pop('matchmaking_touched', None)
+    if touched:
+        cache.invalidate(touched)
+
+
+@db.event.listens_for(db.session, 'after_rollback')
+def _forget_touched_players(session):
+    session.info.pop('matchmaking_touched', None)
@@ -8,6 +8,17 @@ MIGRATION_MODULES = [
     'migrate_match_post_id',
     'migrate_password_reset',
     'migrate_email_verification',
+    'migrate_elo_changes',
+    'migrate_post_ends_at',
+    'migrate_court_tokens',
+    'migrate_hot_indexes',
+    'migrate_match_participants',
+    'migrate_head_to_head',
+    'migrate_availability_mask',
+    'migrate_search_index',
+    'migrate_post_autoincrement',
+    'migrate_snapshot_candidates',
+    'migrate_player_stats',
 ]
 
 def run_all():
@@ -0,0 +1,33 @@
+"""Add the availability_mask bitmap column to user and compile it from existing availability slots."""
+import sqlite3
+import os
+
+import weekmask
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'instance', 'tennispal.db')
+
+
+def migrate():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    existing = {col[1] for col in cur.execute("PRAGMA table_info(user)").fetchall()}
+    if "availability_mask" not in existing:
+        print("Adding column: availability_mask")
+        cur.execute("ALTER TABLE user ADD COLUMN availability_mask BLOB")
+    else:
+        print("Column already exists: availability_mask")
+    slots = {}
+    for uid, day, start, end in cur.execute(
+            "SELECT a.user_id, a.day_of_week, a.start_time, a.end_time FROM availability a "
+            "JOIN user u ON u.id = a.user_id WHERE u.availability_mask IS NULL"):
+        slots.setdefault(uid, []).append((day, start, end))
+    updates = [(weekmask.to_blob(weekmask.compile_slots(rows)), uid) for uid, rows in slots.items()]
+    cur.executemany("UPDATE user SET availability_mask = ? WHERE id = ?", updates)
+    print(f"  Compiled availability_mask for {len(updates)} users")
+    conn.commit()
+    conn.close()
+    print("Migration complete.")
+
+
+if __name__ == '__main__':
+    migrate()
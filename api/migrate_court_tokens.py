@@ -0,0 +1,31 @@
+"""Add the normalized court_tokens column to user and backfill it from preferred_courts."""
+import json
+import sqlite3
+import os
+
+from models import normalize_courts
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'instance', 'tennispal.db')
+
+
+def migrate():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    existing = {col[1] for col in cur.execute("PRAGMA table_info(user)").fetchall()}
+    if "court_tokens" not in existing:
+        print("Adding column: court_tokens")
+        cur.execute("ALTER TABLE user ADD COLUMN court_tokens TEXT")
+    else:
+        print("Column already exists: court_tokens")
+    rows = cur.execute("SELECT id, preferred_courts FROM user "
+                       "WHERE preferred_courts IS NOT NULL AND court_tokens IS NULL").fetchall()
+    updates = [(json.dumps(tokens), uid) for uid, raw in rows if (tokens := normalize_courts(raw))]
+    cur.executemany("UPDATE user SET court_tokens = ? WHERE id = ?", updates)
+    print(f"  Backfilled court_tokens on {len(updates)} users")
+    conn.commit()
+    conn.close()
+    print("Migration complete.")
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,29 @@
+"""Add per-match Elo change columns to the match table."""
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'instance', 'tennispal.db')
+
+MIGRATIONS = [
+    ("elo_change_p1", "ALTER TABLE match ADD COLUMN elo_change_p1 INTEGER"),
+    ("elo_change_p2", "ALTER TABLE match ADD COLUMN elo_change_p2 INTEGER"),
+]
+
+
+def migrate():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    existing = {col[1] for col in cur.execute("PRAGMA table_info(match)").fetchall()}
+    for col_name, sql in MIGRATIONS:
+        if col_name not in existing:
+            print(f"Adding column: {col_name}")
+            cur.execute(sql)
+        else:
+            print(f"Column already exists: {col_name}")
+    conn.commit()
+    conn.close()
+    print("Migration complete.")
+
+
+if __name__ == '__main__':
+    migrate()
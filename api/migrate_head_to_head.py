@@ -0,0 +1,34 @@
+"""Backfill head_to_head (one row per player pair) from confirmed matches that predate the table."""
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'instance', 'tennispal.db')
+
+
+def migrate():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    tables = {row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'head_to_head' not in tables:
+        print("Table head_to_head not created yet; skipping")
+        conn.close()
+        return
+    cur.execute("""
+        INSERT OR IGNORE INTO head_to_head
+            (player_low_id, player_high_id, low_wins, high_wins, matches_played, last_played)
+        SELECT MIN(player1_id, player2_id), MAX(player1_id, player2_id),
+               COUNT(CASE WHEN winner_id = MIN(player1_id, player2_id) THEN 1 END),
+               COUNT(CASE WHEN winner_id = MAX(player1_id, player2_id) THEN 1 END),
+               COUNT(*), MAX(play_date)
+        FROM "match"
+        WHERE score_confirmed = 1
+        GROUP BY MIN(player1_id, player2_id), MAX(player1_id, player2_id)
+    """)
+    print(f"  Backfilled {cur.rowcount} head-to-head rows")
+    conn.commit()
+    conn.close()
+    print("Migration complete.")
+
+
+if __name__ == '__main__':
+    migrate()
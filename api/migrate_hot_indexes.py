@@ -0,0 +1,45 @@
+"""Create every index declared on the models that an existing database is missing.
+
+db.create_all() only creates indexes together with new tables, so indexes added
+to existing tables' __table_args__ are created here (CREATE INDEX IF NOT EXISTS).
+ANALYZE runs once (sqlite_stat1 records that it has) and again only after new
+indexes are created, not on every startup.
+"""
+import sqlite3
+import os
+
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex
+
+from models import db
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'instance', 'tennispal.db')
+
+
+def migrate():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    tables = {row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    existing = {row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    created = 0
+    for table in db.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            if index.name in existing:
+                continue
+            print(f"Creating index: {index.name}")
+            cur.execute(str(CreateIndex(index, if_not_exists=True).compile(dialect=sqlite.dialect())))
+            created += 1
+    if created or 'sqlite_stat1' not in tables:
+        print("Analyzing")
+        cur.execute("ANALYZE")
+    else:
+        print("Already analyzed; no new indexes")
+    conn.commit()
+    conn.close()
+    print("Migration complete.")
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,34 @@
+"""Backfill match_participant (two rows per match) for matches that predate the table."""
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'instance', 'tennispal.db')
+
+
+def migrate():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    tables = {row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'match_participant' not in tables:
+        print("Table match_participant not created yet; skipping")
+        conn.close()
+        return
+    added = 0
+    for mine, other in (('player1_id', 'player2_id'), ('player2_id', 'player1_id')):
+        cur.execute(f"""
+            INSERT OR IGNORE INTO match_participant
+                (match_id, user_id, opponent_id, is_winner, status, confirmed, play_date)
+            SELECT id, {mine}, {other},
+                   CASE WHEN winner_id IS NULL THEN NULL ELSE winner_id = {mine} END,
+                   status, COALESCE(score_confirmed, 0), play_date
+            FROM "match"
+        """)
+        added += cur.rowcount
+    print(f"  Backfilled {added} participant rows")
+    conn.commit()
+    conn.close()
+    print("Migration complete.")
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,50 @@
+"""Backfill player_stats for users who have no row yet, so reads don't fall back to per-request aggregates."""
+import sqlite3
+import os
+from datetime import datetime
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'instance', 'tennispal.db')
+CHUNK = 2000  # users per INSERT ... SELECT, committed separately to keep write locks short
+CLOSED_STATUSES = ('completed', 'cancelled', 'no_show')  # PlayerStats.CLOSED_STATUSES
+
+
+def migrate():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    tables = {row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if not {'player_stats', 'match_participant'} <= tables:
+        print("Tables player_stats / match_participant not created yet; skipping")
+        conn.close()
+        return
+    missing = [uid for (uid,) in cur.execute(
+        "SELECT id FROM user WHERE NOT EXISTS (SELECT 1 FROM player_stats WHERE user_id = user.id) ORDER BY id")]
+    now = datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S.%f')
+    added = 0
+    for start in range(0, len(missing), CHUNK):
+        chunk = missing[start:start + CHUNK]
+        # Same counters as PlayerStats.aggregate, over the ids in this range that still lack a row
+        cur.execute(f"""
+            INSERT INTO player_stats
+                (user_id, wins, losses, matches_played, unique_opponents, completed_count, closed_count, updated_at)
+            SELECT u.id,
+                   COUNT(CASE WHEN mp.confirmed = 1 AND mp.is_winner = 1 THEN 1 END),
+                   COUNT(CASE WHEN mp.confirmed = 1 AND mp.is_winner = 0 THEN 1 END),
+                   COUNT(CASE WHEN mp.confirmed = 1 THEN 1 END),
+                   COUNT(DISTINCT CASE WHEN mp.confirmed = 1 THEN mp.opponent_id END),
+                   COUNT(CASE WHEN mp.status = 'completed' THEN 1 END),
+                   COUNT(CASE WHEN mp.status IN ({', '.join('?' * len(CLOSED_STATUSES))}) THEN 1 END),
+                   ?
+            FROM user AS u LEFT JOIN match_participant AS mp ON mp.user_id = u.id
+            WHERE u.id BETWEEN ? AND ?
+              AND NOT EXISTS (SELECT 1 FROM player_stats WHERE user_id = u.id)
+            GROUP BY u.id
+        """, (*CLOSED_STATUSES, now, chunk[0], chunk[-1]))
+        added += cur.rowcount
+        conn.commit()
+    print(f"  Backfilled {added} player stats rows")
+    conn.close()
+    print("Migration complete.")
+
+
+if __name__ == '__main__':
+    migrate()
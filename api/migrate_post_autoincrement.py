@@ -0,0 +1,52 @@
+"""Rebuild looking_to_play with AUTOINCREMENT so ids of swept (archived) posts are never reused."""
+import sqlite3
+import os
+
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateTable
+
+from models import LookingToPlay
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'instance', 'tennispal.db')
+TABLE = 'looking_to_play'
+
+
+def migrate():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    row = cur.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLE,)).fetchone()
+    if row is None:
+        print(f"Table {TABLE} not created yet; skipping")
+        conn.close()
+        return
+    if 'AUTOINCREMENT' in row[0].upper():
+        print(f"Already AUTOINCREMENT: {TABLE}")
+    else:
+        print(f"Rebuilding {TABLE} with AUTOINCREMENT")
+        # Indexes and the search triggers are dropped with the old table; replay their DDL afterwards
+        extras = [r[0] for r in cur.execute(
+            "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') AND sql IS NOT NULL",
+            (TABLE,))]
+        existing = {col[1] for col in cur.execute(f"PRAGMA table_info({TABLE})")}
+        cols = ', '.join(c.name for c in LookingToPlay.__table__.columns if c.name in existing)
+        create = str(CreateTable(LookingToPlay.__table__).compile(dialect=sqlite.dialect()))
+        cur.execute(create.replace(f'CREATE TABLE {TABLE}', f'CREATE TABLE {TABLE}_new', 1))
+        cur.execute(f"INSERT INTO {TABLE}_new ({cols}) SELECT {cols} FROM {TABLE}")
+        cur.execute(f"DROP TABLE {TABLE}")
+        cur.execute(f"ALTER TABLE {TABLE}_new RENAME TO {TABLE}")
+        for sql in extras:
+            cur.execute(sql)
+    tables = {r[0] for r in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'post_archive' in tables and 'sqlite_sequence' in tables:
+        # Start new ids above every archived one, including ids already reused before this migration
+        cur.execute("INSERT INTO sqlite_sequence (name, seq) SELECT ?, 0 "
+                    "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)", (TABLE, TABLE))
+        cur.execute("UPDATE sqlite_sequence SET seq = MAX(seq, (SELECT COALESCE(MAX(id), 0) FROM post_archive)) "
+                    "WHERE name = ?", (TABLE,))
+    conn.commit()
+    conn.close()
+    print("Migration complete.")
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,28 @@
+"""Add an indexed ends_at column to looking_to_play and backfill it from play_date + end_time."""
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'instance', 'tennispal.db')
+
+
+def migrate():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    existing = {col[1] for col in cur.execute("PRAGMA table_info(looking_to_play)").fetchall()}
+    if "ends_at" not in existing:
+        print("Adding column: ends_at")
+        cur.execute("ALTER TABLE looking_to_play ADD COLUMN ends_at DATETIME")
+    else:
+        print("Column already exists: ends_at")
+    # Same text format SQLAlchemy's SQLite DateTime type writes
+    cur.execute("UPDATE looking_to_play SET ends_at = play_date || ' ' || end_time || ':00.000000' "
+                "WHERE ends_at IS NULL")
+    print(f"  Backfilled ends_at on {cur.rowcount} posts")
+    cur.execute("CREATE INDEX IF NOT EXISTS ix_looking_to_play_ends_at ON looking_to_play (ends_at)")
+    conn.commit()
+    conn.close()
+    print("Migration complete.")
+
+
+if __name__ == '__main__':
+    migrate()
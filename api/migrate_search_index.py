@@ -0,0 +1,27 @@
+"""Create the FTS5 search indexes (and their sync triggers) on databases that predate them."""
+import sqlite3
+import os
+
+import search
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'instance', 'tennispal.db')
+
+
+def migrate():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    tables = {row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for fts, (model, _) in search.INDEXES.items():
+        if fts in tables:
+            print(f"Search index already exists: {fts}")
+        elif model.__tablename__ in tables:
+            print(f"Creating search index: {fts}")
+            for stmt in search.statements(fts):
+                cur.execute(stmt)
+    conn.commit()
+    conn.close()
+    print("Migration complete.")
+
+
+if __name__ == '__main__':
+    migrate()
@@ -0,0 +1,29 @@
+"""Backfill suggestion_snapshot_candidate (who each stored suggestion list mentions) from existing snapshots."""
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'instance', 'tennispal.db')
+
+
+def migrate():
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
+    tables = {row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if not {'suggestion_snapshot', 'suggestion_snapshot_candidate'} <= tables:
+        print("Tables suggestion_snapshot / suggestion_snapshot_candidate not created yet; skipping")
+        conn.close()
+        return
+    cur.execute("""
+        INSERT OR IGNORE INTO suggestion_snapshot_candidate (candidate_id, user_id)
+        SELECT json_extract(entry.value, '$.id'), s.user_id
+        FROM suggestion_snapshot AS s, json_each(s.suggestions) AS entry
+        WHERE NOT EXISTS (SELECT 1 FROM suggestion_snapshot_candidate AS c WHERE c.user_id = s.user_id)
+    """)
+    print(f"  Backfilled {cur.rowcount} snapshot candidate rows")
+    conn.commit()
+    conn.close()
+    print("Migration complete.")
+
+
+if __name__ == '__main__':
+    migrate()
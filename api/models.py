@@ -2,6 +2,8 @@ from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, date
 import json
 
+import weekmask
+
 db = SQLAlchemy()
 
 
@@ -15,6 +17,8 @@ class User(db.Model):
     elo = db.Column(db.Integer, default=1200)
     city = db.Column(db.String(100), default="Pittsburgh")
     preferred_courts = db.Column(db.Text, nullable=True)  # JSON array of court names
+    court_tokens = db.Column(db.Text, nullable=True)  # normalized preferred_courts, kept in sync on write
+    availability_mask = db.Column(db.LargeBinary, nullable=True)  # weekmask bitmap of the Availability rows
     notify_sms = db.Column(db.Boolean, default=False)
     notify_email = db.Column(db.Boolean, default=True)
     is_admin = db.Column(db.Boolean, default=False)
@@ -30,38 +34,49 @@ class User(db.Model):
     availabilities = db.relationship('Availability', backref='user', lazy=True, cascade='all,delete-orphan')
     posts = db.relationship('LookingToPlay', backref='author', lazy=True, foreign_keys='LookingToPlay.user_id')
 
+    stats_row = db.relationship('PlayerStats', uselist=False, lazy=True, cascade='all,delete-orphan')
+
+    __table_args__ = (
+        db.Index('ix_user_ntrp_elo', 'ntrp', 'elo'),  # matchmaking buckets
+        db.Index('ix_user_elo', 'elo'),
+    )
+
+    @property
+    def stats(self):
+        """Materialized counters; computed on the fly (once per instance) for users not yet backfilled."""
+        if self.stats_row is not None:
+            return self.stats_row
+        if getattr(self, '_computed_stats', None) is None:
+            self._computed_stats = PlayerStats.compute(self.id)
+        return self._computed_stats
+
     @property
     def wins(self):
-        return sum(1 for m in Match.query.filter(Match.score_confirmed == True).filter(
-            (Match.player1_id == self.id) | (Match.player2_id == self.id)).all() if m.winner_id == self.id)
+        return self.stats.wins
 
     @property
     def losses(self):
-        return sum(1 for m in Match.query.filter(Match.score_confirmed == True).filter(
-            (Match.player1_id == self.id) | (Match.player2_id == self.id)).all() if m.winner_id and m.winner_id != self.id)
+        return self.stats.losses
 
     @property
     def matches_played(self):
-        return Match.query.filter(Match.score_confirmed == True).filter(
-            (Match.player1_id == self.id) | (Match.player2_id == self.id)).count()
+        return self.stats.matches_played
 
     @property
     def unique_opponents(self):
-        ids = set()
-        for m in Match.query.filter(Match.score_confirmed == True).filter(
-                (Match.player1_id == self.id) | (Match.player2_id == self.id)).all():
-            ids.add(m.player2_id if m.player1_id == self.id else m.player1_id)
-        return len(ids)
+        return self.stats.unique_opponents
 
     @property
     def reliability(self):
-        total = Match.query.filter(Match.status.in_(['completed', 'cancelled', 'no_show'])).filter(
-            (Match.player1_id == self.id) | (Match.player2_id == self.id)).count()
-        if total == 0:
-            return 100
-        played = Match.query.filter(Match.status == 'completed').filter(
-            (Match.player1_id == self.id) | (Match.player2_id == self.id)).count()
-        return round(played / total * 100)
+        return self.stats.reliability
+
+    @property
+    def weekly_mask(self):
+        return weekmask.from_blob(self.availability_mask)
+
+    @property
+    def court_list(self):
+        return json.loads(self.court_tokens) if self.court_tokens else []
 
     def to_dict(self, brief=False):
         d = {'id': self.id, 'name': self.name, 'ntrp': self.ntrp, 'elo': self.elo, 'onboarding_complete': self.onboarding_complete, 'email_verified': self.email_verified}
@@ -81,6 +96,223 @@ class User(db.Model):
         return d
 
 
+class PlayerStats(db.Model):
+    """Per-player match counters, refreshed whenever one of the player's matches changes."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    wins = db.Column(db.Integer, default=0, nullable=False)
+    losses = db.Column(db.Integer, default=0, nullable=False)
+    matches_played = db.Column(db.Integer, default=0, nullable=False)
+    unique_opponents = db.Column(db.Integer, default=0, nullable=False)
+    completed_count = db.Column(db.Integer, default=0, nullable=False)
+    closed_count = db.Column(db.Integer, default=0, nullable=False)  # completed + cancelled + no_show
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    CLOSED_STATUSES = ('completed', 'cancelled', 'no_show')
+    COUNTER_COLUMNS = ('wins', 'losses', 'matches_played', 'unique_opponents', 'completed_count', 'closed_count')
+    BOARD_COLUMNS = ('wins', 'losses', 'matches_played')  # copied into LeaderboardSnapshot
+    IN_CHUNK = 500  # stay well under SQLite's bound-parameter limit
+
+    @property
+    def reliability(self):
+        if not self.closed_count:
+            return 100
+        return round(self.completed_count / self.closed_count * 100)
+
+    @classmethod
+    def aggregate(cls, user_ids):
+        """Compute counters for many users from their MatchParticipant rows with one GROUP BY.
+
+        Returns {user_id: PlayerStats} (transient rows); users with no matches get zeros.
+        """
+        ids = list({u for u in user_ids if u is not None})
+        result = {uid: cls(user_id=uid, **{col: 0 for col in cls.COUNTER_COLUMNS}) for uid in ids}
+        mp = MatchParticipant
+        confirmed = mp.confirmed == True
+        for chunk in (ids[i:i + cls.IN_CHUNK] for i in range(0, len(ids), cls.IN_CHUNK)):
+            rows = db.session.query(
+                mp.user_id,
+                db.func.count(db.case((confirmed & (mp.is_winner == True), 1))),
+                db.func.count(db.case((confirmed & (mp.is_winner == False), 1))),
+                db.func.count(db.case((confirmed, 1))),
+                db.func.count(db.distinct(db.case((confirmed, mp.opponent_id)))),
+                db.func.count(db.case((mp.status == 'completed', 1))),
+                db.func.count(db.case((mp.status.in_(cls.CLOSED_STATUSES), 1))),
+            ).filter(mp.user_id.in_(chunk)).group_by(mp.user_id).all()
+            for uid, *counts in rows:
+                for col, val in zip(cls.COUNTER_COLUMNS, counts):
+                    setattr(result[uid], col, val)
+        return result
+
+    @classmethod
+    def compute(cls, user_id):
+        """Aggregate a single user's counters straight from match history."""
+        return cls.aggregate([user_id])[user_id]
+
+    @classmethod
+    def _stored(cls, ids):
+        found = {}
+        for chunk in (ids[i:i + cls.IN_CHUNK] for i in range(0, len(ids), cls.IN_CHUNK)):
+            found.update({r.user_id: r for r in cls.query.filter(cls.user_id.in_(chunk)).all()})
+        return found
+
+    @classmethod
+    def bulk(cls, user_ids):
+        """Stats for a list of users: stored rows in one IN query, GROUP BY fallback for the rest."""
+        ids = list({u for u in user_ids if u is not None})
+        found = cls._stored(ids)
+        missing = [uid for uid in ids if uid not in found]
+        if missing:
+            found.update(cls.aggregate(missing))
+        return found
+
+    @classmethod
+    def refresh(cls, *user_ids):
+        """Recompute the rows for the given users inside the caller's transaction."""
+        fresh = cls.aggregate(user_ids)
+        stored = cls._stored(list(fresh))
+        reranked = False
+        for uid, stats in fresh.items():
+            row = stored.get(uid)
+            # Only the counters the leaderboard shows make its snapshot stale (a missing row reads as zeros)
+            reranked = reranked or any((getattr(row, col) if row else 0) != getattr(stats, col)
+                                       for col in cls.BOARD_COLUMNS)
+            if row is None:
+                db.session.add(stats)
+                continue
+            for col in cls.COUNTER_COLUMNS:
+                setattr(row, col, getattr(stats, col))
+        if reranked:
+            SnapshotMeta.mark_stale('leaderboard')
+
+    @classmethod
+    def rebuild(cls):
+        """Backfill: recompute every user's row from match history. Returns the row count."""
+        MatchParticipant.rebuild()  # the aggregate reads participant rows; resync them first
+        user_ids = [uid for (uid,) in db.session.query(User.id).all()]
+        cls.refresh(*user_ids)
+        db.session.commit()
+        return len(user_ids)
+
+
+class LeaderboardSnapshot(db.Model):
+    """Precomputed ranking, rebuilt from User/PlayerStats in the background when marked stale."""
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    rank = db.Column(db.Integer, nullable=False)
+    city = db.Column(db.String(100), nullable=True)
+    city_rank = db.Column(db.Integer, nullable=False)
+    elo = db.Column(db.Integer, nullable=False)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    matches_played = db.Column(db.Integer, nullable=False, default=0)
+
+    user = db.relationship('User')
+
+    __table_args__ = (
+        db.Index('ix_leaderboard_rank', 'rank', unique=True),
+        db.Index('ix_leaderboard_city_rank', 'city', 'city_rank'),
+    )
+
+
+class SnapshotMeta(db.Model):
+    """Freshness flag for derived snapshots; writers only flip `stale`, a background refresh rebuilds."""
+    name = db.Column(db.String(50), primary_key=True)
+    stale = db.Column(db.Boolean, nullable=False, default=True)
+    built_at = db.Column(db.DateTime, nullable=True)
+
+    @classmethod
+    def mark_stale(cls, name):
+        cls.query.filter_by(name=name).update({'stale': True}, synchronize_session=False)
+
+    @classmethod
+    def is_stale(cls, name):
+        row = db.session.get(cls, name)
+        return row is None or row.stale
+
+    @classmethod
+    def mark_built(cls, name):
+        row = db.session.get(cls, name) or cls(name=name)
+        row.stale = False
+        row.built_at = datetime.utcnow()
+        db.session.add(row)
+
+
+class ResourceVersion(db.Model):
+    """Monotonic change counters behind the API's ETags, one row per resource name.
+
+    Bumped automatically on flush (see `_bump_resource_versions`), so a reader
+    can tell whether anything changed with a primary-key lookup instead of
+    re-running its query. Names are global ('posts', 'users', 'courts',
+    'review_tags') or per user ('matches:<user_id>').
+    """
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def get(cls, *names):
+        rows = dict(db.session.query(cls.name, cls.version).filter(cls.name.in_(names)).all())
+        return tuple(rows.get(n, 0) for n in names)
+
+    @classmethod
+    def bump(cls, names, connection=None):
+        """Increment each counter (creating it at 1) on the given connection or the session's."""
+        if not names:
+            return
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(cls.__table__).values(name=db.bindparam('n'), version=1)
+        stmt = stmt.on_conflict_do_update(index_elements=['name'], set_={'version': cls.__table__.c.version + 1})
+        (connection or db.session.connection()).execute(stmt, [{'n': n} for n in sorted(names)])
+
+    @classmethod
+    def bump_prefix(cls, prefix):
+        """Increment every existing counter under a prefix, for bulk writes that bypass the ORM."""
+        cls.query.filter(cls.name.startswith(prefix)).update({'version': cls.version + 1},
+                                                             synchronize_session=False)
+
+
+class RatingHistory(db.Model):
+    """Append-only log of Elo values, one row per rating change."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    recorded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    elo = db.Column(db.Integer, nullable=False)  # rating after the change
+    delta = db.Column(db.Integer, nullable=False, default=0)
+    match_id = db.Column(db.Integer, nullable=True)  # plain id: the log outlives deleted matches
+    reason = db.Column(db.String(20), nullable=False, default='match')  # match, revert, admin, replay
+
+    __table_args__ = (db.Index('ix_rating_history_user_time', 'user_id', 'recorded_at'),)
+
+    def to_dict(self):
+        return {'recorded_at': self.recorded_at.isoformat(), 'elo': self.elo, 'delta': self.delta,
+                'match_id': self.match_id, 'reason': self.reason}
+
+
+def normalize_courts(raw):
+    """Lower-cased, de-duplicated court names from a JSON array or a comma-separated string."""
+    if not raw:
+        return []
+    try:
+        names = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        names = raw.split(',')
+    if isinstance(names, str):
+        names = [names]
+    elif not isinstance(names, list):
+        return []
+    tokens = []
+    for name in names:
+        token = str(name).strip().lower()
+        if token and token not in tokens:
+            tokens.append(token)
+    return tokens
+
+
+@db.event.listens_for(User, 'before_insert')
+@db.event.listens_for(User, 'before_update')
+def _sync_court_tokens(mapper, connection, user):
+    tokens = normalize_courts(user.preferred_courts)
+    user.court_tokens = json.dumps(tokens) if tokens else None
+
+
 class Availability(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -88,6 +320,11 @@ class Availability(db.Model):
     start_time = db.Column(db.String(5), nullable=False)
     end_time = db.Column(db.String(5), nullable=False)
 
+    __table_args__ = (
+        db.Index('ix_availability_user_day', 'user_id', 'day_of_week'),
+        db.Index('ix_availability_day', 'day_of_week', 'start_time'),
+    )
+
     DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
 
     @property
@@ -98,6 +335,25 @@ class Availability(db.Model):
         return {'id': self.id, 'user_id': self.user_id, 'day_of_week': self.day_of_week,
                 'day_name': self.day_name, 'start_time': self.start_time, 'end_time': self.end_time}
 
+    @classmethod
+    def compile_mask(cls, user_id, connection=None):
+        """Recompute and store a user's availability bitmap from their slots."""
+        conn = connection or db.session.connection()
+        table = cls.__table__
+        slots = conn.execute(db.select(table.c.day_of_week, table.c.start_time, table.c.end_time)
+                             .where(table.c.user_id == user_id)).all()
+        mask = weekmask.compile_slots(slots)
+        conn.execute(User.__table__.update().where(User.__table__.c.id == user_id)
+                     .values(availability_mask=weekmask.to_blob(mask)))
+        return mask
+
+
+@db.event.listens_for(Availability, 'after_insert')
+@db.event.listens_for(Availability, 'after_update')
+@db.event.listens_for(Availability, 'after_delete')
+def _sync_availability_mask(mapper, connection, slot):
+    Availability.compile_mask(slot.user_id, connection)
+
 
 class LookingToPlay(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -111,20 +367,63 @@ class LookingToPlay(db.Model):
     level_max = db.Column(db.Float, nullable=True)
     claimed_by_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    ends_at = db.Column(db.DateTime, nullable=True, index=True)  # play_date + end_time, kept in sync on write
 
     claimed_by = db.relationship('User', foreign_keys=[claimed_by_id])
 
+    __table_args__ = (
+        db.Index('ix_post_open_ends', 'claimed_by_id', 'ends_at'),  # the feed's base filter
+        db.Index('ix_post_user', 'user_id'),
+        db.Index('ix_post_play_date', 'play_date', 'start_time'),
+        db.Index('ix_post_created', 'created_at'),
+        # Swept posts keep their id in post_archive, so ids must never be handed out again
+        {'sqlite_autoincrement': True},
+    )
+
+    def compute_ends_at(self):
+        return datetime.combine(self.play_date, datetime.strptime(self.end_time, '%H:%M').time())
+
     @property
     def is_expired(self):
-        end = datetime.combine(self.play_date, datetime.strptime(self.end_time, '%H:%M').time())
-        return datetime.now() > end
+        return datetime.now() > (self.ends_at or self.compute_ends_at())
+
+    @classmethod
+    def for_you_score(cls, ntrp, courts):
+        """SQL expression for the "For You" relevance of a post to a player.
+
+        Level: 10 if the player's NTRP falls inside the post's range, otherwise
+        8 minus the distance to the range midpoint (floored at 0); 5 for posts
+        open to every level. Court: +5 if the post's court contains any of the
+        player's normalized court tokens.
+        """
+        score = db.literal(0.0)
+        if ntrp:
+            lo = db.func.coalesce(cls.level_min, cls.level_max)
+            hi = db.func.coalesce(cls.level_max, cls.level_min)
+            dist = db.func.abs(ntrp - (lo + hi) / 2.0)
+            score = score + db.case(
+                (lo.is_(None), 5.0),
+                (db.and_(lo <= ntrp, hi >= ntrp), 10.0),
+                (dist < 8, 8 - dist),
+                else_=0.0,
+            )
+        if courts:
+            court = db.func.lower(cls.court)
+            score = score + db.case((db.or_(*[court.contains(c, autoescape=True) for c in courts]), 5.0),
+                                    else_=0.0)
+        return score
 
     @property
     def is_active(self):
         return not self.is_expired and self.claimed_by_id is None
 
-    def to_dict(self):
-        author = User.query.get(self.user_id)
+    @classmethod
+    def find(cls, post_id):
+        """The live post with this id, else its PostArchive row once swept, else None."""
+        return db.session.get(cls, post_id) or db.session.get(PostArchive, post_id)
+
+    def to_dict(self, users=None):
+        author = users.get(self.user_id) if users is not None else db.session.get(User, self.user_id)
         return {
             'id': self.id, 'user_id': self.user_id,
             'author_name': author.name if author else None,
@@ -139,11 +438,38 @@ class LookingToPlay(db.Model):
         }
 
 
+@db.event.listens_for(LookingToPlay, 'before_insert')
+@db.event.listens_for(LookingToPlay, 'before_update')
+def _sync_post_ends_at(mapper, connection, post):
+    post.ends_at = post.compute_ends_at()
+
+
+class PostArchive(db.Model):
+    """Expired or long-claimed posts moved out of looking_to_play by the sweeper (ids preserved)."""
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    play_date = db.Column(db.Date, nullable=False)
+    start_time = db.Column(db.String(5), nullable=False)
+    end_time = db.Column(db.String(5), nullable=False)
+    court = db.Column(db.String(100))
+    match_type = db.Column(db.String(20))
+    level_min = db.Column(db.Float, nullable=True)
+    level_max = db.Column(db.Float, nullable=True)
+    claimed_by_id = db.Column(db.Integer, nullable=True)
+    created_at = db.Column(db.DateTime)
+    ends_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    reason = db.Column(db.String(10), nullable=False)  # expired | claimed
+
+    COPIED_COLUMNS = ('id', 'user_id', 'play_date', 'start_time', 'end_time', 'court', 'match_type',
+                      'level_min', 'level_max', 'claimed_by_id', 'created_at', 'ends_at')
+
+
 class MatchInvite(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     from_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     to_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    post_id = db.Column(db.Integer, db.ForeignKey('looking_to_play.id'), nullable=True)
+    post_id = db.Column(db.Integer, nullable=True)  # looking_to_play or, once swept, post_archive id
     play_date = db.Column(db.Date, nullable=False)
     start_time = db.Column(db.String(5), nullable=False)
     end_time = db.Column(db.String(5), nullable=False)
@@ -154,13 +480,24 @@ class MatchInvite(db.Model):
 
     from_user = db.relationship('User', foreign_keys=[from_user_id])
     to_user = db.relationship('User', foreign_keys=[to_user_id])
-    post = db.relationship('LookingToPlay', foreign_keys=[post_id])
 
-    def to_dict(self):
+    __table_args__ = (
+        db.Index('ix_invite_to_status', 'to_user_id', 'status'),
+        db.Index('ix_invite_from_status', 'from_user_id', 'status'),
+        db.Index('ix_invite_post_status', 'post_id', 'status'),
+    )
+
+    @property
+    def post(self):
+        return LookingToPlay.find(self.post_id) if self.post_id else None
+
+    def to_dict(self, users=None):
+        from_user = users.get(self.from_user_id) if users is not None else self.from_user
+        to_user = users.get(self.to_user_id) if users is not None else self.to_user
         return {
             'id': self.id,
-            'from_user': {'id': self.from_user.id, 'name': self.from_user.name} if self.from_user else None,
-            'to_user': {'id': self.to_user.id, 'name': self.to_user.name} if self.to_user else None,
+            'from_user': {'id': from_user.id, 'name': from_user.name} if from_user else None,
+            'to_user': {'id': to_user.id, 'name': to_user.name} if to_user else None,
             'post_id': self.post_id,
             'play_date': self.play_date.isoformat(),
             'start_time': self.start_time, 'end_time': self.end_time,
@@ -183,28 +520,223 @@ class Match(db.Model):
     score_confirmed = db.Column(db.Boolean, default=False)
     score_disputed = db.Column(db.Boolean, default=False)
     winner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    elo_change_p1 = db.Column(db.Integer, nullable=True)  # set when the score is confirmed
+    elo_change_p2 = db.Column(db.Integer, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     player1 = db.relationship('User', foreign_keys=[player1_id])
     player2 = db.relationship('User', foreign_keys=[player2_id])
     winner = db.relationship('User', foreign_keys=[winner_id])
 
-    def to_dict(self):
+    __table_args__ = (
+        # Single-side lookups; "either player" queries go through MatchParticipant
+        db.Index('ix_match_player1_date', 'player1_id', 'play_date'),
+        db.Index('ix_match_player2_date', 'player2_id', 'play_date'),
+        db.Index('ix_match_confirmed_date', 'score_confirmed', 'play_date'),
+        db.Index('ix_match_status_date', 'status', 'play_date'),
+    )
+
+    @classmethod
+    def of_player(cls, user_id):
+        """Query of the player's matches via their participant rows (order by MatchParticipant.play_date)."""
+        return cls.query.join(MatchParticipant, MatchParticipant.match_id == cls.id) \
+            .filter(MatchParticipant.user_id == user_id)
+
+    def to_dict(self, users=None):
+        if users is not None:
+            player1, player2 = users.get(self.player1_id), users.get(self.player2_id)
+            winner = users.get(self.winner_id)
+        else:
+            player1, player2, winner = self.player1, self.player2, self.winner
         return {
             'id': self.id,
-            'player1': {'id': self.player1.id, 'name': self.player1.name} if self.player1 else None,
-            'player2': {'id': self.player2.id, 'name': self.player2.name} if self.player2 else None,
+            'player1': {'id': player1.id, 'name': player1.name} if player1 else None,
+            'player2': {'id': player2.id, 'name': player2.name} if player2 else None,
             'play_date': self.play_date.isoformat(),
             'match_type': self.match_type, 'match_format': self.match_format, 'status': self.status,
             'score': self.score, 'sets': json.loads(self.sets) if self.sets else None,
             'score_submitted_by': self.score_submitted_by,
             'score_confirmed': self.score_confirmed, 'score_disputed': self.score_disputed,
             'winner_id': self.winner_id,
-            'winner_name': self.winner.name if self.winner else None,
+            'winner_name': winner.name if winner else None,
+            'elo_change_p1': self.elo_change_p1, 'elo_change_p2': self.elo_change_p2,
             'created_at': self.created_at.isoformat() if self.created_at else None,
         }
 
 
+class MatchParticipant(db.Model):
+    """Two rows per match, one from each player's side, mirrored from Match on every ORM write.
+
+    "Matches for player X" is then a single range scan on (user_id, ...) instead
+    of an OR across player1_id and player2_id.
+    """
+    match_id = db.Column(db.Integer, db.ForeignKey('match.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    opponent_id = db.Column(db.Integer, nullable=False)
+    is_winner = db.Column(db.Boolean, nullable=True)  # None until the match has a winner
+    status = db.Column(db.String(20), nullable=True)
+    confirmed = db.Column(db.Boolean, nullable=False, default=False)
+    play_date = db.Column(db.Date, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_participant_user_date', 'user_id', 'play_date'),
+        db.Index('ix_participant_user_confirmed', 'user_id', 'confirmed', 'play_date'),
+        db.Index('ix_participant_user_opponent', 'user_id', 'opponent_id'),
+    )
+
+    SYNCED_COLUMNS = ('player1_id', 'player2_id', 'winner_id', 'status', 'score_confirmed', 'play_date')
+
+    @staticmethod
+    def rows_for(match):
+        winner = match.winner_id
+        return [{
+            'match_id': match.id, 'user_id': uid, 'opponent_id': opp,
+            'is_winner': None if winner is None else winner == uid,
+            'status': match.status, 'confirmed': bool(match.score_confirmed), 'play_date': match.play_date,
+        } for uid, opp in ((match.player1_id, match.player2_id), (match.player2_id, match.player1_id))]
+
+    @classmethod
+    def rebuild(cls):
+        """Backfill: regenerate every row from the Match table. Returns the number of matches."""
+        table = cls.__table__
+        db.session.execute(table.delete())
+        count = 0
+        for mine, other in ((Match.player1_id, Match.player2_id), (Match.player2_id, Match.player1_id)):
+            select = db.select(
+                Match.id, mine, other,
+                db.case((Match.winner_id.is_(None), None), else_=Match.winner_id == mine),
+                Match.status, db.func.coalesce(Match.score_confirmed, False), Match.play_date)
+            count = db.session.execute(table.insert().from_select(
+                ['match_id', 'user_id', 'opponent_id', 'is_winner', 'status', 'confirmed', 'play_date'],
+                select)).rowcount
+        db.session.commit()
+        return count
+
+
+@db.event.listens_for(Match, 'after_insert')
+@db.event.listens_for(Match, 'after_update')
+def _sync_match_participants(mapper, connection, match):
+    state = db.inspect(match)
+    if state.has_identity and not any(state.attrs[c].history.has_changes()
+                                      for c in MatchParticipant.SYNCED_COLUMNS):
+        return
+    table = MatchParticipant.__table__
+    connection.execute(table.delete().where(table.c.match_id == match.id))
+    connection.execute(table.insert(), MatchParticipant.rows_for(match))
+    pairs = {(match.player1_id, match.player2_id)}
+    p1, p2 = state.attrs.player1_id.history, state.attrs.player2_id.history
+    if state.has_identity and (p1.deleted or p2.deleted):
+        pairs.add((p1.deleted[0] if p1.deleted else match.player1_id,
+                   p2.deleted[0] if p2.deleted else match.player2_id))
+    HeadToHead.sync(connection, pairs)
+
+
+@db.event.listens_for(Match, 'after_delete')
+def _drop_match_participants(mapper, connection, match):
+    table = MatchParticipant.__table__
+    connection.execute(table.delete().where(table.c.match_id == match.id))
+    HeadToHead.sync(connection, [(match.player1_id, match.player2_id)])
+
+
+class HeadToHead(db.Model):
+    """Confirmed-match record between two players, keyed by (lower id, higher id).
+
+    Re-aggregated from the pair's participant rows whenever one of their matches is
+    written, so a head-to-head summary is a single primary-key lookup.
+    """
+    __tablename__ = 'head_to_head'
+    player_low_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    player_high_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    low_wins = db.Column(db.Integer, nullable=False, default=0)
+    high_wins = db.Column(db.Integer, nullable=False, default=0)
+    matches_played = db.Column(db.Integer, nullable=False, default=0)
+    last_played = db.Column(db.Date, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_h2h_high', 'player_high_id'),
+    )
+
+    @staticmethod
+    def key(a, b):
+        return (a, b) if a < b else (b, a)
+
+    @classmethod
+    def summary(cls, user_id, other_id):
+        """{wins, losses, matches_played, last_played} from user_id's side; zeros if they never met."""
+        row = db.session.get(cls, cls.key(user_id, other_id))
+        if row is None:
+            return {'wins': 0, 'losses': 0, 'matches_played': 0, 'last_played': None}
+        mine, theirs = (row.low_wins, row.high_wins) if user_id < other_id else (row.high_wins, row.low_wins)
+        return {'wins': mine, 'losses': theirs, 'matches_played': row.matches_played,
+                'last_played': row.last_played.isoformat() if row.last_played else None}
+
+    @classmethod
+    def sync(cls, connection, pairs):
+        """Recompute the given player pairs from their participant rows on a flush-time connection."""
+        from sqlalchemy.dialects.sqlite import insert
+        mp, table = MatchParticipant.__table__, cls.__table__
+        for low, high in {cls.key(a, b) for a, b in pairs if a is not None and b is not None}:
+            played, low_wins, high_wins, last = connection.execute(db.select(
+                db.func.count(),
+                db.func.count(db.case((mp.c.is_winner == True, 1))),
+                db.func.count(db.case((mp.c.is_winner == False, 1))),
+                db.func.max(mp.c.play_date),
+            ).where(mp.c.user_id == low, mp.c.opponent_id == high, mp.c.confirmed == True)).one()
+            if not played:
+                connection.execute(table.delete().where(
+                    table.c.player_low_id == low, table.c.player_high_id == high))
+                continue
+            values = {'low_wins': low_wins, 'high_wins': high_wins, 'matches_played': played, 'last_played': last}
+            connection.execute(insert(table).values(player_low_id=low, player_high_id=high, **values)
+                               .on_conflict_do_update(index_elements=['player_low_id', 'player_high_id'],
+                                                      set_=values))
+
+    @classmethod
+    def rebuild(cls):
+        """Backfill: regenerate every pair from confirmed matches. Returns the number of pairs."""
+        low = db.func.min(Match.player1_id, Match.player2_id)  # SQLite's two-argument scalar min/max
+        high = db.func.max(Match.player1_id, Match.player2_id)
+        select = db.select(
+            low, high,
+            db.func.count(db.case((Match.winner_id == low, 1))),
+            db.func.count(db.case((Match.winner_id == high, 1))),
+            db.func.count(),
+            db.func.max(Match.play_date),
+        ).where(Match.score_confirmed == True).group_by(low, high)
+        db.session.execute(cls.__table__.delete())
+        count = db.session.execute(cls.__table__.insert().from_select(
+            ['player_low_id', 'player_high_id', 'low_wins', 'high_wins', 'matches_played', 'last_played'],
+            select)).rowcount
+        db.session.commit()
+        return count
+
+
+class SuggestionSnapshot(db.Model):
+    """A player's matchmaking suggestions as precomputed by the nightly job (precompute.py).
+
+    `suggestions` is the JSON list of the best `top_n` suggestion dicts, best
+    first. The row is deleted when the scoring inputs of the player or of anyone
+    listed in it change, so the endpoint falls back to live scoring until the
+    next run.
+    """
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    top_n = db.Column(db.Integer, nullable=False)
+    suggestions = db.Column(db.Text, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (db.Index('ix_suggestion_snapshot_computed', 'computed_at'),)
+
+
+class SuggestionSnapshotCandidate(db.Model):
+    """Reverse index of `SuggestionSnapshot.suggestions`: which stored lists mention a player.
+
+    Written alongside the snapshots by precompute.py. Rows can outlive their
+    snapshot until the next run; they only ever cause a delete of nothing.
+    """
+    candidate_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)  # owner of the snapshot
+
+
 class ReviewTag(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False, unique=True)
@@ -233,7 +765,10 @@ class PlayerReview(db.Model):
     match = db.relationship('Match', backref='reviews')
     tags = db.relationship('ReviewTag', secondary=review_tags_assoc, lazy='joined')
 
-    __table_args__ = (db.UniqueConstraint('reviewer_id', 'match_id', name='uq_reviewer_match'),)
+    __table_args__ = (
+        db.UniqueConstraint('reviewer_id', 'match_id', name='uq_reviewer_match'),
+        db.Index('ix_review_reviewee', 'reviewee_id'),
+    )
 
     def to_dict(self):
         return {
@@ -269,6 +804,47 @@ class Notification(db.Model):
 
     user = db.relationship('User', backref='notifications')
 
+    __table_args__ = (
+        db.Index('ix_notification_user_time', 'user_id', 'created_at'),
+        db.Index('ix_notification_user_read', 'user_id', 'read'),
+    )
+
     def to_dict(self):
         return {'id': self.id, 'message': self.message, 'read': self.read,
                 'created_at': self.created_at.isoformat() if self.created_at else None, 'link': self.link}
+
+
+# User fields embedded in other resources' JSON (author names, opponent names, feed ranking)
+_SHARED_USER_FIELDS = ('name', 'ntrp', 'preferred_courts')
+
+
+def _touched_resources(obj, deleted=False):
+    if isinstance(obj, LookingToPlay):
+        return {'posts'}
+    if isinstance(obj, Match):
+        return {f'matches:{obj.player1_id}', f'matches:{obj.player2_id}'}
+    if isinstance(obj, MatchInvite):
+        return {f'matches:{obj.from_user_id}', f'matches:{obj.to_user_id}'}
+    if isinstance(obj, User):
+        state = db.inspect(obj)
+        if deleted or any(state.attrs[f].history.has_changes() for f in _SHARED_USER_FIELDS):
+            return {'users'}
+    elif isinstance(obj, Court):
+        return {'courts'}
+    elif isinstance(obj, ReviewTag):
+        return {'review_tags'}
+    return set()
+
+
+@db.event.listens_for(db.session, 'after_flush')
+def _bump_resource_versions(session, flush_context):
+    names = set()
+    for obj in session.new:
+        if not isinstance(obj, User):  # a new user isn't embedded anywhere yet
+            names |= _touched_resources(obj)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            names |= _touched_resources(obj)
+    for obj in session.deleted:
+        names |= _touched_resources(obj, deleted=True)
+    ResourceVersion.bump(names, session.connection())
@@ -0,0 +1,75 @@
+"""Nightly matchmaking precompute: store every active player's top suggestions.
+
+The whole population is read once into a `matchmaking.CandidatePool`; active
+players are then processed in blocks. Each block shares one recent-matches
+query and one commit, and each player is scored against every column of the
+pool in a single pass. Results replace the players' `SuggestionSnapshot`
+rows (and their `SuggestionSnapshotCandidate` reverse index), which
+`/api/matchmaking/suggestions` serves directly while they are fresh. Rows
+older than `matchmaking.STORED_MAX_AGE` are removed, along with index rows
+whose snapshot is gone.
+
+Usage: python precompute.py [--top N] [--days D] [--block N] [--every SECONDS]
+"""
+import argparse
+import heapq
+import json
+import time
+from datetime import datetime
+
+from models import db, SuggestionSnapshot, SuggestionSnapshotCandidate
+import matchmaking
+
+TOP_N = 50
+BLOCK_SIZE = 200
+
+
+def precompute(top_n=TOP_N, days=matchmaking.ACTIVE_DAYS, block_size=BLOCK_SIZE, now=None):
+    """Recompute stored suggestions for players active in the last `days` days; returns how many."""
+    now = now or datetime.utcnow()
+    pool = matchmaking.CandidatePool.load()
+    position = {uid: i for i, uid in enumerate(pool.ids)}
+    active = [uid for uid in matchmaking.active_user_ids(days, max_users=None) if uid in position]
+    table, listed = SuggestionSnapshot.__table__, SuggestionSnapshotCandidate.__table__
+    for start in range(0, len(active), block_size):
+        block = active[start:start + block_size]
+        recent = matchmaking.recent_opponent_counts_bulk(block, now.date())
+        rows, candidates = [], []
+        for uid in block:
+            me = position[uid]
+            scores = matchmaking.Scores(pool.player(me), pool, recent.get(uid, {}))
+            # nlargest is stable, so equal scores stay in id order, like matchmaking.score()
+            best = heapq.nlargest(top_n, (i for i in range(len(pool)) if i != me), key=scores.total.__getitem__)
+            rows.append({'user_id': uid, 'top_n': top_n, 'computed_at': now,
+                         'suggestions': json.dumps([scores.suggestion(i) for i in best])})
+            candidates.extend({'candidate_id': pool.ids[i], 'user_id': uid} for i in best)
+        db.session.execute(table.delete().where(table.c.user_id.in_(block)))
+        db.session.execute(listed.delete().where(listed.c.user_id.in_(block)))
+        db.session.execute(table.insert(), rows)
+        if candidates:
+            db.session.execute(listed.insert(), candidates)
+        db.session.commit()
+    db.session.execute(table.delete().where(table.c.computed_at < now - matchmaking.STORED_MAX_AGE))
+    db.session.execute(listed.delete().where(listed.c.user_id.not_in(db.select(table.c.user_id))))
+    db.session.commit()
+    matchmaking.cache.invalidate()
+    return len(active)
+
+
+if __name__ == "__main__":
+    from app import app
+
+    parser = argparse.ArgumentParser(description='Precompute matchmaking suggestions for active players.')
+    parser.add_argument('--top', type=int, default=TOP_N, help='suggestions stored per player')
+    parser.add_argument('--days', type=int, default=matchmaking.ACTIVE_DAYS, help='activity window')
+    parser.add_argument('--block', type=int, default=BLOCK_SIZE, help='players per commit')
+    parser.add_argument('--every', type=float, help='keep running, recomputing every SECONDS')
+    args = parser.parse_args()
+    with app.app_context():
+        while True:
+            started = time.monotonic()
+            n = precompute(top_n=args.top, days=args.days, block_size=args.block)
+            print(f"✅ Stored suggestions for {n} active players in {time.monotonic() - started:.1f}s")
+            if not args.every:
+                break
+            time.sleep(args.every)
@@ -0,0 +1,53 @@
+"""Rebuild derived tables from the source-of-truth match history.
+
+Usage: python rebuild.py [participants] [stats] [h2h] [elo] [leaderboard]
+"""
+from app import app
+from models import PlayerStats, MatchParticipant, HeadToHead
+import elo
+import leaderboard
+
+
+def rebuild_participants():
+    n = MatchParticipant.rebuild()
+    print(f"✅ Rebuilt participant rows for {n} matches")
+
+
+def rebuild_stats():
+    n = PlayerStats.rebuild()
+    print(f"✅ Rebuilt player stats for {n} users")
+
+
+def rebuild_h2h():
+    n = HeadToHead.rebuild()
+    print(f"✅ Rebuilt head-to-head records for {n} player pairs")
+
+
+def rebuild_elo():
+    n = elo.replay()
+    print(f"✅ Replayed Elo over {n} confirmed matches")
+
+
+def rebuild_leaderboard():
+    n = leaderboard.rebuild()
+    print(f"✅ Rebuilt leaderboard snapshot with {n} players")
+
+
+COMMANDS = {
+    'participants': rebuild_participants,
+    'stats': rebuild_stats,
+    'h2h': rebuild_h2h,
+    'elo': rebuild_elo,
+    'leaderboard': rebuild_leaderboard,
+}
+
+
+if __name__ == "__main__":
+    import sys
+    cmds = sys.argv[1:] or list(COMMANDS)
+    with app.app_context():
+        for cmd in cmds:
+            if cmd not in COMMANDS:
+                print(f"❌ Unknown command: {cmd} (choose from {', '.join(COMMANDS)})")
+                sys.exit(1)
+            COMMANDS[cmd]()
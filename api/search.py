@@ -0,0 +1,95 @@
+"""
+Trigram full-text indexes (SQLite FTS5) for substring search.
+
+Each index is an external-content FTS5 table over a base table, kept current
+by AFTER INSERT/UPDATE/DELETE triggers, so every write path (ORM, Core,
+migrations) updates it in the same transaction. The trigram tokenizer makes a
+quoted phrase behave like a case-insensitive `%term%` match, but served from
+the index instead of scanning the base table. Terms shorter than three
+characters have no trigrams, so callers fall back to LIKE for those.
+"""
+from sqlalchemy import event
+
+from models import db, User, Court, LookingToPlay
+
+MIN_TERM = 3
+
+# fts table -> (model, indexed columns)
+INDEXES = {
+    'user_fts': (User, ('name', 'email', 'preferred_courts')),
+    'court_fts': (Court, ('name', 'address')),
+    'post_fts': (LookingToPlay, ('court',)),
+}
+
+
+def statements(fts):
+    model, cols = INDEXES[fts]
+    table = model.__tablename__
+    col_list = ', '.join(cols)
+    new_vals = ', '.join(f'new.{c}' for c in cols)
+    old_vals = ', '.join(f'old.{c}' for c in cols)
+    delete_old = f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_vals});"
+    insert_new = f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_vals});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({col_list}, content='{table}', "
+        f"content_rowid='id', tokenize='trigram')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON "{table}" BEGIN {insert_new} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON "{table}" BEGIN {delete_old} END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {col_list} ON "{table}" '
+        f'BEGIN {delete_old} {insert_new} END',
+        # Re-read the base table: covers existing rows and any stale index left by a dropped table
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def install(connection, names=None):
+    """Create the FTS tables and triggers that are missing and rebuild their contents."""
+    for fts in names or INDEXES:
+        for stmt in statements(fts):
+            connection.exec_driver_sql(stmt)
+
+
+def _install_on_create(fts):
+    def listener(target, connection, **kw):
+        install(connection, [fts])
+    return listener
+
+
+for _fts, (_model, _) in INDEXES.items():
+    event.listen(_model.__table__, 'after_create', _install_on_create(_fts))
+
+
+def phrase(text, columns):
+    """FTS5 query matching `text` as a substring of any of `columns`, or None if too short."""
+    text = (text or '').strip()
+    if len(text) < MIN_TERM:
+        return None
+    return '{%s} : "%s"' % (' '.join(columns), text.replace('"', '""'))
+
+
+def matching_ids(fts, text, columns):
+    """Subquery of matching rowids for use in `Model.id.in_(...)`, or None if `text` is too short."""
+    query = phrase(text, columns)
+    if query is None:
+        return None
+    return db.select(db.literal_column('rowid')).select_from(db.text(fts)) \
+        .where(db.literal_column(fts).op('MATCH')(query))
+
+
+def ranked(model, fts, text, columns):
+    """`model.query` over the matches, best (bm25) first, or None if `text` is too short."""
+    query = phrase(text, columns)
+    if query is None:
+        return None
+    hits = db.select(db.literal_column('rowid').label('id'), db.literal_column('rank').label('rank')) \
+        .select_from(db.text(fts)).where(db.literal_column(fts).op('MATCH')(query)).subquery()
+    return model.query.join(hits, hits.c.id == model.id).order_by(hits.c.rank, model.id)
+
+
+def filter_substring(q, model, fts, text, columns):
+    """Restrict `q` to rows whose `columns` contain `text`: FTS when possible, LIKE for 1-2 characters."""
+    ids = matching_ids(fts, text, columns)
+    if ids is not None:
+        return q.filter(model.id.in_(ids))
+    text = text.strip()
+    return q.filter(db.or_(*[getattr(model, c).ilike(f'%{text}%') for c in columns]))
@@ -1,6 +1,6 @@
 """Seed the database with test users, matches, availability, and posts."""
 from app import app, db
-from models import User, Availability, LookingToPlay, Match, MatchInvite, Notification, Court, ReviewTag, PlayerReview
+from models import User, PlayerStats, Availability, LookingToPlay, Match, MatchInvite, Notification, Court, ReviewTag, PlayerReview
 from werkzeug.security import generate_password_hash
 from datetime import date, datetime, timedelta
 import json, random
@@ -186,6 +186,7 @@ def seed():
             db.session.add(Court(**c))
 
         db.session.commit()
+        PlayerStats.rebuild()
         print(f"✅ Seeded: {len(users)} users, {len(MATCHES)} completed matches, 1 scheduled match, 4 posts, 1 invite, 3 notifications, {len(PITTSBURGH_COURTS)} courts")
         print(f"\nTest accounts (all password: tennis123):")
         for u in users:
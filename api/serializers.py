@@ -0,0 +1,38 @@
+"""
+Batched list serialization.
+
+Model `to_dict()` methods resolve related users one row at a time. These
+helpers collect every user id referenced by a list of rows, load those users
+with a single IN query, and pass the map to `to_dict(users=...)` so the JSON
+shape stays defined in one place.
+"""
+from models import db, User
+
+IN_CHUNK = 500
+
+
+def load_users(ids):
+    """{user_id: User} for the given ids, loading only the columns list views need."""
+    ids = list({i for i in ids if i is not None})
+    users = {}
+    for chunk in (ids[i:i + IN_CHUNK] for i in range(0, len(ids), IN_CHUNK)):
+        rows = User.query.options(db.load_only(User.id, User.name, User.ntrp)).filter(User.id.in_(chunk)).all()
+        users.update({u.id: u for u in rows})
+    return users
+
+
+def serialize_posts(posts):
+    users = load_users(p.user_id for p in posts)
+    return [p.to_dict(users=users) for p in posts]
+
+
+def serialize_matches(matches, users=None):
+    if users is None:
+        users = load_users(uid for m in matches for uid in (m.player1_id, m.player2_id, m.winner_id))
+    return [m.to_dict(users=users) for m in matches]
+
+
+def serialize_invites(invites, users=None):
+    if users is None:
+        users = load_users(uid for i in invites for uid in (i.from_user_id, i.to_user_id))
+    return [i.to_dict(users=users) for i in invites]
@@ -0,0 +1,167 @@
+"""
+In-memory interval index over availability slots, for "who's free then?".
+
+Each weekday keeps its slots as a list of (start, end, slot_id, user_id)
+sorted by start minute, plus the longest slot on that day. Slots overlapping
+a window [start, end) must begin before `end` and no earlier than
+`start - longest`, so a lookup is two bisects and a scan over just that
+range. Per-player overlap is the union of their slots clipped to the window.
+
+Like the autocomplete index, it is loaded at startup, updated in place by the
+availability endpoints, and reloaded by a background loop (`refresh()` every
+`REFRESH_EVERY` seconds) once it is `REBUILD_AFTER` seconds old, so slots
+written by other worker processes show up. Lookups never load: they read
+whatever index was last swapped in.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+
+from models import db, Availability
+from weekmask import DAYS, minutes
+
+REBUILD_AFTER = 300
+REFRESH_EVERY = 30  # seconds between background checks for an old index
+
+
+def _parse(day, start, end):
+    """(day, start minute, end minute), or None for a slot that can't match anything."""
+    try:
+        start, end = minutes(start), minutes(end)
+    except (AttributeError, ValueError):
+        return None
+    if not 0 <= day < DAYS or end <= start:
+        return None
+    return day, start, end
+
+
+class IntervalIndex:
+    def __init__(self, loader):
+        self._loader = loader          # () -> iterable of (slot_id, user_id, day, start, end)
+        self._days = [[] for _ in range(DAYS)]   # sorted [(start, end, slot_id, user_id)]
+        self._longest = [0] * DAYS
+        self._slots = {}               # slot_id -> (day, entry), for removal
+        self._lock = threading.Lock()
+        self._pending = None           # in-place edits made while a rebuild is loading, replayed after the swap
+        self.built_at = None
+
+    def is_stale(self):
+        return self.built_at is None or time.monotonic() - self.built_at >= REBUILD_AFTER
+
+    def rebuild(self):
+        """Load a fresh index and swap it in; lookups keep reading the old one meanwhile."""
+        with self._lock:
+            self._pending = []
+        try:
+            days, longest, slots = [[] for _ in range(DAYS)], [0] * DAYS, {}
+            for slot_id, user_id, day, start, end in self._loader():
+                parsed = _parse(day, start, end)
+                if parsed is None:
+                    continue
+                day, start, end = parsed
+                entry = (start, end, slot_id, user_id)
+                days[day].append(entry)
+                longest[day] = max(longest[day], end - start)
+                slots[slot_id] = (day, entry)
+            for entries in days:
+                entries.sort()
+            with self._lock:
+                self._days, self._longest, self._slots = days, longest, slots
+                for edit, args in self._pending:  # the load may have read the database before these writes
+                    edit(*args)
+                self.built_at = time.monotonic()
+        finally:
+            self._pending = None
+
+    def add(self, slot_id, user_id, day, start, end):
+        if self.built_at is None and self._pending is None:
+            return  # picked up by the first full load
+        parsed = _parse(day, start, end)
+        if parsed is None:
+            return
+        with self._lock:
+            self._add(slot_id, user_id, *parsed)
+            if self._pending is not None:
+                self._pending.append((self._add, (slot_id, user_id, *parsed)))
+
+    def remove(self, slot_id):
+        with self._lock:
+            self._remove(slot_id)
+            if self._pending is not None:
+                self._pending.append((self._remove, (slot_id,)))
+
+    def _add(self, slot_id, user_id, day, start, end):
+        entry = (start, end, slot_id, user_id)
+        self._remove(slot_id)
+        insort(self._days[day], entry)
+        self._longest[day] = max(self._longest[day], end - start)
+        self._slots[slot_id] = (day, entry)
+
+    def _remove(self, slot_id):
+        # `longest` only ever shrinks on a full reload; a stale larger value just widens the scan
+        day, entry = self._slots.pop(slot_id, (None, None))
+        if entry is None:
+            return
+        entries = self._days[day]
+        i = bisect_left(entries, entry)
+        if i < len(entries) and entries[i] == entry:
+            del entries[i]
+
+    def overlapping(self, day, start, end):
+        """{user_id: minutes of [start, end) covered by their slots} for one weekday ("HH:MM" bounds)."""
+        parsed = _parse(day, start, end)
+        if parsed is None:
+            return {}
+        day, start, end = parsed
+        clipped = {}
+        with self._lock:
+            entries = self._days[day]
+            lo = bisect_left(entries, (start - self._longest[day],))
+            hi = bisect_left(entries, (end,))
+            for slot_start, slot_end, _, user_id in entries[lo:hi]:
+                if slot_end > start:
+                    clipped.setdefault(user_id, []).append((max(slot_start, start), min(slot_end, end)))
+        return {user_id: _union_length(spans) for user_id, spans in clipped.items()}
+
+
+def _union_length(spans):
+    """Total length of possibly overlapping (start, end) spans, already in start order."""
+    total, reach = 0, None
+    for start, end in spans:
+        if reach is None or start >= reach:
+            total += end - start
+            reach = end
+        elif end > reach:
+            total += end - reach
+            reach = end
+    return total
+
+
+def _load_slots():
+    return db.session.query(Availability.id, Availability.user_id, Availability.day_of_week,
+                            Availability.start_time, Availability.end_time)
+
+
+index = IntervalIndex(_load_slots)
+
+
+def sync_slot(slot):
+    """Reflect an added availability slot in the index."""
+    index.add(slot.id, slot.user_id, slot.day_of_week, slot.start_time, slot.end_time)
+
+
+def drop_slot(slot_id):
+    index.remove(slot_id)
+
+
+def warm():
+    """Load the index now (at startup, before the first lookup)."""
+    index.rebuild()
+
+
+def refresh():
+    """Reload the index once it is older than REBUILD_AFTER; returns whether it was reloaded."""
+    if index.is_stale():
+        index.rebuild()
+        return True
+    return False
@@ -0,0 +1,74 @@
+"""Move dead posts out of the hot looking_to_play table into post_archive.
+
+A post is archived once it ended more than `expired_grace` ago, or once it
+was claimed and created more than `claimed_retention` ago. Either way the
+feed no longer shows it. Posts with pending requests stay put until those are
+answered; invites keep their post_id and resolve it via LookingToPlay.find. Rows move in id-ordered batches, one commit per
+batch, so a large backlog never holds a long write lock.
+
+Usage: python sweeper.py [--every SECONDS] [--expired-hours H] [--claimed-days D] [--batch N]
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from models import db, LookingToPlay, PostArchive, MatchInvite
+
+EXPIRED_GRACE = timedelta(hours=24)
+CLAIMED_RETENTION = timedelta(days=7)
+BATCH_SIZE = 500
+
+
+def _move(condition, reason, now, batch_size):
+    posts, archive, invites = LookingToPlay.__table__, PostArchive.__table__, MatchInvite.__table__
+    cols = PostArchive.COPIED_COLUMNS
+    condition = db.and_(condition, ~db.exists().where(invites.c.post_id == posts.c.id,
+                                                     invites.c.status == 'pending'))
+    moved = 0
+    while True:
+        ids = [i for (i,) in db.session.execute(
+            db.select(posts.c.id).where(condition).order_by(posts.c.id).limit(batch_size))]
+        if not ids:
+            return moved
+        select = db.select(*[posts.c[c] for c in cols], db.literal(now), db.literal(reason)) \
+            .where(posts.c.id.in_(ids))
+        # OR IGNORE: a batch re-run after a crash between insert and delete doesn't trip on its own rows
+        db.session.execute(archive.insert().prefix_with('OR IGNORE')
+                           .from_select([*cols, 'archived_at', 'reason'], select))
+        db.session.execute(posts.delete().where(posts.c.id.in_(ids)))
+        db.session.commit()
+        moved += len(ids)
+        if len(ids) < batch_size:
+            return moved
+
+
+def sweep(now=None, expired_grace=EXPIRED_GRACE, claimed_retention=CLAIMED_RETENTION, batch_size=BATCH_SIZE):
+    """Archive dead posts. Returns {'expired': n, 'claimed': n}."""
+    now = now or datetime.now()
+    posts = LookingToPlay.__table__
+    # ends_at is local wall-clock time (like play_date); created_at is stored in UTC
+    created_cutoff = now - (datetime.now() - datetime.utcnow()) - claimed_retention
+    return {
+        'expired': _move(posts.c.ends_at < now - expired_grace, 'expired', now, batch_size),
+        'claimed': _move(db.and_(posts.c.claimed_by_id.isnot(None), posts.c.created_at < created_cutoff),
+                         'claimed', now, batch_size),
+    }
+
+
+if __name__ == "__main__":
+    from app import app
+
+    parser = argparse.ArgumentParser(description='Archive expired and long-claimed posts.')
+    parser.add_argument('--every', type=float, help='keep running, sweeping every SECONDS')
+    parser.add_argument('--expired-hours', type=float, default=EXPIRED_GRACE.total_seconds() / 3600)
+    parser.add_argument('--claimed-days', type=float, default=CLAIMED_RETENTION.days)
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+    with app.app_context():
+        while True:
+            counts = sweep(expired_grace=timedelta(hours=args.expired_hours),
+                           claimed_retention=timedelta(days=args.claimed_days), batch_size=args.batch)
+            print(f"✅ Archived {counts['expired']} expired and {counts['claimed']} claimed posts")
+            if not args.every:
+                break
+            time.sleep(args.every)
@@ -2,10 +2,15 @@ import pytest
 import sys
 import os
 
+from sqlalchemy import event
+
 # Ensure api/ is on the path so `from models import ...` works inside app.py
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from app import app as flask_app
+from app import app as flask_app, feed_cache
+import autocomplete
+import matchmaking
+import slot_index
 from models import db as _db
 
 
@@ -15,8 +20,13 @@ def app():
         'TESTING': True,
         'SQLALCHEMY_DATABASE_URI': 'sqlite://',  # in-memory
     })
+    feed_cache.invalidate()  # each test starts from an empty database
+    matchmaking.cache.invalidate()
     with flask_app.app_context():
         _db.create_all()
+        # requests never load the in-memory indexes, so build them empty like a fresh server
+        autocomplete.warm()
+        slot_index.warm()
         yield flask_app
         _db.session.remove()
         _db.drop_all()
@@ -58,3 +68,27 @@ def create_match_between(client, token_a, id_a, token_b, id_b):
     invite_id = resp.get_json()['invite']['id']
     resp = client.post(f'/api/invites/{invite_id}/accept', headers=auth_header(token_b))
     return resp.get_json()['match']['id']
+
+
+class CountQueries:
+    """Context manager recording the statements run on `engine` (only SELECTs if `selects_only`)."""
+
+    def __init__(self, engine, selects_only=False):
+        self.engine = engine
+        self.selects_only = selects_only
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.selects_only or (statement.lstrip().upper().startswith('SELECT') and not executemany):
+            self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._record)
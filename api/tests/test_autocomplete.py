@@ -0,0 +1,89 @@
+"""Tests for the in-memory typeahead index."""
+import time
+
+from tests.conftest import register_user, auth_header, CountQueries
+
+
+def _names(client, q, kind='player', **params):
+    resp = client.get('/api/autocomplete', query_string={'kind': kind, 'q': q, **params})
+    return [r['name'] for r in resp.get_json()['results']]
+
+
+def test_prefix_matches_any_word_whole_name_first(client):
+    for name in ('Sam Alvarez', 'Alice Young', 'Alvin Ng', 'Bob Smith'):
+        register_user(client, name, f'{name.split()[0].lower()}@test.com')
+    assert _names(client, 'al') == ['Alice Young', 'Alvin Ng', 'Sam Alvarez']
+    assert _names(client, 'SMI') == ['Bob Smith']
+    assert _names(client, 'al', limit=1) == ['Alice Young']
+    assert _names(client, '') == []
+
+
+def test_index_updates_incrementally(client):
+    from models import User, db
+    tok, uid = register_user(client, 'José Ortiz', 'jose@test.com')
+    assert _names(client, 'jose') == ['José Ortiz']  # accents folded
+    client.put('/api/profile', json={'name': 'Pepe Ortiz'}, headers=auth_header(tok))
+    assert _names(client, 'jos') == []
+    assert _names(client, 'pep') == ['Pepe Ortiz']
+    user = db.session.get(User, uid)
+    import autocomplete
+    user.is_banned = True
+    db.session.commit()
+    autocomplete.sync_player(user)
+    assert _names(client, 'pep') == []
+
+
+def test_courts_and_bad_kind(client):
+    from models import Court, db
+    db.session.add_all([Court(name='Frick Park', lat=40.4, lng=-79.9),
+                        Court(name='Schenley Park', lat=40.4, lng=-79.9)])
+    db.session.commit()
+    import autocomplete
+    autocomplete.courts.rebuild()  # written behind the index's back: the background reload picks them up
+    assert _names(client, 'park', kind='court') == ['Frick Park', 'Schenley Park']
+    assert client.get('/api/autocomplete?kind=nope&q=a').status_code == 400
+
+
+def test_requests_never_reload_and_refresh_swaps_in_old_indexes(client):
+    import autocomplete
+    from models import User, db
+    register_user(client, 'Ann Lee', 'ann@test.com')
+    db.session.add(User(name='Annette Park', email='annette@test.com', password_hash='x'))
+    db.session.commit()  # e.g. written by another worker process
+    autocomplete.players.built_at -= autocomplete.REBUILD_AFTER
+    with CountQueries(db.engine) as counter:
+        assert _names(client, 'ann') == ['Ann Lee']  # the last built index, as is
+    assert counter.count == 0
+    assert autocomplete.refresh() == 1  # only the old player index
+    assert _names(client, 'ann') == ['Ann Lee', 'Annette Park']
+    assert autocomplete.refresh() == 0
+
+
+def test_writes_during_a_rebuild_survive_the_swap():
+    from autocomplete import PrefixIndex
+    rows = [(1, 'Ann Lee', {'id': 1})]
+    index = PrefixIndex(lambda: iter(rows))
+    index.rebuild()
+
+    def loader():
+        yield from rows
+        index.upsert(2, 'Annette Park', {'id': 2})  # a request commits while the reload is reading
+        index.remove(1)
+
+    index._loader = loader
+    index.rebuild()
+    assert index.search('ann') == [{'id': 2}]
+
+
+def test_lookup_is_fast_on_a_large_index():
+    from autocomplete import PrefixIndex
+    names = [f'Player{i:06d} Surname{i % 997:03d}' for i in range(50_000)]
+    index = PrefixIndex(lambda: ((i, n, {'id': i}) for i, n in enumerate(names)))
+    index.rebuild()
+    timings = []
+    for prefix in ('player01', 'surname9', 'p', 's', 'player049999'):
+        start = time.perf_counter()
+        for _ in range(100):
+            index.search(prefix, limit=10)
+        timings.append((time.perf_counter() - start) / 100)
+    assert max(timings) < 0.005  # generous bound for shared CI; typically well under 1ms
@@ -0,0 +1,131 @@
+"""Tests for the availability interval index behind /api/players/available."""
+import random
+
+from tests.conftest import register_user, auth_header, CountQueries
+
+
+def _slot(client, tok, day, start, end):
+    resp = client.post('/api/availability', json={'day_of_week': day, 'start_time': start, 'end_time': end},
+                       headers=auth_header(tok))
+    return resp.get_json()['slot']['id']
+
+
+def _available(client, **params):
+    resp = client.get('/api/players/available', query_string=params)
+    assert resp.status_code == 200
+    return [(p['name'], p['overlap_minutes']) for p in resp.get_json()['players']]
+
+
+def test_ranked_by_overlap_and_filtered_by_ntrp(client):
+    tok_a, _ = register_user(client, 'Ana', 'ana@test.com', ntrp=3.5)
+    tok_b, _ = register_user(client, 'Ben', 'ben@test.com', ntrp=3.5)
+    tok_c, _ = register_user(client, 'Cal', 'cal@test.com', ntrp=4.5)
+    tok_d, _ = register_user(client, 'Dee', 'dee@test.com', ntrp=3.0)
+    _slot(client, tok_a, 1, '18:30', '19:00')
+    _slot(client, tok_a, 1, '18:45', '19:30')  # overlapping slots count once
+    _slot(client, tok_b, 1, '17:00', '21:00')  # longest slot, covers the whole window
+    _slot(client, tok_c, 1, '19:30', '22:00')
+    _slot(client, tok_d, 1, '20:00', '21:00')  # touches the window's end only
+    _slot(client, tok_d, 2, '18:00', '20:00')  # other day
+
+    assert _available(client, day=1, start='18:00', end='20:00') == [('Ben', 120), ('Ana', 60), ('Cal', 30)]
+    assert _available(client, day=1, start='18:00', end='20:00', ntrp_min=3.0, ntrp_max=4.0) == \
+        [('Ben', 120), ('Ana', 60)]
+    assert _available(client, day=1, start='18:00', end='20:00', limit=1) == [('Ben', 120)]
+    assert _available(client, day=2, start='18:00', end='20:00') == [('Dee', 120)]
+    assert _available(client, day=3, start='18:00', end='20:00') == []
+
+
+def test_query_count_is_fixed(client):
+    from models import db
+
+    def count_queries(**params):
+        with CountQueries(db.engine) as counter:
+            players = _available(client, day=4, start='08:00', end='20:00', **params)
+        return players, counter.count
+
+    tok, _ = register_user(client, 'Abe', 'abe@test.com')
+    _slot(client, tok, 4, '08:00', '20:00')
+    _, few = count_queries()
+    for i in range(30):  # thirty distinct overlap lengths
+        tok, _ = register_user(client, f'P{i:02d}', f'p{i}@test.com', ntrp=3.0)
+        _slot(client, tok, 4, f'{8 + i // 4:02d}:{i % 4 * 15:02d}', '20:00')
+    players, many = count_queries(limit=3)
+    assert players == [('Abe', 720), ('P00', 720), ('P01', 705)]
+    assert many == few
+    assert count_queries(ntrp_min=5.5) == ([], few)
+
+
+def test_index_follows_slot_changes(client):
+    tok, _ = register_user(client, 'Ana', 'ana@test.com')
+    assert _available(client, day=0, start='09:00', end='10:00') == []
+    slot_id = _slot(client, tok, 0, '08:00', '12:00')
+    assert _available(client, day=0, start='09:00', end='10:00') == [('Ana', 60)]
+    client.delete(f'/api/availability/{slot_id}', headers=auth_header(tok))
+    assert _available(client, day=0, start='09:00', end='10:00') == []
+
+
+def test_requests_never_reload_and_refresh_swaps_in_an_old_index(client):
+    import slot_index
+    from models import Availability, db
+    tok, uid = register_user(client, 'Ana', 'ana@test.com')
+    _slot(client, tok, 0, '08:00', '12:00')
+    db.session.add(Availability(user_id=uid, day_of_week=1, start_time='08:00', end_time='12:00'))
+    db.session.commit()  # e.g. written by another worker process
+    slot_index.index.built_at -= slot_index.REBUILD_AFTER
+    assert _available(client, day=1, start='09:00', end='10:00') == []  # the last built index, as is
+    assert slot_index.refresh() is True
+    assert _available(client, day=1, start='09:00', end='10:00') == [('Ana', 60)]
+    assert _available(client, day=0, start='09:00', end='10:00') == [('Ana', 60)]
+    assert slot_index.refresh() is False
+
+
+def test_writes_during_a_rebuild_survive_the_swap():
+    from slot_index import IntervalIndex
+    rows = [(1, 10, 0, '08:00', '12:00')]
+    index = IntervalIndex(lambda: iter(rows))
+    index.rebuild()
+
+    def loader():
+        yield from rows
+        index.add(2, 20, 0, '09:00', '10:00')  # a request commits while the reload is reading
+        index.remove(1)
+
+    index._loader = loader
+    index.rebuild()
+    assert index.overlapping(0, '08:00', '12:00') == {20: 60}
+
+
+def test_bad_window(client):
+    for params in ({'start': '18:00', 'end': '20:00'}, {'day': 7, 'start': '18:00', 'end': '20:00'},
+                   {'day': 1, 'start': '20:00', 'end': '18:00'}, {'day': 1, 'start': 'soon', 'end': '20:00'},
+                   {'day': 1}):
+        assert client.get('/api/players/available', query_string=params).status_code == 400
+
+
+def test_overlap_matches_brute_force():
+    from slot_index import IntervalIndex
+    rng = random.Random(7)
+    rows = []
+    for slot_id in range(2000):
+        start = rng.randrange(0, 23 * 60, 15)
+        end = min(start + rng.randrange(15, 300, 15), 24 * 60 - 1)
+        rows.append((slot_id, rng.randrange(300), rng.randrange(7),
+                     f'{start // 60:02d}:{start % 60:02d}', f'{end // 60:02d}:{end % 60:02d}'))
+    index = IntervalIndex(lambda: rows)
+    index.rebuild()
+
+    def minute(hhmm):
+        return int(hhmm[:2]) * 60 + int(hhmm[3:])
+
+    for _ in range(50):
+        day, start = rng.randrange(7), rng.randrange(0, 22 * 60)
+        end = start + rng.randrange(1, 120)
+        covered = {}
+        for _, user_id, slot_day, slot_start, slot_end in rows:
+            if slot_day == day:
+                covered.setdefault(user_id, set()).update(
+                    range(max(minute(slot_start), start), min(minute(slot_end), end)))
+        expected = {uid: len(mins) for uid, mins in covered.items() if mins}
+        window = (f'{start // 60:02d}:{start % 60:02d}', f'{end // 60:02d}:{end % 60:02d}')
+        assert index.overlapping(day, *window) == expected
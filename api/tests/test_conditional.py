@@ -0,0 +1,57 @@
+"""Tests for ETag / If-None-Match handling on read-heavy endpoints."""
+from tests.conftest import register_user, auth_header, create_match_between
+
+
+def _revalidate(client, url, etag, headers=None):
+    return client.get(url, headers={**(headers or {}), 'If-None-Match': etag})
+
+
+def test_posts_304_until_a_post_changes(client):
+    from datetime import date, timedelta
+    tok, _ = register_user(client, 'Alice', 'alice@test.com')
+    first = client.get('/api/posts')
+    assert first.status_code == 200 and first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+    etag = first.headers['ETag'].strip('"')
+    not_modified = _revalidate(client, '/api/posts', etag)
+    assert not_modified.status_code == 304 and not_modified.data == b''
+    # A different query is a different representation
+    assert _revalidate(client, '/api/posts?sort=closest_date', etag).status_code == 200
+    client.post('/api/posts', json={'play_date': (date.today() + timedelta(days=1)).isoformat(),
+                                    'start_time': '10:00', 'end_time': '12:00'}, headers=auth_header(tok))
+    changed = _revalidate(client, '/api/posts', etag)
+    assert changed.status_code == 200 and len(changed.get_json()['posts']) == 1
+
+
+def test_matches_etag_is_per_user(client):
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    tok_c, id_c = register_user(client, 'Cara', 'cara@test.com')
+    etag_a = client.get('/api/matches', headers=auth_header(tok_a)).headers['ETag'].strip('"')
+    etag_c = client.get('/api/matches', headers=auth_header(tok_c)).headers['ETag'].strip('"')
+    assert etag_a != etag_c
+    create_match_between(client, tok_a, id_a, tok_b, id_b)
+    assert _revalidate(client, '/api/matches', etag_a, auth_header(tok_a)).status_code == 200
+    # Cara isn't involved, so her list is still current
+    assert _revalidate(client, '/api/matches', etag_c, auth_header(tok_c)).status_code == 304
+    # Renaming a player changes every list that embeds names
+    client.put('/api/profile', json={'name': 'Bobby'}, headers=auth_header(tok_b))
+    assert _revalidate(client, '/api/matches', etag_c, auth_header(tok_c)).status_code == 200
+
+
+def test_static_lists_and_leaderboard(client):
+    import leaderboard as ranking
+    from models import db, Court
+    register_user(client, 'Alice', 'alice@test.com')
+    for url in ('/api/courts', '/api/review-tags', '/api/leaderboard'):
+        etag = client.get(url).headers['ETag'].strip('"')
+        assert _revalidate(client, url, etag).status_code == 304
+    etag = client.get('/api/courts').headers['ETag'].strip('"')
+    db.session.add(Court(name='Frick Park', lat=40.43, lng=-79.9))
+    db.session.commit()
+    assert _revalidate(client, '/api/courts', etag).status_code == 200
+    etag = client.get('/api/leaderboard').headers['ETag'].strip('"')
+    register_user(client, 'Bob', 'bob@test.com')
+    assert _revalidate(client, '/api/leaderboard', etag).status_code == 304  # served board not rebuilt yet
+    ranking.refresh()
+    assert _revalidate(client, '/api/leaderboard', etag).status_code == 200
@@ -0,0 +1,132 @@
+"""Tests for the Elo rating engine."""
+from tests.conftest import register_user, auth_header, create_match_between
+
+
+def _confirmed(client, tok_a, id_a, tok_b, id_b, winner_id, sets=None):
+    match_id = create_match_between(client, tok_a, id_a, tok_b, id_b)
+    body = {'sets': sets, 'match_format': 'best_of_3'} if sets else {'score': '6-4, 6-4', 'winner_id': winner_id}
+    client.post(f'/api/matches/{match_id}/score', json=body, headers=auth_header(tok_a))
+    resp = client.post(f'/api/matches/{match_id}/confirm', json={'action': 'confirm'}, headers=auth_header(tok_b))
+    return resp.get_json()['match']
+
+
+def _elo(client, tok):
+    return client.get('/api/auth/me', headers=auth_header(tok)).get_json()['user']['elo']
+
+
+def test_confirm_transfers_elo(client):
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    match = _confirmed(client, tok_a, id_a, tok_b, id_b, id_a)
+    gain = match['elo_change_p2'] if match['player2']['id'] == id_a else match['elo_change_p1']
+    assert gain > 0
+    assert match['elo_change_p1'] == -match['elo_change_p2']
+    assert _elo(client, tok_a) == 1200 + gain
+    assert _elo(client, tok_b) == 1200 - gain
+
+
+def test_blowout_moves_more_than_close_match():
+    import elo
+    close = elo.k_factor('best_of_3', elo.game_margin('[{"p1":7,"p2":6},{"p1":7,"p2":5}]'))
+    blowout = elo.k_factor('best_of_3', elo.game_margin('[{"p1":6,"p2":0},{"p1":6,"p2":0}]'))
+    assert blowout > close
+    assert elo.k_factor('best_of_5', 0) > elo.k_factor('pro_set', 0)
+    assert elo.game_margin(None, '6-4, 3-6, 6-2') == 3
+
+
+def test_dispute_does_not_change_elo(client):
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    match_id = create_match_between(client, tok_a, id_a, tok_b, id_b)
+    client.post(f'/api/matches/{match_id}/score', json={'score': '6-4, 6-4', 'winner_id': id_a},
+                headers=auth_header(tok_a))
+    client.post(f'/api/matches/{match_id}/confirm', json={'action': 'dispute'}, headers=auth_header(tok_b))
+    assert _elo(client, tok_a) == 1200
+
+
+def test_replay_matches_incremental(client):
+    import elo
+    from models import User, Match, db
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    tok_c, id_c = register_user(client, 'Carol', 'carol@test.com')
+    _confirmed(client, tok_a, id_a, tok_b, id_b, id_a)
+    _confirmed(client, tok_b, id_b, tok_c, id_c, id_c)
+    _confirmed(client, tok_c, id_c, tok_a, id_a, id_c)
+    before = {u.id: u.elo for u in User.query.all()}
+    changes = {m.id: (m.elo_change_p1, m.elo_change_p2) for m in Match.query.all()}
+    User.query.update({'elo': 1500})
+    db.session.commit()
+    assert elo.replay() == 3
+    db.session.expire_all()
+    assert {u.id: u.elo for u in User.query.all()} == before
+    assert {m.id: (m.elo_change_p1, m.elo_change_p2) for m in Match.query.all()} == changes
+
+
+def test_replay_keeps_admin_adjustments(client):
+    import elo
+    from datetime import date, timedelta
+    from flask_jwt_extended import create_access_token
+    from models import User, Match, RatingHistory, db
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    _, admin_id = register_user(client, 'Admin', 'admin@test.com')
+    db.session.get(User, admin_id).is_admin = True
+    match = _confirmed(client, tok_a, id_a, tok_b, id_b, id_a)
+    db.session.get(Match, match['id']).play_date = date.today() - timedelta(days=1)
+    db.session.commit()
+    headers = {'X-Admin-Token': create_access_token(identity=str(admin_id))}
+    client.put(f'/api/admin/users/{id_b}', json={'elo': 1300}, headers=headers)
+    adjustment = RatingHistory.query.filter_by(reason='admin').one()
+    kept = (adjustment.id, adjustment.recorded_at, adjustment.delta)
+    before = (_elo(client, tok_a), _elo(client, tok_b))
+    assert before[1] == 1300
+
+    elo.replay()
+    db.session.expire_all()
+    assert (_elo(client, tok_a), _elo(client, tok_b)) == before  # match yesterday, then today's adjustment
+    adjustment = RatingHistory.query.filter_by(reason='admin').one()
+    assert (adjustment.id, adjustment.recorded_at, adjustment.delta) == kept and adjustment.elo == 1300
+    assert {r.reason for r in RatingHistory.query.all()} == {'admin', 'replay'}
+
+
+def test_rating_history_written_and_downsampled(client):
+    import elo
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    for _ in range(4):
+        _confirmed(client, tok_a, id_a, tok_b, id_b, id_a)
+    data = client.get(f'/api/players/{id_a}/rating-history').get_json()
+    assert data['total'] == 4
+    elos = [p['elo'] for p in data['history']]
+    assert elos == sorted(elos) and elos[-1] == _elo(client, tok_a)
+    data = client.get(f'/api/players/{id_a}/rating-history?points=3').get_json()
+    assert len(data['history']) == 3
+
+    series = [(x, (x * 37) % 101) for x in range(1000)]
+    sampled = elo.downsample(series, 50)
+    assert len(sampled) == 50
+    assert sampled[0] == series[0] and sampled[-1] == series[-1]
+    assert [p[0] for p in sampled] == sorted(p[0] for p in sampled)
+
+
+def test_admin_edit_of_unrated_confirmed_match_keeps_elo(client):
+    from models import User, Match, db
+    from flask_jwt_extended import create_access_token
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    _, admin_id = register_user(client, 'Admin', 'admin@test.com')
+    db.session.get(User, admin_id).is_admin = True
+    match_id = create_match_between(client, tok_a, id_a, tok_b, id_b)
+    match = db.session.get(Match, match_id)
+    # Seeded / pre-migration state: confirmed, but no Elo change recorded
+    match.score, match.winner_id, match.score_confirmed = '6-4, 6-4', id_a, True
+    db.session.commit()
+    headers = {'X-Admin-Token': create_access_token(identity=str(admin_id))}
+    resp = client.put(f'/api/admin/matches/{match_id}', json={'score_disputed': False}, headers=headers)
+    assert resp.status_code == 200
+    assert (_elo(client, tok_a), _elo(client, tok_b)) == (1200, 1200)
+
+    client.put(f'/api/admin/matches/{match_id}', json={'score_confirmed': False}, headers=headers)
+    client.put(f'/api/admin/matches/{match_id}', json={'score_confirmed': True}, headers=headers)
+    assert _elo(client, tok_a) > 1200 > _elo(client, tok_b)
@@ -0,0 +1,227 @@
+"""Tests for the post feed (/api/posts)."""
+import base64
+import json
+
+from tests.conftest import register_user, auth_header
+from datetime import date, datetime, timedelta
+
+
+def _post(client, tok, days_ahead=1, start='10:00', end='12:00', **extra):
+    resp = client.post('/api/posts', json={
+        'play_date': (date.today() + timedelta(days=days_ahead)).isoformat(),
+        'start_time': start, 'end_time': end, **extra,
+    }, headers=auth_header(tok))
+    return resp.get_json()['post']['id']
+
+
+def test_ends_at_populated_on_create_and_update(client):
+    from models import LookingToPlay, db
+    tok, _ = register_user(client, 'Alice', 'alice@test.com')
+    post_id = _post(client, tok, days_ahead=2, end='12:30')
+    post = db.session.get(LookingToPlay, post_id)
+    assert post.ends_at == datetime.combine(date.today() + timedelta(days=2), datetime.strptime('12:30', '%H:%M').time())
+    client.put(f'/api/posts/{post_id}', json={'end_time': '14:00'}, headers=auth_header(tok))
+    db.session.expire_all()
+    assert db.session.get(LookingToPlay, post_id).ends_at.hour == 14
+
+
+def test_expired_post_filtered_in_sql(client):
+    from models import LookingToPlay, db
+    tok, _ = register_user(client, 'Alice', 'alice@test.com')
+    live = _post(client, tok)
+    expired = _post(client, tok, days_ahead=0, start='00:00', end='00:01')
+    # Force the second post into the past regardless of the current time of day
+    db.session.get(LookingToPlay, expired).end_time = '00:00'
+    db.session.get(LookingToPlay, expired).play_date = date.today() - timedelta(days=1)
+    db.session.commit()
+    ids = [p['id'] for p in client.get('/api/posts').get_json()['posts']]
+    assert ids == [live]
+
+
+def _walk(client, url, headers=None):
+    ids, cursor = [], None
+    while True:
+        page = client.get(url + (f'&after={cursor}' if cursor else ''), headers=headers).get_json()
+        ids.extend(p['id'] for p in page['posts'])
+        cursor = page['next_cursor']
+        if not cursor:
+            return ids
+
+
+def test_keyset_pages_cover_feed_in_order(client):
+    tok, _ = register_user(client, 'Alice', 'alice@test.com', ntrp=3.5)
+    specs = [(3, None, None), (1, 3.0, 4.0), (2, 4.5, 5.0), (1, 2.0, 2.5), (3, 3.5, 3.5)]
+    ids = [_post(client, tok, days_ahead=d, level_min=lo, level_max=hi) for d, lo, hi in specs]
+    for sort in ('newest', 'closest_date', 'skill_match'):
+        full = client.get(f'/api/posts?sort={sort}&limit=100', headers=auth_header(tok)).get_json()
+        assert full['next_cursor'] is None
+        paged = _walk(client, f'/api/posts?sort={sort}&limit=2', headers=auth_header(tok))
+        assert paged == [p['id'] for p in full['posts']]
+        assert sorted(paged) == sorted(ids)
+    assert _walk(client, '/api/posts?sort=newest&limit=2')[:2] == [ids[4], ids[3]]
+
+
+def test_cursor_from_other_sort_rejected(client):
+    tok, _ = register_user(client, 'Alice', 'alice@test.com')
+    for _ in range(3):
+        _post(client, tok)
+    cursor = client.get('/api/posts?sort=newest&limit=1').get_json()['next_cursor']
+    assert client.get(f'/api/posts?sort=closest_date&after={cursor}').status_code == 400
+    assert client.get('/api/posts?after=garbage').status_code == 400
+
+
+def test_tampered_cursor_rejected(client):
+    from app import encode_cursor
+    tok, _ = register_user(client, 'Alice', 'alice@test.com')
+    _post(client, tok)
+    forged = [base64.urlsafe_b64encode(json.dumps(raw).encode()).decode()
+              for raw in ({}, {'0': 'newest'}, 'newest', 7, None, [], ['newest'])]
+    forged += [encode_cursor('newest', [{}, 1]), encode_cursor('newest', ['2026-01-01T00:00:00', None]),
+               encode_cursor('newest', ['2026-01-01T00:00:00', 1, 2])]
+    for cursor in forged:
+        assert client.get(f'/api/posts?sort=newest&after={cursor}').status_code == 400, cursor
+
+
+def test_court_tokens_normalized_on_write(client):
+    from models import User, db
+    tok, uid = register_user(client, 'Alice', 'alice@test.com')
+    client.put('/api/onboarding', json={'preferred_courts': [' Frick Park ', 'SCHENLEY', 'frick park']},
+               headers=auth_header(tok))
+    assert db.session.get(User, uid).court_list == ['frick park', 'schenley']
+
+
+def test_for_you_ranks_in_sql_and_pages(client):
+    from models import User, db
+    tok, uid = register_user(client, 'Alice', 'alice@test.com', ntrp=3.5)
+    other, _ = register_user(client, 'Bob', 'bob@test.com')
+    user = db.session.get(User, uid)
+    user.preferred_courts = '["Frick Park"]'
+    db.session.commit()
+    far = _post(client, other, days_ahead=1, level_min=5.0, level_max=5.5, court='Elsewhere')
+    open_court = _post(client, other, days_ahead=2, court='Frick Park Court 3')
+    in_range = _post(client, other, days_ahead=3, level_min=3.0, level_max=4.0, court='Elsewhere')
+    best = _post(client, other, days_ahead=4, level_min=3.5, level_max=3.5, court='frick park')
+    full = client.get('/api/posts?for_you=1&limit=100', headers=auth_header(tok)).get_json()
+    # 15 (in range + court), 10 (open level + court), 10 (in range), 6.25 (far level)
+    assert [p['id'] for p in full['posts']] == [best, open_court, in_range, far]
+    assert _walk(client, '/api/posts?for_you=1&limit=1', headers=auth_header(tok)) == [best, open_court, in_range, far]
+    # Anonymous callers get the plain newest feed
+    assert [p['id'] for p in client.get('/api/posts?for_you=1').get_json()['posts']] == [best, in_range, open_court, far]
+
+
+def test_feed_cache_hits_and_invalidates_on_writes(client):
+    from app import feed_cache
+    tok, _ = register_user(client, 'Alice', 'alice@test.com')
+    first = _post(client, tok)
+    hits, misses = feed_cache.hits, feed_cache.misses
+    assert [p['id'] for p in client.get('/api/posts').get_json()['posts']] == [first]
+    assert [p['id'] for p in client.get('/api/posts').get_json()['posts']] == [first]
+    assert (feed_cache.hits - hits, feed_cache.misses - misses) == (1, 1)
+    second = _post(client, tok, days_ahead=2)
+    assert [p['id'] for p in client.get('/api/posts').get_json()['posts']] == [second, first]
+    client.delete(f'/api/posts/{second}', headers=auth_header(tok))
+    assert [p['id'] for p in client.get('/api/posts').get_json()['posts']] == [first]
+    assert feed_cache.misses - misses == 3
+
+
+def test_feed_cache_claim_and_personalized_keys(client):
+    from tests.conftest import create_match_between
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com', ntrp=3.0)
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com', ntrp=5.0)
+    low = _post(client, tok_a, level_min=3.0, level_max=3.0)
+    high = _post(client, tok_a, level_min=5.0, level_max=5.0)
+    url = '/api/posts?sort=skill_match'
+    assert client.get(url, headers=auth_header(tok_a)).get_json()['posts'][0]['id'] == low
+    # Same query, different viewer: not served from Alice's entry
+    assert client.get(url, headers=auth_header(tok_b)).get_json()['posts'][0]['id'] == high
+    invite_id = client.post(f'/api/posts/{high}/claim', headers=auth_header(tok_b)).get_json()['invite']['id']
+    client.post(f'/api/invites/{invite_id}/accept', headers=auth_header(tok_a))
+    assert [p['id'] for p in client.get(url, headers=auth_header(tok_b)).get_json()['posts']] == [low]
+
+
+def test_response_cache_lru_and_ttl():
+    from feed_cache import ResponseCache
+    cache = ResponseCache(max_entries=2, ttl=30)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)  # evicts 'b', the least recently used
+    assert cache.get('b') is None and cache.get('c') == 3
+    cache.put('d', 4, ttl=0)  # already expired: not stored
+    assert cache.get('d') is None
+    assert cache.stats()['size'] == 2
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_sweeper_archives_dead_posts_in_batches(client):
+    from models import LookingToPlay, PostArchive, db
+    from sweeper import sweep
+    tok, uid = register_user(client, 'Alice', 'alice@test.com')
+    live = _post(client, tok, days_ahead=1)
+    dead = [_post(client, tok, days_ahead=1) for _ in range(3)]
+    claimed = _post(client, tok, days_ahead=1)
+    for post_id in dead:
+        db.session.get(LookingToPlay, post_id).play_date = date.today() - timedelta(days=3)
+    old = db.session.get(LookingToPlay, claimed)
+    old.claimed_by_id = uid
+    old.created_at = datetime.utcnow() - timedelta(days=10)
+    db.session.commit()
+
+    assert sweep(batch_size=2) == {'expired': 3, 'claimed': 1}
+    assert [p.id for p in LookingToPlay.query.all()] == [live]
+    archived = {a.id: a for a in PostArchive.query.all()}
+    assert set(archived) == set(dead) | {claimed}
+    assert archived[claimed].reason == 'claimed' and archived[dead[0]].reason == 'expired'
+    assert archived[dead[0]].ends_at.date() == date.today() - timedelta(days=3)
+    assert sweep() == {'expired': 0, 'claimed': 0}
+
+
+def test_sweeper_respects_expired_grace(client):
+    from models import LookingToPlay, db
+    from sweeper import sweep
+    tok, _ = register_user(client, 'Alice', 'alice@test.com')
+    post_id = _post(client, tok)
+    db.session.get(LookingToPlay, post_id).play_date = date.today() - timedelta(days=1)
+    db.session.commit()
+    assert sweep(expired_grace=timedelta(days=3))['expired'] == 0
+    assert sweep(expired_grace=timedelta(0))['expired'] == 1
+
+
+def test_sweeper_keeps_posts_with_pending_requests(client):
+    from models import LookingToPlay, MatchInvite, PostArchive, db
+    from sweeper import sweep
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    post_id = _post(client, tok_a)
+    invite_id = client.post(f'/api/posts/{post_id}/claim', headers=auth_header(tok_b)).get_json()['invite']['id']
+    db.session.get(LookingToPlay, post_id).play_date = date.today() - timedelta(days=3)
+    db.session.commit()
+    assert sweep()['expired'] == 0
+
+    # A request left pending on an already-archived post (pre-dating the check) still claims the archived row
+    db.session.get(MatchInvite, invite_id).status = 'declined'
+    db.session.commit()
+    assert sweep()['expired'] == 1
+    db.session.get(MatchInvite, invite_id).status = 'pending'
+    db.session.commit()
+    assert client.post(f'/api/invites/{invite_id}/accept', headers=auth_header(tok_a)).status_code == 200
+    db.session.expire_all()
+    assert db.session.get(PostArchive, post_id).claimed_by_id == id_b
+    assert db.session.get(MatchInvite, invite_id).post.id == post_id
+
+
+def test_swept_post_ids_are_not_reused(client):
+    from models import LookingToPlay, PostArchive, db
+    from sweeper import sweep
+    tok, _ = register_user(client, 'Alice', 'alice@test.com')
+    first = _post(client, tok)
+    db.session.get(LookingToPlay, first).play_date = date.today() - timedelta(days=3)
+    db.session.commit()
+    assert sweep()['expired'] == 1
+    second = _post(client, tok)
+    assert second > first
+    assert isinstance(LookingToPlay.find(first), PostArchive)
+    db.session.get(LookingToPlay, second).play_date = date.today() - timedelta(days=3)
+    db.session.commit()
+    assert sweep()['expired'] == 1
+    assert {a.id for a in PostArchive.query.all()} == {first, second}
@@ -0,0 +1,71 @@
+"""Tests for the leaderboard snapshot, pagination and rank lookup."""
+from tests.conftest import register_user, auth_header, create_match_between
+
+
+def _set_elos(elos):
+    import leaderboard
+    from models import User, SnapshotMeta, db
+    for uid, value in elos.items():
+        db.session.get(User, uid).elo = value
+    SnapshotMeta.mark_stale('leaderboard')
+    db.session.commit()
+    leaderboard.refresh()
+
+
+def test_leaderboard_paginates_with_cursor(client):
+    ids = [register_user(client, f'P{i}', f'p{i}@test.com')[1] for i in range(5)]
+    _set_elos({uid: 1000 + i * 10 for i, uid in enumerate(ids)})
+    first = client.get('/api/leaderboard?limit=2').get_json()
+    assert [p['id'] for p in first['leaderboard']] == [ids[4], ids[3]]
+    assert [p['rank'] for p in first['leaderboard']] == [1, 2]
+    second = client.get(f"/api/leaderboard?limit=2&cursor={first['next_cursor']}").get_json()
+    assert [p['id'] for p in second['leaderboard']] == [ids[2], ids[1]]
+    last = client.get(f"/api/leaderboard?limit=2&cursor={second['next_cursor']}").get_json()
+    assert [p['id'] for p in last['leaderboard']] == [ids[0]]
+    assert last['next_cursor'] is None
+
+
+def test_leaderboard_refreshes_after_confirm(client):
+    import leaderboard
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    assert client.get('/api/leaderboard').get_json()['leaderboard'][0]['id'] == id_a
+    match_id = create_match_between(client, tok_a, id_a, tok_b, id_b)
+    client.post(f'/api/matches/{match_id}/score', json={'score': '6-1, 6-1', 'winner_id': id_b},
+                headers=auth_header(tok_a))
+    client.post(f'/api/matches/{match_id}/confirm', json={'action': 'confirm'}, headers=auth_header(tok_b))
+    # Reads keep serving the built snapshot; the background refresh picks up the change
+    assert client.get('/api/leaderboard').get_json()['leaderboard'][0]['id'] == id_a
+    assert leaderboard.refresh() == 2
+    top = client.get('/api/leaderboard').get_json()['leaderboard'][0]
+    assert top['id'] == id_b and top['wins'] == 1 and top['elo'] > 1200
+    assert leaderboard.refresh() is None
+
+
+def test_only_ranking_changes_mark_board_stale(client):
+    import leaderboard
+    from models import SnapshotMeta
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    match_id = create_match_between(client, tok_a, id_a, tok_b, id_b)
+    leaderboard.refresh()
+    client.post(f'/api/matches/{match_id}/score', json={'score': '6-1, 6-1', 'winner_id': id_b},
+                headers=auth_header(tok_a))
+    client.put('/api/profile', json={'city': 'Pittsburgh', 'name': 'Alicia'}, headers=auth_header(tok_a))
+    assert not SnapshotMeta.is_stale('leaderboard')
+    client.put('/api/profile', json={'city': 'Boston'}, headers=auth_header(tok_a))
+    assert SnapshotMeta.is_stale('leaderboard')
+
+
+def test_my_rank_and_city_board(client):
+    tok, me = register_user(client, 'Me', 'me@test.com')
+    ids = [register_user(client, f'P{i}', f'p{i}@test.com')[1] for i in range(4)]
+    client.put('/api/profile', json={'city': 'Boston'}, headers=auth_header(tok))
+    _set_elos({me: 1150, ids[0]: 1300, ids[1]: 1250, ids[2]: 1100, ids[3]: 1000})
+    data = client.get('/api/leaderboard/me?window=1', headers=auth_header(tok)).get_json()
+    assert data['rank'] == 3 and data['total'] == 5
+    assert [p['id'] for p in data['neighbours']] == [ids[1], me, ids[2]]
+    boston = client.get('/api/leaderboard?city=Boston').get_json()['leaderboard']
+    assert [(p['id'], p['rank']) for p in boston] == [(me, 1)]
+    resp = client.get('/api/leaderboard/me?city=Pittsburgh', headers=auth_header(tok))
+    assert resp.status_code == 404
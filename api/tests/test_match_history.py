@@ -0,0 +1,68 @@
+"""Tests for paginated match history and the bounded player profile."""
+from datetime import date, timedelta
+
+from tests.conftest import register_user, auth_header
+
+
+def _matches(uid, opponents, days=30):
+    """Insert one completed match per opponent, newest first, without going through the API."""
+    from models import Match, db
+    today = date.today()
+    ids = []
+    for i, opp in enumerate(opponents):
+        m = Match(player1_id=uid, player2_id=opp, play_date=today - timedelta(days=i % days),
+                  status='completed',
+                  winner_id=uid, score='6-4, 6-4', score_confirmed=True)
+        db.session.add(m)
+        db.session.flush()
+        ids.append(m.id)
+    db.session.commit()
+    return ids
+
+
+def _walk(client, url):
+    ids, cursor = [], None
+    while True:
+        page = client.get(url + (f'&after={cursor}' if cursor else '')).get_json()
+        ids.extend(m['id'] for m in page['matches'])
+        cursor = page['next_cursor']
+        if not cursor:
+            return ids
+
+
+def test_history_pages_cover_every_match_once(client):
+    _, a = register_user(client, 'Alice', 'alice@test.com')
+    _, b = register_user(client, 'Bob', 'bob@test.com')
+    _, c = register_user(client, 'Cara', 'cara@test.com')
+    ids = _matches(a, [b, c] * 12, days=5)  # repeated dates exercise the id tiebreak
+    walked = _walk(client, f'/api/players/{a}/matches?limit=7')
+    assert sorted(walked) == sorted(ids) and len(walked) == len(set(walked))
+    assert _walk(client, f'/api/players/{a}/matches?limit=5&opponent_id={c}') == \
+        [m for m in walked if m in ids[1::2]]
+
+
+def test_history_status_filter_and_bad_cursor(client):
+    from models import Match, db
+    tok_a, a = register_user(client, 'Alice', 'alice@test.com')
+    _, b = register_user(client, 'Bob', 'bob@test.com')
+    first, second = _matches(a, [b, b])
+    db.session.get(Match, second).status = 'cancelled'
+    db.session.commit()
+    ids = lambda url: [m['id'] for m in client.get(url).get_json()['matches']]
+    assert ids(f'/api/players/{a}/matches?status=cancelled') == [second]
+    assert ids(f'/api/players/{a}/matches?status=completed') == [first]
+    assert client.get(f'/api/players/{a}/matches?after=garbage').status_code == 400
+    assert client.get('/api/players/9999/matches').status_code == 404
+
+
+def test_profile_carries_bounded_recent_slice(client):
+    from models import PlayerStats
+    tok_a, a = register_user(client, 'Alice', 'alice@test.com')
+    _, b = register_user(client, 'Bob', 'bob@test.com')
+    _matches(a, [b] * 15)
+    PlayerStats.refresh(a, b)
+    player = client.get(f'/api/players/{a}', headers=auth_header(tok_a)).get_json()['player']
+    assert len(player['recent_matches']) == 10
+    assert player['matches_played'] == 15 and player['wins'] == 15
+    rest = client.get(f"/api/players/{a}/matches?after={player['match_history_cursor']}").get_json()
+    assert len(rest['matches']) == 5 and rest['next_cursor'] is None
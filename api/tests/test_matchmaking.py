@@ -0,0 +1,142 @@
+"""Tests for the columnar matchmaking scorer."""
+from tests.conftest import register_user, auth_header, create_match_between, CountQueries
+
+
+def _suggestions(client, tok):
+    return {s['id']: s for s in client.get('/api/matchmaking/suggestions', headers=auth_header(tok))
+            .get_json()['suggestions']}
+
+
+def test_components_and_reasons(client):
+    from models import User, db
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com', ntrp=4.0)
+    _, id_b = register_user(client, 'Bob', 'bob@test.com', ntrp=4.0)
+    _, id_c = register_user(client, 'Cara', 'cara@test.com', ntrp=2.5)
+    db.session.get(User, id_c).elo = 1500
+    db.session.commit()
+    client.post('/api/availability', json={'day_of_week': 2, 'start_time': '09:00', 'end_time': '12:00'},
+                headers=auth_header(tok_a))
+    by_id = _suggestions(client, tok_a)
+    bob, cara = by_id[id_b], by_id[id_c]
+    # Same Elo and NTRP, no shared slots, never played, fully reliable: 30 + 20 + 0 + 15 + 10
+    assert bob['match_score'] == 75.0
+    assert bob['reasons'] == ['Similar Elo', 'Similar NTRP level', 'New opponent', 'Highly reliable']
+    # 300 Elo apart, 1.5 NTRP apart: 0 + 5 + 0 + 15 + 10
+    assert (cara['match_score'], cara['elo_diff'], cara['availability_overlap']) == (30.0, 300, None)
+    assert list(by_id) == [id_b, id_c]
+
+
+def test_recent_matches_and_reliability(client):
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    match_id = create_match_between(client, tok_a, id_a, tok_b, id_b)
+    client.post(f'/api/matches/{match_id}/score', json={'score': '6-4, 6-3', 'winner_id': id_a},
+                headers=auth_header(tok_a))
+    client.post(f'/api/matches/{match_id}/confirm', json={'action': 'confirm'}, headers=auth_header(tok_b))
+    cancelled = create_match_between(client, tok_a, id_a, tok_b, id_b)
+    client.post(f'/api/matches/{cancelled}/cancel', headers=auth_header(tok_b))
+    bob = _suggestions(client, tok_a)[id_b]
+    assert (bob['recent_matches'], bob['reliability']) == (1, 50)
+    assert 'New opponent' not in bob['reasons'] and 'Highly reliable' not in bob['reasons']
+
+
+def test_query_count_is_independent_of_pool_size(client, app):
+    from models import db
+    tok, _ = register_user(client, 'Alice', 'alice@test.com')
+
+    def count_queries():
+        import matchmaking
+        matchmaking.cache.invalidate()
+        with CountQueries(db.engine) as counter:
+            assert client.get('/api/matchmaking/suggestions', headers=auth_header(tok)).status_code == 200
+        return counter.count
+
+    register_user(client, 'Bob', 'bob@test.com')
+    few = count_queries()
+    for i in range(10):
+        register_user(client, f'P{i}', f'p{i}@test.com')
+    assert count_queries() == few
+
+
+def test_top_k_matches_full_ranking(client):
+    import random
+    import matchmaking
+    import weekmask
+    from models import User, db
+    rng = random.Random(7)
+    rows = [{'name': f'P{i}', 'password_hash': 'x', 'elo': rng.choice([None, rng.randint(800, 1700)]),
+             'ntrp': rng.choice([None, 2.5, 3.0, 3.5, 4.0, 4.5, 5.5]),
+             'availability_mask': weekmask.to_blob(weekmask.window(rng.randint(0, 6), '08:00', rng.choice(['09:00', '12:00'])))}
+            for i in range(400)]
+    db.session.execute(User.__table__.insert(), rows)
+    db.session.commit()
+    for me in (db.session.get(User, 1), db.session.get(User, 2)):
+        full = matchmaking.score(me, matchmaking.CandidatePool.load(me.id), {})
+        for limit in (1, 5, 40):
+            top = matchmaking.top_matches(me, {}, limit)
+            assert [s['match_score'] for s in top] == [s['match_score'] for s in full[:limit]]
+            # Only the order among candidates tied at the cut-off score may differ
+            cutoff = top[-1]['match_score']
+            assert {s['id'] for s in full if s['match_score'] > cutoff} <= {s['id'] for s in top}
+        floor = full[60]['match_score']
+        top = matchmaking.top_matches(me, {}, 100, min_score=floor)
+        assert sorted(s['id'] for s in top) == sorted(s['id'] for s in full if s['match_score'] >= floor)
+
+
+def test_limit_and_min_score_params(client):
+    tok_a, _ = register_user(client, 'Alice', 'alice@test.com', ntrp=4.0)
+    for i in range(5):
+        register_user(client, f'P{i}', f'p{i}@test.com', ntrp=4.0 - i * 0.5)
+    get = lambda qs: client.get(f'/api/matchmaking/suggestions?{qs}', headers=auth_header(tok_a)).get_json()['suggestions']
+    assert [s['name'] for s in get('limit=2')] == ['P0', 'P1']
+    assert all(s['match_score'] >= 60 for s in get('min_score=60')) and len(get('min_score=60')) == 4
+
+
+def test_cached_lists_drop_only_on_touched_players(client):
+    import matchmaking
+    from models import User, db
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com', ntrp=4.0)
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com', ntrp=4.0)
+    tok_c, id_c = register_user(client, 'Cara', 'cara@test.com', ntrp=4.0)
+    get = lambda tok: client.get('/api/matchmaking/suggestions?limit=1', headers=auth_header(tok)).get_json()
+    assert [s['id'] for s in get(tok_a)['suggestions']] == [id_b]
+    assert [s['id'] for s in get(tok_c)['suggestions']] == [id_a]
+    hits = matchmaking.cache.hits
+    get(tok_a)
+    assert matchmaking.cache.hits == hits + 1
+
+    # Bob is only in Alice's list: his availability write drops that entry and leaves Cara's
+    client.post('/api/availability', json={'day_of_week': 1, 'start_time': '09:00', 'end_time': '10:00'},
+                headers=auth_header(tok_b))
+    assert matchmaking.cache.get((id_a, 1, 0)) is None
+    assert matchmaking.cache.get((id_c, 1, 0)) is not None
+
+    # An admin Elo edit on Alice (owner of one list, member of Cara's) drops both
+    get(tok_a)
+    db.session.get(User, id_a).elo = 1500
+    db.session.commit()
+    assert matchmaking.cache.get((id_a, 1, 0)) is None and matchmaking.cache.get((id_c, 1, 0)) is None
+    assert [s['id'] for s in get(tok_c)['suggestions']] == [id_b]
+
+
+def test_warm_fills_active_players(client):
+    import matchmaking
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    register_user(client, 'Idle', 'idle@test.com')
+    create_match_between(client, tok_a, id_a, tok_b, id_b)
+    assert sorted(matchmaking.active_user_ids()) == sorted([id_a, id_b])
+    misses = matchmaking.cache.misses
+    assert matchmaking.warm() == 2
+    assert matchmaking.warm() == 0
+    assert matchmaking.cache.misses == misses  # presence checks aren't lookups
+    assert (id_a, matchmaking.DEFAULT_LIMIT, 0) in matchmaking.cache
+
+
+def test_warm_thread_survives_errors(client):
+    import app as app_module
+    import matchmaking
+
+    def locked():
+        raise RuntimeError('database is locked')
+    assert app_module._run_background_once(locked, matchmaking.WARM_EVERY) is None  # logged, not raised
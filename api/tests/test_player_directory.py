@@ -0,0 +1,68 @@
+"""Tests for the player directory (/api/players): SQL filters, keyset pages and facets."""
+from tests.conftest import register_user
+
+
+def _slot(uid, day, start, end):
+    from models import Availability, db
+    db.session.add(Availability(user_id=uid, day_of_week=day, start_time=start, end_time=end))
+    db.session.commit()
+
+
+def _walk(client, url):
+    names, cursor = [], None
+    while True:
+        page = client.get(url + (f'&after={cursor}' if cursor else '')).get_json()
+        names.extend(p['name'] for p in page['players'])
+        cursor = page['next_cursor']
+        if not cursor:
+            return names
+
+
+def test_day_and_window_must_match_one_slot(client):
+    _, a = register_user(client, 'Alice', 'alice@test.com')
+    _, b = register_user(client, 'Bob', 'bob@test.com')
+    register_user(client, 'Cara', 'cara@test.com')
+    _slot(a, 2, '09:00', '11:00')
+    _slot(b, 2, '18:00', '20:00')
+    _slot(b, 5, '09:00', '12:00')
+    names = lambda url: [p['name'] for p in client.get(url).get_json()['players']]
+    assert names('/api/players?day=2') == ['Alice', 'Bob']
+    assert names('/api/players?day=2&start=10:00&end=12:00') == ['Alice']
+    # Bob is free mornings only on day 5, so a day-2 morning doesn't match him
+    assert names('/api/players?start=10:00&end=11:00') == ['Alice', 'Bob']
+    assert names('/api/players?day=2&start=08:00&end=09:00') == []
+
+
+def test_keyset_pages_for_every_sort(client):
+    from models import User, db
+    levels = [3.0, 4.5, None, 3.5, 4.5, 2.5, None]
+    for i, ntrp in enumerate(levels):
+        _, uid = register_user(client, f'P{i}', f'p{i}@test.com')
+        db.session.get(User, uid).ntrp = ntrp
+    db.session.commit()
+    for sort in ('name', 'ntrp', 'activity'):
+        full = client.get(f'/api/players?sort={sort}&limit=100').get_json()
+        assert full['next_cursor'] is None
+        assert _walk(client, f'/api/players?sort={sort}&limit=2') == [p['name'] for p in full['players']]
+    by_ntrp = [p['ntrp'] for p in client.get('/api/players?sort=ntrp').get_json()['players']]
+    assert by_ntrp == [4.5, 4.5, 3.5, 3.0, 2.5, None, None]
+    assert client.get('/api/players?after=garbage').status_code == 400
+
+
+def test_facets_cover_filtered_set(client):
+    from models import User, db
+    ids = []
+    for i, ntrp in enumerate([3.5, 3.5, 4.0, None]):
+        _, uid = register_user(client, f'P{i}', f'p{i}@test.com')
+        db.session.get(User, uid).ntrp = ntrp
+        ids.append(uid)
+    db.session.commit()
+    _slot(ids[0], 1, '09:00', '10:00')
+    _slot(ids[0], 1, '17:00', '18:00')
+    _slot(ids[1], 1, '09:00', '10:00')
+    _slot(ids[2], 6, '09:00', '10:00')
+    resp = client.get('/api/players?limit=1').get_json()
+    assert len(resp['players']) == 1
+    assert resp['facets'] == {'ntrp': {'3.5': 2, '4.0': 1, 'unrated': 1}, 'day': {'1': 2, '6': 1}}
+    filtered = client.get('/api/players?ntrp_min=3.5&ntrp_max=3.5').get_json()['facets']
+    assert filtered == {'ntrp': {'3.5': 2}, 'day': {'1': 2}}
@@ -0,0 +1,151 @@
+"""Tests for the materialized PlayerStats counters."""
+from tests.conftest import register_user, auth_header, create_match_between
+
+
+def _play(client, tok_a, id_a, tok_b, id_b, winner_id, confirm=True):
+    match_id = create_match_between(client, tok_a, id_a, tok_b, id_b)
+    client.post(f'/api/matches/{match_id}/score', json={
+        'score': '6-4, 6-3', 'winner_id': winner_id,
+    }, headers=auth_header(tok_a))
+    if confirm:
+        client.post(f'/api/matches/{match_id}/confirm', json={'action': 'confirm'},
+                    headers=auth_header(tok_b))
+    return match_id
+
+
+def _me(client, tok):
+    return client.get('/api/auth/me', headers=auth_header(tok)).get_json()['user']
+
+
+def test_stats_row_updated_on_confirm(client):
+    from models import PlayerStats, db
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    _play(client, tok_a, id_a, tok_b, id_b, id_a)
+    row = db.session.get(PlayerStats, id_a)
+    assert row is not None
+    assert (row.wins, row.losses, row.matches_played, row.unique_opponents) == (1, 0, 1, 1)
+    me = _me(client, tok_b)
+    assert (me['wins'], me['losses'], me['matches_played']) == (0, 1, 1)
+
+
+def test_unconfirmed_score_not_counted(client):
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    _play(client, tok_a, id_a, tok_b, id_b, id_a, confirm=False)
+    me = _me(client, tok_a)
+    assert me['wins'] == 0 and me['matches_played'] == 0
+    assert me['reliability'] == 100
+
+
+def test_cancel_lowers_reliability(client):
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    _play(client, tok_a, id_a, tok_b, id_b, id_a)
+    match_id = create_match_between(client, tok_a, id_a, tok_b, id_b)
+    client.post(f'/api/matches/{match_id}/cancel', headers=auth_header(tok_a))
+    assert _me(client, tok_a)['reliability'] == 50
+
+
+def test_rebuild_matches_live_aggregate(client):
+    from models import PlayerStats, Match, db
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    _play(client, tok_a, id_a, tok_b, id_b, id_b)
+    # Simulate rows written outside the API (e.g. seed data)
+    Match.query.update({'winner_id': id_a})
+    db.session.commit()
+    assert PlayerStats.rebuild() == 2
+    assert db.session.get(PlayerStats, id_a).wins == 1
+    assert db.session.get(PlayerStats, id_b).losses == 1
+
+
+def test_bulk_matches_per_user_stats(client):
+    from models import PlayerStats, User, db
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    tok_c, id_c = register_user(client, 'Carol', 'carol@test.com')
+    _play(client, tok_a, id_a, tok_b, id_b, id_a)
+    _play(client, tok_c, id_c, tok_a, id_a, id_c)
+    # Drop a stored row to exercise the GROUP BY fallback
+    db.session.delete(db.session.get(PlayerStats, id_a))
+    db.session.commit()
+    bulk = PlayerStats.bulk([id_a, id_b, id_c])
+    for uid in (id_a, id_b, id_c):
+        live = PlayerStats.compute(uid)
+        assert (bulk[uid].wins, bulk[uid].losses, bulk[uid].matches_played, bulk[uid].unique_opponents) == \
+            (live.wins, live.losses, live.matches_played, live.unique_opponents)
+    assert (bulk[id_a].wins, bulk[id_a].losses, bulk[id_a].unique_opponents) == (1, 1, 2)
+
+
+def test_leaderboard_uses_bulk_stats(client):
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    _play(client, tok_a, id_a, tok_b, id_b, id_b)
+    board = client.get('/api/leaderboard').get_json()['leaderboard']
+    assert board[0]['id'] == id_b
+    assert (board[0]['wins'], board[1]['losses']) == (1, 1)
+
+
+def test_participant_rows_follow_match_lifecycle(client):
+    from models import MatchParticipant, Match, db
+
+    def rows(match_id):
+        return {(p.user_id, p.opponent_id, p.is_winner, p.status, p.confirmed)
+                for p in MatchParticipant.query.filter_by(match_id=match_id)}
+
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    match_id = _play(client, tok_a, id_a, tok_b, id_b, id_a, confirm=False)
+    status = db.session.get(Match, match_id).status
+    assert rows(match_id) == {(id_a, id_b, True, status, False), (id_b, id_a, False, status, False)}
+    client.post(f'/api/matches/{match_id}/confirm', json={'action': 'confirm'}, headers=auth_header(tok_b))
+    assert {r[4] for r in rows(match_id)} == {True}
+    db.session.delete(db.session.get(Match, match_id))
+    db.session.commit()
+    assert rows(match_id) == set()
+
+
+def test_h2h_uses_participant_rows(client):
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    tok_c, id_c = register_user(client, 'Carol', 'carol@test.com')
+    _play(client, tok_a, id_a, tok_b, id_b, id_a)
+    _play(client, tok_b, id_b, tok_a, id_a, id_b)
+    _play(client, tok_a, id_a, tok_c, id_c, id_a)
+    h2h = client.get(f'/api/players/{id_b}/h2h', headers=auth_header(tok_a)).get_json()['h2h']
+    assert (h2h['wins'], h2h['losses'], h2h['matches_played']) == (1, 1, 2)
+    detail = client.get(f'/api/players/{id_a}/matches?status=confirmed&opponent_id={id_b}').get_json()
+    assert len(detail['matches']) == 2
+
+
+def test_head_to_head_rows_follow_confirmations(client):
+    from models import HeadToHead, Match, db
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    pending = _play(client, tok_a, id_a, tok_b, id_b, id_a, confirm=False)
+    assert HeadToHead.summary(id_a, id_b)['matches_played'] == 0
+    client.post(f'/api/matches/{pending}/confirm', json={'action': 'confirm'}, headers=auth_header(tok_b))
+    _play(client, tok_b, id_b, tok_a, id_a, id_b)
+    _play(client, tok_a, id_a, tok_b, id_b, id_b)
+    summary = HeadToHead.summary(id_b, id_a)
+    assert (summary['wins'], summary['losses'], summary['matches_played']) == (2, 1, 3)
+    assert HeadToHead.summary(id_a, id_b)['wins'] == 1
+    db.session.delete(db.session.get(Match, pending))
+    db.session.commit()
+    assert HeadToHead.summary(id_a, id_b)['matches_played'] == 2
+
+
+def test_head_to_head_rebuild_matches_listener(client):
+    from models import HeadToHead, db
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    tok_c, id_c = register_user(client, 'Carol', 'carol@test.com')
+    _play(client, tok_a, id_a, tok_b, id_b, id_a)
+    _play(client, tok_c, id_c, tok_a, id_a, id_c)
+    _play(client, tok_b, id_b, tok_c, id_c, id_c, confirm=False)
+    live = {(r.player_low_id, r.player_high_id, r.low_wins, r.high_wins, r.matches_played, r.last_played)
+            for r in HeadToHead.query.all()}
+    assert HeadToHead.rebuild() == 2
+    assert {(r.player_low_id, r.player_high_id, r.low_wins, r.high_wins, r.matches_played, r.last_played)
+            for r in HeadToHead.query.all()} == live
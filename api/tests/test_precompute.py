@@ -0,0 +1,85 @@
+"""Tests for the nightly matchmaking precompute and the stored-suggestion read path."""
+from datetime import datetime, timedelta
+
+from tests.conftest import register_user, auth_header, create_match_between
+
+
+def _suggestions(client, tok, qs=''):
+    return client.get(f'/api/matchmaking/suggestions{qs}', headers=auth_header(tok)).get_json()
+
+
+def _world(client):
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com', ntrp=4.0)
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com', ntrp=3.5)
+    tok_c, id_c = register_user(client, 'Cara', 'cara@test.com', ntrp=4.0)
+    register_user(client, 'Idle', 'idle@test.com', ntrp=2.0)
+    create_match_between(client, tok_a, id_a, tok_b, id_b)
+    return (tok_a, id_a), (tok_b, id_b), (tok_c, id_c)
+
+
+def test_precompute_covers_active_players_and_matches_live(client):
+    import matchmaking
+    from models import SuggestionSnapshot, User, db
+    from precompute import precompute
+    (tok_a, id_a), (tok_b, id_b), (tok_c, id_c) = _world(client)
+    live = _suggestions(client, tok_a)
+    assert live['computed_at'] is None
+    assert precompute(top_n=10) == 2
+    assert {r.user_id for r in SuggestionSnapshot.query.all()} == {id_a, id_b}
+    stored = _suggestions(client, tok_a, '?limit=5')
+    assert stored['computed_at'] is not None
+    assert stored['suggestions'] == live['suggestions']
+    # Not active, so not precomputed: served live
+    assert _suggestions(client, tok_c)['computed_at'] is None
+    # More than the stored top-N can't be answered from the row
+    assert _suggestions(client, tok_a, '?limit=11')['computed_at'] is None
+    matchmaking.cache.invalidate()
+    assert _suggestions(client, tok_a, '?limit=5&min_score=1000') == {
+        'suggestions': [], 'computed_at': stored['computed_at']}
+
+
+def test_own_changes_drop_stored_row(client):
+    from models import SuggestionSnapshot, db
+    from precompute import precompute
+    (tok_a, id_a), (tok_b, id_b), _ = _world(client)
+    precompute()
+    client.post('/api/availability', json={'day_of_week': 3, 'start_time': '09:00', 'end_time': '10:00'},
+                headers=auth_header(tok_a))
+    assert db.session.get(SuggestionSnapshot, id_a) is None
+    assert db.session.get(SuggestionSnapshot, id_b) is None  # Bob's list names Alice
+    assert _suggestions(client, tok_a)['computed_at'] is None
+
+
+def test_listed_players_changes_drop_stored_row(client):
+    from models import SuggestionSnapshot, db
+    from precompute import precompute
+    (tok_a, id_a), (tok_b, id_b), _ = _world(client)
+    slot = {'day_of_week': 3, 'start_time': '09:00', 'end_time': '10:00'}
+    client.post('/api/availability', json=slot, headers=auth_header(tok_a))
+    precompute()
+    stored = _suggestions(client, tok_a)
+    assert stored['computed_at'] is not None
+    assert next(s for s in stored['suggestions'] if s['id'] == id_b)['availability_overlap'] is None
+    tok_new, _ = register_user(client, 'Newcomer', 'new@test.com')  # in nobody's stored list
+    client.post('/api/availability', json=slot, headers=auth_header(tok_new))
+    assert db.session.get(SuggestionSnapshot, id_a) is not None
+    client.post('/api/availability', json=slot, headers=auth_header(tok_b))
+    assert db.session.get(SuggestionSnapshot, id_a) is None
+    fresh = _suggestions(client, tok_a)
+    assert fresh['computed_at'] is None
+    assert next(s for s in fresh['suggestions'] if s['id'] == id_b)['availability_overlap'] == 60
+
+
+def test_stale_rows_ignored_and_purged(client):
+    import matchmaking
+    from models import SuggestionSnapshot, db
+    from precompute import precompute
+    (tok_a, id_a), (tok_b, id_b), _ = _world(client)
+    old = datetime.utcnow() - matchmaking.STORED_MAX_AGE - timedelta(hours=1)
+    precompute(now=old)
+    assert _suggestions(client, tok_a)['computed_at'] is None
+    db.session.add(SuggestionSnapshot(user_id=999, top_n=1, suggestions='[]', computed_at=old))
+    db.session.commit()
+    precompute()
+    assert db.session.get(SuggestionSnapshot, 999) is None
+    assert db.session.get(SuggestionSnapshot, id_b).computed_at > old
@@ -0,0 +1,77 @@
+"""EXPLAIN QUERY PLAN regression tests: hot endpoints must not full-scan the big tables."""
+import re
+from datetime import date, timedelta
+
+import pytest
+
+from tests.conftest import register_user, auth_header, create_match_between, CountQueries
+
+HOT_TABLES = {'match', 'looking_to_play', 'match_invite', 'notification', 'availability', 'player_review'}
+# "SCAN match" / "SCAN TABLE match" without "USING ... INDEX" is a full table scan
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+class _CapturePlans(CountQueries):
+    """Records every SELECT an endpoint runs, then explains each one."""
+
+    def __init__(self, engine):
+        super().__init__(engine, selects_only=True)
+
+    def full_scans(self, db):
+        found = []
+        conn = db.session.connection().connection.driver_connection
+        for statement, parameters in self.statements:
+            for row in conn.execute('EXPLAIN QUERY PLAN ' + statement, parameters):
+                m = FULL_SCAN.match(row[-1])
+                if m and m.group(1) in HOT_TABLES:
+                    found.append((m.group(1), statement))
+        return found
+
+
+@pytest.fixture()
+def world(client):
+    from models import Availability, db
+    tok_a, id_a = register_user(client, 'Alice', 'alice@test.com', ntrp=3.5)
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com', ntrp=4.0)
+    match_id = create_match_between(client, tok_a, id_a, tok_b, id_b)
+    client.post(f'/api/matches/{match_id}/score', json={'score': '6-4, 6-3', 'winner_id': id_a},
+                headers=auth_header(tok_a))
+    client.post(f'/api/matches/{match_id}/confirm', json={'action': 'confirm'}, headers=auth_header(tok_b))
+    client.post('/api/posts', json={'play_date': (date.today() + timedelta(days=2)).isoformat(),
+                                    'start_time': '10:00', 'end_time': '12:00'}, headers=auth_header(tok_b))
+    db.session.add(Availability(user_id=id_a, day_of_week=2, start_time='09:00', end_time='11:00'))
+    db.session.commit()
+    return {'a': (tok_a, id_a), 'b': (tok_b, id_b), 'match': match_id}
+
+
+HOT_PATHS = [
+    '/api/posts',
+    '/api/posts?sort=closest_date',
+    '/api/posts?sort=skill_match',
+    '/api/posts?for_you=1',
+    '/api/matches',
+    '/api/matches/upcoming',
+    '/api/matches/recent',
+    '/api/players/{b}',
+    '/api/players/{b}/h2h',
+    '/api/players/{b}/matches?status=completed',
+    '/api/notifications',
+    '/api/notifications/unread-count',
+    '/api/availability',
+    '/api/users/{b}/tags',
+    '/api/users/{b}/badges',
+    '/api/matchmaking/suggestions',
+    '/api/players?day=2&start=09:00&end=10:00',
+]
+
+
+@pytest.mark.parametrize('path', HOT_PATHS)
+def test_hot_path_uses_indexes(client, world, path):
+    from models import db
+    tok_a, _ = world['a']
+    url = path.format(b=world['b'][1], match=world['match'])
+    with _CapturePlans(db.engine) as plans:
+        resp = client.get(url, headers=auth_header(tok_a))
+    assert resp.status_code == 200, url
+    assert plans.statements, url
+    assert plans.full_scans(db) == []
@@ -0,0 +1,72 @@
+"""Tests for the FTS5 trigram search indexes."""
+from datetime import date, timedelta
+
+from tests.conftest import register_user, auth_header
+
+
+def _names(resp, key='players'):
+    return [p['name'] for p in resp.get_json()[key]]
+
+
+def test_player_search_tracks_writes(client):
+    from models import User, db
+    tok, uid = register_user(client, 'Alexandra Smith', 'alex@test.com')
+    register_user(client, 'Bob Jones', 'bob@test.com')
+    assert _names(client.get('/api/players?search=XANDR')) == ['Alexandra Smith']
+    client.put('/api/profile', json={'name': 'Sasha Smith'}, headers=auth_header(tok))
+    assert _names(client.get('/api/players?search=xandr')) == []
+    assert _names(client.get('/api/players?search=sasha')) == ['Sasha Smith']
+    db.session.delete(db.session.get(User, uid))
+    db.session.commit()
+    assert _names(client.get('/api/players?search=smith')) == []
+
+
+def test_short_terms_fall_back_to_like(client):
+    register_user(client, 'Bo Li', 'bo@test.com')
+    register_user(client, 'Ann', 'ann@test.com')
+    assert _names(client.get('/api/players?search=li')) == ['Bo Li']
+
+
+def test_court_filters_use_index(client):
+    from models import User, db
+    tok, uid = register_user(client, 'Alice', 'alice@test.com')
+    db.session.get(User, uid).preferred_courts = '["Frick Park", "Schenley"]'
+    db.session.commit()
+    assert _names(client.get('/api/players?court=frick')) == ['Alice']
+    day = (date.today() + timedelta(days=1)).isoformat()
+    for court in ('Frick Park Court 2', 'Highland Park'):
+        client.post('/api/posts', json={'play_date': day, 'start_time': '10:00', 'end_time': '12:00',
+                                        'court': court}, headers=auth_header(tok))
+    posts = client.get('/api/posts?court=frick').get_json()['posts']
+    assert [p['court'] for p in posts] == ['Frick Park Court 2']
+
+
+def test_ranked_search_endpoint_pages(client):
+    from models import Court, db
+    for i in range(5):
+        register_user(client, f'Taylor {i}', f't{i}@test.com')
+    db.session.add_all([Court(name='Schenley Oval', lat=40.4, lng=-79.9),
+                        Court(name='Frick Park', address='Schenley Rd', lat=40.4, lng=-79.9)])
+    db.session.commit()
+    first = client.get('/api/search?q=taylor&limit=3').get_json()
+    assert len(first['results']) == 3 and first['next_offset'] == 3
+    rest = client.get('/api/search?q=taylor&limit=3&offset=3').get_json()
+    assert rest['next_offset'] is None
+    names = [r['name'] for r in first['results'] + rest['results']]
+    assert sorted(names) == [f'Taylor {i}' for i in range(5)]
+    courts = client.get('/api/search?type=courts&q=schenley').get_json()['results']
+    assert {c['name'] for c in courts} == {'Schenley Oval', 'Frick Park'}
+    assert client.get('/api/search?q=ta').status_code == 400
+    assert client.get('/api/search?q=taylor&type=nope').status_code == 400
+
+
+def test_admin_search_matches_email(client):
+    from models import User, db
+    from flask_jwt_extended import create_access_token
+    _, admin_id = register_user(client, 'Admin', 'boss@club.org')
+    register_user(client, 'Casey', 'casey@example.com')
+    db.session.get(User, admin_id).is_admin = True
+    db.session.commit()
+    headers = {'X-Admin-Token': create_access_token(identity=str(admin_id))}
+    users = client.get('/api/admin/users?search=example.com', headers=headers).get_json()['users']
+    assert [u['name'] for u in users] == ['Casey']
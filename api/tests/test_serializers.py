@@ -0,0 +1,65 @@
+"""Tests for batched list serialization (no per-row user lookups)."""
+from tests.conftest import register_user, auth_header, create_match_between, CountQueries
+
+
+def _players(client, n):
+    return [register_user(client, f'P{i}', f'p{i}@test.com') for i in range(n)]
+
+
+def test_match_list_query_count_is_constant(client):
+    from models import db
+    players = _players(client, 6)
+    tok_a, id_a = players[0]
+    for tok_b, id_b in players[1:]:
+        create_match_between(client, tok_a, id_a, tok_b, id_b)
+    db.session.expire_all()
+    with CountQueries(db.engine) as few:
+        resp = client.get('/api/matches', headers=auth_header(tok_a))
+    matches = resp.get_json()['matches']
+    assert len(matches) == 5
+    names = {m[side]['name'] for m in matches for side in ('player1', 'player2')}
+    assert names == {f'P{i}' for i in range(6)}
+
+    for tok_b, id_b in _players(client, 12)[6:]:
+        create_match_between(client, tok_a, id_a, tok_b, id_b)
+    db.session.expire_all()
+    with CountQueries(db.engine) as many:
+        resp = client.get('/api/matches', headers=auth_header(tok_a))
+    assert len(resp.get_json()['matches']) == 11
+    assert many.count == few.count
+
+
+def test_serialized_shape_matches_to_dict(client):
+    from models import db, Match
+    from serializers import serialize_matches
+    (tok_a, id_a), (tok_b, id_b) = _players(client, 2)
+    create_match_between(client, tok_a, id_a, tok_b, id_b)
+    matches = Match.query.all()
+    assert serialize_matches(matches) == [m.to_dict() for m in matches]
+
+
+def test_feed_authors_loaded_in_one_query(client):
+    from datetime import date, timedelta
+    from app import feed_cache
+    from models import db
+    players = _players(client, 5)
+    day = (date.today() + timedelta(days=3)).isoformat()
+
+    def fetch():
+        feed_cache.invalidate()
+        db.session.expire_all()
+        with CountQueries(db.engine) as counter:
+            resp = client.get('/api/posts', headers=auth_header(players[0][0]))
+        return resp.get_json()['posts'], counter.count
+
+    for tok, _ in players[1:2]:
+        client.post('/api/posts', json={'play_date': day, 'start_time': '10:00', 'end_time': '12:00'},
+                    headers=auth_header(tok))
+    posts, one = fetch()
+    assert [p['author_name'] for p in posts] == ['P1']
+    for tok, _ in players[2:]:
+        client.post('/api/posts', json={'play_date': day, 'start_time': '10:00', 'end_time': '12:00'},
+                    headers=auth_header(tok))
+    posts, many = fetch()
+    assert {p['author_name'] for p in posts} == {'P1', 'P2', 'P3', 'P4'}
+    assert many == one
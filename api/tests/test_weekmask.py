@@ -0,0 +1,41 @@
+"""Tests for the weekly availability bitmap and its use in matchmaking."""
+import weekmask
+from tests.conftest import register_user, auth_header
+
+
+def test_window_rounds_outwards_and_merges():
+    sat = weekmask.window(5, '09:00', '11:00')
+    assert weekmask.popcount(sat) == 8
+    assert weekmask.window(5, '09:10', '10:20') == weekmask.window(5, '09:00', '10:30')
+    assert weekmask.window(1, '10:00', '09:00') == 0 and weekmask.window(7, '09:00', '10:00') == 0
+    merged = weekmask.compile_slots([(5, '09:00', '11:00'), (5, '10:00', '12:00')])
+    assert weekmask.overlap_minutes(merged, merged) == 180
+    assert merged == weekmask.window(5, '09:00', '12:00')
+    assert weekmask.from_blob(weekmask.to_blob(merged)) == merged
+
+
+def test_mask_follows_slot_writes(client):
+    from models import User, db
+    tok, uid = register_user(client, 'Alice', 'alice@test.com')
+    slot = client.post('/api/availability', json={'day_of_week': 5, 'start_time': '09:00', 'end_time': '11:00'},
+                       headers=auth_header(tok)).get_json()['slot']
+    client.post('/api/availability', json={'day_of_week': 0, 'start_time': '18:00', 'end_time': '19:00'},
+                headers=auth_header(tok))
+    mask = db.session.get(User, uid).weekly_mask
+    assert weekmask.overlap_minutes(mask, mask) == 180
+    assert mask == weekmask.window(5, '09:00', '11:00') | weekmask.window(0, '18:00', '19:00')
+    client.delete(f"/api/availability/{slot['id']}", headers=auth_header(tok))
+    db.session.expire_all()
+    assert db.session.get(User, uid).weekly_mask == weekmask.window(0, '18:00', '19:00')
+
+
+def test_matchmaking_overlap_from_masks(client):
+    tok_a, _ = register_user(client, 'Alice', 'alice@test.com')
+    tok_b, id_b = register_user(client, 'Bob', 'bob@test.com')
+    for tok, start, end in ((tok_a, '09:00', '12:00'), (tok_b, '10:30', '14:00')):
+        client.post('/api/availability', json={'day_of_week': 2, 'start_time': start, 'end_time': end},
+                    headers=auth_header(tok))
+    suggestions = client.get('/api/matchmaking/suggestions', headers=auth_header(tok_a)).get_json()['suggestions']
+    bob = next(s for s in suggestions if s['id'] == id_b)
+    assert bob['availability_overlap'] == 90
+    assert 'Overlapping schedule' in bob['reasons']
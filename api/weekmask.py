@@ -0,0 +1,61 @@
+"""
+Weekly availability as a bitmap.
+
+A player's recurring slots are compiled into one integer of 7 × 96 bits: bit
+`day * 96 + i` is set when they are free during the i-th quarter hour of that
+weekday (0 = Monday). Overlap between two players is then a popcount of an
+AND, with no string parsing on the read path. Masks are stored on `User.availability_mask` as a
+fixed-size big-endian blob and recompiled whenever a slot is added, edited
+or removed.
+
+Slot edges are rounded outwards to the quarter hour (09:10–10:20 counts as
+09:00–10:30); overlapping slots of one player are merged, not double counted.
+"""
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAYS = 7
+WEEK_BITS = DAYS * SLOTS_PER_DAY
+BLOB_BYTES = WEEK_BITS // 8
+
+
+def minutes(hhmm):
+    """Minutes after midnight of an "HH:MM" string."""
+    hours, mins = hhmm.split(':')
+    return int(hours) * 60 + int(mins)
+
+
+def window(day, start, end):
+    """Mask of one weekday's "HH:MM"–"HH:MM" window; 0 if empty or malformed."""
+    try:
+        first = minutes(start) // SLOT_MINUTES
+        last = -(-minutes(end) // SLOT_MINUTES)  # ceil: a partial quarter hour still counts
+    except (AttributeError, ValueError):
+        return 0
+    first, last = max(first, 0), min(last, SLOTS_PER_DAY)
+    if not 0 <= day < DAYS or last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << (day * SLOTS_PER_DAY + first)
+
+
+def compile_slots(slots):
+    """Union of (day_of_week, start_time, end_time) tuples."""
+    mask = 0
+    for day, start, end in slots:
+        mask |= window(day, start, end)
+    return mask
+
+
+def popcount(mask):
+    return bin(mask).count('1')
+
+
+def overlap_minutes(a, b):
+    return popcount(a & b) * SLOT_MINUTES
+
+
+def to_blob(mask):
+    return mask.to_bytes(BLOB_BYTES, 'big') if mask else None
+
+
+def from_blob(blob):
+    return int.from_bytes(blob, 'big') if blob else 0
@@ -1,7 +1,7 @@
 from flask import Flask, render_template, request, redirect, url_for, flash
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from models import db, User, Availability, LookingToPlay, MatchInvite, Match, Notification
+from models import db, User, Availability, LookingToPlay, MatchInvite, Match, Notification, load_stats
 from datetime import datetime, date, timedelta
 import os
 
@@ -154,7 +154,7 @@ def players():
         day_int = int(day)
         user_ids = {a.user_id for a in Availability.query.filter_by(day_of_week=day_int).all()}
         users = [u for u in users if u.id in user_ids]
-    return render_template('players.html', players=users, selected_day=day)
+    return render_template('players.html', players=load_stats(users), selected_day=day)
 
 
 @app.route('/player/<int:user_id>')
@@ -166,13 +166,15 @@ def player_profile(user_id):
     # H2H with current user
     h2h = None
     if current_user.is_authenticated and current_user.id != user_id:
-        h2h_matches = Match.query.filter(Match.score_confirmed == True).filter(
+        # Counted in SQL: the page shows only the W-L line, so the pair's matches aren't loaded
+        w, l = db.session.query(
+            db.func.count(db.case((Match.winner_id == current_user.id, 1))),
+            db.func.count(db.case((Match.winner_id == user_id, 1))),
+        ).filter(Match.score_confirmed == True).filter(
             ((Match.player1_id == current_user.id) & (Match.player2_id == user_id)) |
             ((Match.player1_id == user_id) & (Match.player2_id == current_user.id))
-        ).all()
-        w = sum(1 for m in h2h_matches if m.winner_id == current_user.id)
-        l = sum(1 for m in h2h_matches if m.winner_id == user_id)
-        h2h = {'wins': w, 'losses': l, 'matches': h2h_matches}
+        ).one()
+        h2h = {'wins': w, 'losses': l}
     return render_template('player.html', player=user, match_history=match_history, h2h=h2h)
 
 
@@ -340,7 +342,7 @@ def cancel_match(match_id):
 
 @app.route('/leaderboard')
 def leaderboard():
-    users = User.query.all()
+    users = load_stats(User.query.all())
     board = sorted(users, key=lambda u: u.wins, reverse=True)
     return render_template('leaderboard.html', players=board)
 
@@ -1,15 +1,36 @@
 import axios from 'axios';
 
-const api = axios.create({ baseURL: '/api' });
+const api = axios.create({
+  baseURL: '/api',
+  // 304 is a successful revalidation, answered from the ETag cache below
+  validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+});
+
+// Last ETag and body per GET URL (query string included), sent back as If-None-Match
+const etagCache = new Map<string, { etag: string; data: unknown }>();
 
 api.interceptors.request.use((config) => {
   const token = localStorage.getItem('token');
   if (token) config.headers.Authorization = `Bearer ${token}`;
+  if ((config.method ?? 'get').toLowerCase() === 'get') {
+    const cached = etagCache.get(api.getUri(config));
+    if (cached) config.headers['If-None-Match'] = cached.etag;
+  }
   return config;
 });
 
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    if ((response.config.method ?? 'get').toLowerCase() !== 'get') return response;
+    const key = api.getUri(response.config);
+    if (response.status === 304) {
+      const cached = etagCache.get(key);
+      if (cached) return { ...response, status: 200, data: cached.data };
+    }
+    const etag = response.headers['etag'];
+    if (etag) etagCache.set(key, { etag, data: response.data });
+    return response;
+  },
   (error) => {
     if (error.response?.status === 403 && error.response?.data?.error?.includes('verify your email')) {
       // Show a browser alert for email verification required
@@ -19,4 +40,7 @@ api.interceptors.response.use(
   }
 );
 
+/** Drop cached bodies, e.g. on logout so the next user never sees them. */
+export const clearEtagCache = () => etagCache.clear();
+
 export default api;
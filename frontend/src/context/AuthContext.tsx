@@ -1,5 +1,5 @@
 import { createContext, useContext, useState, useEffect, ReactNode } from 'react';
-import api from '../api/client';
+import api, { clearEtagCache } from '../api/client';
 import { User } from '../types';
 
 interface AuthCtx {
@@ -24,7 +24,7 @@ export function AuthProvider({ children }: { children: ReactNode }) {
   }, [token]);
 
   const login = (t: string, u: User) => { localStorage.setItem('token', t); setToken(t); setUser(u); };
-  const logout = () => { localStorage.removeItem('token'); setToken(null); setUser(null); };
+  const logout = () => { localStorage.removeItem('token'); clearEtagCache(); setToken(null); setUser(null); };
   const updateUser = (u: User) => setUser(u);
 
   return <AuthContext.Provider value={{ user, token, login, logout, loading, updateUser }}>{children}</AuthContext.Provider>;
@@ -1,10 +1,28 @@
-import { useQuery } from '@tanstack/react-query';
+import { useInfiniteQuery, useQuery } from '@tanstack/react-query';
 import api from '../api/client';
 import { LeaderboardEntry } from '../types';
 
-export function useLeaderboard() {
-  return useQuery<LeaderboardEntry[]>({
-    queryKey: ['leaderboard'],
-    queryFn: () => api.get('/leaderboard').then(r => r.data.leaderboard),
+interface LeaderboardPage {
+  leaderboard: LeaderboardEntry[];
+  next_cursor: string | null;
+}
+
+export function useLeaderboard(city?: string, limit = 50) {
+  return useInfiniteQuery<LeaderboardPage>({
+    queryKey: ['leaderboard', city ?? null, limit],
+    queryFn: ({ pageParam }) => api.get('/leaderboard', {
+      params: { limit, ...(city ? { city } : {}), ...(pageParam ? { cursor: pageParam } : {}) },
+    }).then(r => r.data),
+    initialPageParam: null as string | null,
+    getNextPageParam: (last) => last.next_cursor,
+  });
+}
+
+export function useMyRank(enabled: boolean, city?: string) {
+  return useQuery<{ rank: number; total: number; neighbours: LeaderboardEntry[] }>({
+    queryKey: ['leaderboard-me', city ?? null],
+    queryFn: () => api.get('/leaderboard/me', { params: city ? { city } : {} }).then(r => r.data),
+    enabled,
+    retry: false,
   });
 }
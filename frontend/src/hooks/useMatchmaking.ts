@@ -14,9 +14,11 @@ interface Suggestion {
   reliability: number;
 }
 
-export function useMatchmaking() {
+export function useMatchmaking(limit = 20, minScore?: number) {
+  const params: Record<string, number> = { limit };
+  if (minScore !== undefined) params.min_score = minScore;
   return useQuery<Suggestion[]>({
-    queryKey: ['matchmaking'],
-    queryFn: () => api.get('/matchmaking/suggestions').then(r => r.data.suggestions),
+    queryKey: ['matchmaking', params],
+    queryFn: () => api.get('/matchmaking/suggestions', { params }).then(r => r.data.suggestions),
   });
 }
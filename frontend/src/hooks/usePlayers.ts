@@ -1,9 +1,11 @@
-import { useQuery } from '@tanstack/react-query';
+import { useInfiniteQuery, useQuery } from '@tanstack/react-query';
 import api from '../api/client';
-import { User, Match } from '../types';
+import { User, Match, RatingPoint } from '../types';
 
 export interface PlayerSearchParams {
   day?: string;
+  start?: string;
+  end?: string;
   search?: string;
   ntrp_min?: number;
   ntrp_max?: number;
@@ -13,33 +15,110 @@ export interface PlayerSearchParams {
 
 export type PlayerResult = User & { preferred_courts?: string };
 
-export function usePlayers(params: PlayerSearchParams = {}) {
-  const queryParams: Record<string, string> = {};
+/** Player counts per NTRP level ("unrated" for none) and per weekday index, over the whole filtered set. */
+export interface PlayerFacets {
+  ntrp: Record<string, number>;
+  day: Record<string, number>;
+}
+
+export interface PlayerPage {
+  players: PlayerResult[];
+  next_cursor: string | null;
+  facets: PlayerFacets;
+}
+
+export function usePlayers(params: PlayerSearchParams = {}, limit = 50) {
+  const queryParams: Record<string, string> = { limit: String(limit) };
   if (params.day) queryParams.day = params.day;
+  if (params.start) queryParams.start = params.start;
+  if (params.end) queryParams.end = params.end;
   if (params.search) queryParams.search = params.search;
   if (params.ntrp_min !== undefined) queryParams.ntrp_min = String(params.ntrp_min);
   if (params.ntrp_max !== undefined) queryParams.ntrp_max = String(params.ntrp_max);
   if (params.court) queryParams.court = params.court;
   if (params.sort) queryParams.sort = params.sort;
 
-  return useQuery<PlayerResult[]>({
+  return useInfiniteQuery<PlayerPage>({
     queryKey: ['players', queryParams],
-    queryFn: () => api.get('/players', { params: queryParams }).then(r => r.data.players),
+    queryFn: ({ pageParam }) => api.get('/players', {
+      params: { ...queryParams, ...(pageParam ? { after: pageParam } : {}) },
+    }).then(r => r.data),
+    initialPageParam: null as string | null,
+    getNextPageParam: (last) => last.next_cursor,
+  });
+}
+
+export type AvailablePlayer = User & { overlap_minutes: number };
+
+/** Players free during a weekday window (day 0=Monday, "HH:MM" bounds), most overlapping minutes first. */
+export function useAvailablePlayers(day: number | undefined, start: string, end: string,
+                                    ntrp?: { min?: number; max?: number }, limit = 50) {
+  const params: Record<string, string | number> = { day: day ?? '', start, end, limit };
+  if (ntrp?.min !== undefined) params.ntrp_min = ntrp.min;
+  if (ntrp?.max !== undefined) params.ntrp_max = ntrp.max;
+  return useQuery<{ players: AvailablePlayer[] }>({
+    queryKey: ['players-available', params],
+    queryFn: () => api.get('/players/available', { params }).then(r => r.data),
+    enabled: day !== undefined && !!start && !!end && start < end,
+  });
+}
+
+export interface AutocompleteResult {
+  id: number;
+  name: string;
+  ntrp?: number | null;
+  address?: string | null;
+}
+
+/** Typeahead matches for a partial player or court name (served from the server's prefix index). */
+export function useAutocomplete(kind: 'player' | 'court', q: string, limit = 8) {
+  const term = q.trim();
+  return useQuery<AutocompleteResult[]>({
+    queryKey: ['autocomplete', kind, term, limit],
+    queryFn: () => api.get('/autocomplete', { params: { kind, q: term, limit } }).then(r => r.data.results),
+    enabled: term.length > 0,
+    staleTime: 30_000,
   });
 }
 
 export function usePlayer(id: string | undefined) {
-  return useQuery<User & { match_history: Match[] }>({
+  return useQuery<User & { recent_matches: Match[]; match_history_cursor: string | null }>({
     queryKey: ['player', id],
     queryFn: () => api.get(`/players/${id}`).then(r => r.data.player),
     enabled: !!id,
   });
 }
 
+export interface MatchHistoryPage {
+  matches: Match[];
+  next_cursor: string | null;
+}
+
+/** Older match history, continuing from the profile's `match_history_cursor`; fetched only once `enabled`. */
+export function usePlayerMatches(playerId: string | undefined, startCursor: string | null | undefined, enabled: boolean) {
+  return useInfiniteQuery<MatchHistoryPage>({
+    queryKey: ['player-matches', playerId, startCursor],
+    queryFn: ({ pageParam }) => api.get(`/players/${playerId}/matches`, {
+      params: { after: pageParam },
+    }).then(r => r.data),
+    initialPageParam: startCursor ?? null,
+    getNextPageParam: (last) => last.next_cursor,
+    enabled: enabled && !!playerId && !!startCursor,
+  });
+}
+
 export function useH2H(playerId: string | undefined, meId: number | undefined) {
-  return useQuery<{ wins: number; losses: number; matches: Match[] }>({
+  return useQuery<{ wins: number; losses: number; matches_played: number; last_played: string | null }>({
     queryKey: ['h2h', playerId],
     queryFn: () => api.get(`/players/${playerId}/h2h`).then(r => r.data.h2h),
     enabled: !!playerId && !!meId,
   });
 }
+
+export function useRatingHistory(playerId: string | undefined, points = 100) {
+  return useQuery<{ history: RatingPoint[]; total: number }>({
+    queryKey: ['rating-history', playerId, points],
+    queryFn: () => api.get(`/players/${playerId}/rating-history`, { params: { points } }).then(r => r.data),
+    enabled: !!playerId,
+  });
+}
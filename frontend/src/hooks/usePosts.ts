@@ -1,4 +1,4 @@
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useInfiniteQuery, useMutation, useQueryClient, InfiniteData } from '@tanstack/react-query';
 import api from '../api/client';
 import { Post } from '../types';
 
@@ -12,10 +12,15 @@ export interface PostFilters {
   for_you?: boolean;
 }
 
-export function usePosts(filters?: PostFilters) {
-  return useQuery<Post[]>({
-    queryKey: ['posts', filters],
-    queryFn: () => {
+export interface PostPage {
+  posts: Post[];
+  next_cursor: string | null;
+}
+
+export function usePosts(filters?: PostFilters, limit = 20) {
+  return useInfiniteQuery<PostPage>({
+    queryKey: ['posts', filters, limit],
+    queryFn: ({ pageParam }) => {
       const params = new URLSearchParams();
       if (filters?.level_min != null) params.set('level_min', String(filters.level_min));
       if (filters?.level_max != null) params.set('level_max', String(filters.level_max));
@@ -24,12 +29,21 @@ export function usePosts(filters?: PostFilters) {
       if (filters?.date_to) params.set('date_to', filters.date_to);
       if (filters?.sort) params.set('sort', filters.sort);
       if (filters?.for_you) params.set('for_you', '1');
-      const qs = params.toString();
-      return api.get(`/posts${qs ? '?' + qs : ''}`).then(r => r.data.posts);
+      params.set('limit', String(limit));
+      if (pageParam) params.set('after', pageParam as string);
+      return api.get(`/posts?${params.toString()}`).then(r => r.data);
     },
+    initialPageParam: null as string | null,
+    getNextPageParam: (last) => last.next_cursor,
   });
 }
 
+type PostPages = InfiniteData<PostPage>;
+
+function mapPostPages(old: PostPages | undefined, fn: (posts: Post[]) => Post[]): PostPages | undefined {
+  return old && { ...old, pages: old.pages.map(pg => ({ ...pg, posts: fn(pg.posts) })) };
+}
+
 export function useRequestPost() {
   const qc = useQueryClient();
   return useMutation({
@@ -57,8 +71,8 @@ export function useUpdatePost() {
     mutationFn: ({ id, data }: { id: number; data: UpdatePostData }) =>
       api.put(`/posts/${id}`, data).then(r => r.data.post as Post),
     onSuccess: (updated) => {
-      qc.setQueryData<Post[]>(['posts'], (old) =>
-        old?.map(p => (p.id === updated.id ? updated : p)) ?? []
+      qc.setQueriesData<PostPages>({ queryKey: ['posts'] }, (old) =>
+        mapPostPages(old, posts => posts.map(p => (p.id === updated.id ? updated : p)))
       );
     },
     onSettled: () => qc.invalidateQueries({ queryKey: ['posts'] }),
@@ -71,12 +85,14 @@ export function useDeletePost() {
     mutationFn: (id: number) => api.delete(`/posts/${id}`),
     onMutate: async (id) => {
       await qc.cancelQueries({ queryKey: ['posts'] });
-      const previous = qc.getQueryData<Post[]>(['posts']);
-      qc.setQueryData<Post[]>(['posts'], (old) => old?.filter(p => p.id !== id) ?? []);
+      const previous = qc.getQueriesData<PostPages>({ queryKey: ['posts'] });
+      qc.setQueriesData<PostPages>({ queryKey: ['posts'] }, (old) =>
+        mapPostPages(old, posts => posts.filter(p => p.id !== id))
+      );
       return { previous };
     },
     onError: (_err, _id, context) => {
-      if (context?.previous) qc.setQueryData(['posts'], context.previous);
+      context?.previous.forEach(([key, data]) => qc.setQueryData(key, data));
     },
     onSettled: () => qc.invalidateQueries({ queryKey: ['posts'] }),
   });
@@ -2,6 +2,7 @@ import { useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import api from '../api/client';
 import { useCourts } from '../hooks/useCourts';
+import { useAutocomplete } from '../hooks/usePlayers';
 
 export default function CreatePost() {
   const nav = useNavigate();
@@ -10,6 +11,7 @@ export default function CreatePost() {
   const [customCourt, setCustomCourt] = useState('');
   const set = (k: string, v: string) => setForm({ ...form, [k]: v });
   const { data: courts } = useCourts();
+  const { data: courtSuggestions } = useAutocomplete('court', customCourt);
 
   const submit = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -37,7 +39,12 @@ export default function CreatePost() {
             <option value="__other__">Other…</option>
           </select>
           {form.court === '__other__' && (
-            <input className="w-full border rounded-lg p-3 mt-2" placeholder="Enter court name" value={customCourt} onChange={e => setCustomCourt(e.target.value)} />
+            <>
+              <input className="w-full border rounded-lg p-3 mt-2" placeholder="Enter court name" list="court-suggestions" value={customCourt} onChange={e => setCustomCourt(e.target.value)} />
+              <datalist id="court-suggestions">
+                {(courtSuggestions ?? []).map(c => <option key={c.id} value={c.name} />)}
+              </datalist>
+            </>
           )}
         </div>
         <div><label className="block text-sm font-medium text-gray-700 mb-1">Type</label>
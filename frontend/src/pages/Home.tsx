@@ -221,7 +221,8 @@ function FeedFilters({ filters, onChange, isLoggedIn }: { filters: PostFilters;
 export default function Home() {
   const { user } = useAuth();
   const [filters, setFilters] = useState<PostFilters>({ sort: 'newest' });
-  const { data: posts, isLoading, error, refetch } = usePosts(filters);
+  const { data: postPages, isLoading, error, refetch, fetchNextPage, hasNextPage, isFetchingNextPage } = usePosts(filters);
+  const posts = postPages?.pages.flatMap(pg => pg.posts);
   const { data: upcoming } = useUpcomingMatches();
   const { data: matchData } = useMatches();
   const requestMutation = useRequestPost();
@@ -347,6 +348,12 @@ export default function Home() {
               </div>
             );
           })}
+          {hasNextPage && (
+            <button onClick={() => fetchNextPage()} disabled={isFetchingNextPage}
+              className="w-full py-3 text-sm font-semibold text-green-700 bg-white rounded-xl shadow-sm active:bg-green-50 disabled:opacity-50">
+              {isFetchingNextPage ? 'Loading...' : 'Show more posts'}
+            </button>
+          )}
         </div>
       )}
 
@@ -3,7 +3,8 @@ import { useLeaderboard } from '../hooks/useLeaderboard';
 import { Spinner, ErrorBox, EmptyState } from '../components/ui';
 
 export default function Leaderboard() {
-  const { data: board, isLoading, error, refetch } = useLeaderboard();
+  const { data, isLoading, error, refetch, fetchNextPage, hasNextPage, isFetchingNextPage } = useLeaderboard();
+  const board = data?.pages.flatMap(p => p.leaderboard);
 
   if (isLoading) return <div className="p-4 pb-24 max-w-lg mx-auto"><Spinner text="Loading leaderboard..." /></div>;
   if (error) return <div className="p-4 pb-24 max-w-lg mx-auto"><ErrorBox message="Failed to load leaderboard" onRetry={refetch} /></div>;
@@ -26,7 +27,7 @@ export default function Leaderboard() {
               <tbody>
                 {board.map((p, i) => (
                   <tr key={p.id} className={`${i % 2 === 0 ? 'bg-white' : 'bg-green-50'} active:bg-green-100`}>
-                    <td className="p-2.5 font-bold text-gray-400">{i < 3 ? ['🥇', '🥈', '🥉'][i] : i + 1}</td>
+                    <td className="p-2.5 font-bold text-gray-400">{p.rank <= 3 ? ['🥇', '🥈', '🥉'][p.rank - 1] : p.rank}</td>
                     <td className="p-2.5">
                       <div className="flex items-center gap-2">
                         <Link to={`/players/${p.id}`} className="text-green-700 hover:underline font-semibold truncate">{p.name}</Link>
@@ -48,6 +49,12 @@ export default function Leaderboard() {
               </tbody>
             </table>
           </div>
+          {hasNextPage && (
+            <button onClick={() => fetchNextPage()} disabled={isFetchingNextPage}
+              className="w-full p-3 text-sm font-semibold text-green-700 active:bg-green-50 disabled:opacity-50">
+              {isFetchingNextPage ? 'Loading...' : 'Show more'}
+            </button>
+          )}
         </div>
       )}
     </div>
@@ -1,5 +1,6 @@
+import { useState } from 'react';
 import { useParams, Link } from 'react-router-dom';
-import { usePlayer, useH2H } from '../hooks/usePlayers';
+import { usePlayer, useH2H, usePlayerMatches } from '../hooks/usePlayers';
 import { usePlayerAvailability } from '../hooks/useAvailability';
 import { useAuth } from '../context/AuthContext';
 import { Spinner, ErrorBox } from '../components/ui';
@@ -18,6 +19,8 @@ export default function PlayerProfile() {
   const { data: player, isLoading, error, refetch } = usePlayer(id);
   const { data: h2h } = useH2H(id, me?.id);
   const { data: availSlots } = usePlayerAvailability(id);
+  const [showOlder, setShowOlder] = useState(false);
+  const older = usePlayerMatches(id, player?.match_history_cursor, showOlder);
 
   if (isLoading) return <div className="p-4 pb-24 max-w-lg mx-auto"><Spinner /></div>;
   if (error || !player) return <div className="p-4 pb-24 max-w-lg mx-auto"><ErrorBox message={error ? 'Failed to load player' : 'Player not found'} onRetry={refetch} /></div>;
@@ -100,9 +103,9 @@ export default function PlayerProfile() {
 
       <div className="bg-white rounded-xl shadow-sm p-4">
         <h2 className="font-semibold text-gray-700 mb-2">Match History</h2>
-        {player.match_history.length === 0 ? <p className="text-sm text-gray-400 text-center py-4">No matches yet</p> : (
+        {player.recent_matches.length === 0 ? <p className="text-sm text-gray-400 text-center py-4">No matches yet</p> : (
           <div className="space-y-2">
-            {player.match_history.slice(0, 10).map(m => {
+            {[...player.recent_matches, ...(older.data?.pages.flatMap(p => p.matches) ?? [])].map(m => {
               const opp = m.player1.id === player.id ? m.player2 : m.player1;
               const won = m.winner_id === player.id;
               return (
@@ -115,6 +118,15 @@ export default function PlayerProfile() {
                 </div>
               );
             })}
+            {player.match_history_cursor && (!showOlder || older.isFetching || older.hasNextPage) && (
+              <button
+                onClick={() => (showOlder ? older.fetchNextPage() : setShowOlder(true))}
+                disabled={older.isFetching}
+                className="w-full text-sm text-green-700 py-1 disabled:opacity-50"
+              >
+                {older.isFetching ? 'Loading…' : 'Show older matches'}
+              </button>
+            )}
           </div>
         )}
       </div>
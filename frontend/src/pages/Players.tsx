@@ -29,7 +29,9 @@ export default function Players() {
     sort,
   }), [day, search, ntrpMin, ntrpMax, court, sort]);
 
-  const { data: players, isLoading, error, refetch } = usePlayers(params);
+  const { data, isLoading, error, refetch, fetchNextPage, hasNextPage, isFetchingNextPage } = usePlayers(params);
+  const players = data?.pages.flatMap(p => p.players);
+  const facets = data?.pages[0]?.facets;
 
   const hasActiveFilters = ntrpMin !== undefined || ntrpMax !== undefined || court !== '';
 
@@ -120,7 +122,7 @@ export default function Players() {
       <div className="flex gap-2 overflow-x-auto mb-4 pb-1 -mx-4 px-4 scrollbar-hide">
         <button onClick={() => setDay('')} className={`text-xs px-3 py-1.5 rounded-full whitespace-nowrap shrink-0 transition-colors ${day === '' ? 'bg-green-600 text-white' : 'bg-gray-100 text-gray-600 active:bg-gray-200'}`}>All</button>
         {DAYS.map((d, i) => (
-          <button key={i} onClick={() => setDay(String(i))} className={`text-xs px-3 py-1.5 rounded-full whitespace-nowrap shrink-0 transition-colors ${day === String(i) ? 'bg-green-600 text-white' : 'bg-gray-100 text-gray-600 active:bg-gray-200'}`}>{d.slice(0, 3)}</button>
+          <button key={i} onClick={() => setDay(String(i))} className={`text-xs px-3 py-1.5 rounded-full whitespace-nowrap shrink-0 transition-colors ${day === String(i) ? 'bg-green-600 text-white' : 'bg-gray-100 text-gray-600 active:bg-gray-200'}`}>{d.slice(0, 3)}{day === '' && facets ? ` · ${facets.day[String(i)] ?? 0}` : ''}</button>
         ))}
       </div>
 
@@ -150,6 +152,15 @@ export default function Players() {
               </div>
             </div>
           ))}
+          {hasNextPage && (
+            <button
+              onClick={() => fetchNextPage()}
+              disabled={isFetchingNextPage}
+              className="w-full text-sm text-green-700 py-2 rounded-xl bg-white shadow-sm disabled:opacity-50"
+            >
+              {isFetchingNextPage ? 'Loading…' : 'Show more players'}
+            </button>
+          )}
         </div>
       )}
     </div>
@@ -42,6 +42,7 @@ export interface Match {
   score_submitted_by: number | null;
   score_confirmed: boolean; score_disputed: boolean;
   winner_id: number | null; winner_name: string | null; created_at: string;
+  elo_change_p1?: number | null; elo_change_p2?: number | null;
   opponent_contact?: { email: string | null; phone: string | null };
 }
 
@@ -64,5 +65,9 @@ export interface TagCount {
 
 export interface LeaderboardEntry {
   id: number; name: string; ntrp: number | null; elo: number;
-  wins: number; losses: number; matches_played: number;
+  wins: number; losses: number; matches_played: number; rank: number;
+}
+
+export interface RatingPoint {
+  recorded_at: string; elo: number;
 }
@@ -18,8 +18,12 @@ class User(UserMixin, db.Model):
     availabilities = db.relationship('Availability', backref='user', lazy=True, cascade='all,delete-orphan')
     posts = db.relationship('LookingToPlay', backref='author', lazy=True, foreign_keys='LookingToPlay.user_id')
 
+    _bulk_stats = None  # filled by load_stats() for list views
+
     @property
     def wins(self):
+        if self._bulk_stats is not None:
+            return self._bulk_stats['wins']
         w = 0
         for m in Match.query.filter(Match.score_confirmed == True).filter(
                 (Match.player1_id == self.id) | (Match.player2_id == self.id)).all():
@@ -29,17 +33,23 @@ class User(UserMixin, db.Model):
 
     @property
     def losses(self):
+        if self._bulk_stats is not None:
+            return self._bulk_stats['losses']
         confirmed = Match.query.filter(Match.score_confirmed == True).filter(
             (Match.player1_id == self.id) | (Match.player2_id == self.id)).all()
         return sum(1 for m in confirmed if m.winner_id and m.winner_id != self.id)
 
     @property
     def matches_played(self):
+        if self._bulk_stats is not None:
+            return self._bulk_stats['matches_played']
         return Match.query.filter(Match.score_confirmed == True).filter(
             (Match.player1_id == self.id) | (Match.player2_id == self.id)).count()
 
     @property
     def unique_opponents(self):
+        if self._bulk_stats is not None:
+            return self._bulk_stats['unique_opponents']
         ids = set()
         for m in Match.query.filter(Match.score_confirmed == True).filter(
                 (Match.player1_id == self.id) | (Match.player2_id == self.id)).all():
@@ -49,7 +59,9 @@ class User(UserMixin, db.Model):
 
     @property
     def reliability(self):
-        total = Match.query.filter(Match.status.in_(['completed', 'cancelled', 'no_show'])).filter(
+        if self._bulk_stats is not None:
+            return self._bulk_stats['reliability']
+        total = Match.query.filter(Match.status.in_(CLOSED_STATUSES)).filter(
             (Match.player1_id == self.id) | (Match.player2_id == self.id)).count()
         if total == 0:
             return 100
@@ -58,6 +70,46 @@ class User(UserMixin, db.Model):
         return round(played / total * 100)
 
 
+STATS_IN_CHUNK = 500  # stay well under SQLite's bound-parameter limit
+CLOSED_STATUSES = ('completed', 'cancelled', 'no_show')
+
+
+def load_stats(users):
+    """Attach wins/losses/matches_played/unique_opponents/reliability to many users.
+
+    One GROUP BY over both sides of Match per chunk of STATS_IN_CHUNK user ids.
+    """
+    by_id = {u.id: u for u in users}
+    counts = {uid: (0, 0, 0, 0, 0, 0) for uid in by_id}
+    ids = list(by_id)
+    for chunk in (ids[i:i + STATS_IN_CHUNK] for i in range(0, len(ids), STATS_IN_CHUNK)):
+        sides = db.union_all(
+            db.select(Match.player1_id.label('uid'), Match.player2_id.label('opponent_id'), Match.winner_id,
+                      Match.score_confirmed, Match.status).where(Match.player1_id.in_(chunk)),
+            db.select(Match.player2_id, Match.player1_id, Match.winner_id,
+                      Match.score_confirmed, Match.status).where(Match.player2_id.in_(chunk)),
+        ).subquery()
+        confirmed = sides.c.score_confirmed == True
+        rows = db.session.query(
+            sides.c.uid,
+            db.func.count(db.case((confirmed & (sides.c.winner_id == sides.c.uid), 1))),
+            db.func.count(db.case((confirmed & sides.c.winner_id.isnot(None)
+                                   & (sides.c.winner_id != sides.c.uid), 1))),
+            db.func.count(db.case((confirmed, 1))),
+            db.func.count(db.distinct(db.case((confirmed, sides.c.opponent_id)))),
+            db.func.count(db.case((sides.c.status == 'completed', 1))),
+            db.func.count(db.case((sides.c.status.in_(CLOSED_STATUSES), 1))),
+        ).group_by(sides.c.uid).all()
+        for uid, *row in rows:
+            counts[uid] = tuple(row)
+    for uid, (w, l, played, opponents, completed, closed) in counts.items():
+        by_id[uid]._bulk_stats = {
+            'wins': w, 'losses': l, 'matches_played': played, 'unique_opponents': opponents,
+            'reliability': round(completed / closed * 100) if closed else 100,
+        }
+    return users
+
+
 class Availability(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)